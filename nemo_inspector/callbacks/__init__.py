@@ -16,6 +16,9 @@ import os
 from pathlib import Path
 import dash_bootstrap_components as dbc
 from dash import Dash
+from dash.dependencies import Input, Output
+
+from nemo_inspector.utils.jobs import InProcessManager
 
 assets_path = os.path.join(Path(__file__).parents[1], "assets")
 
@@ -24,6 +27,27 @@ app = Dash(
     suppress_callback_exceptions=True,
     external_stylesheets=[dbc.themes.BOOTSTRAP],
     assets_folder=assets_path,
+    background_callback_manager=InProcessManager(),
+)
+
+# long Analyze page operations run as background jobs that show their
+# progress and can be cancelled
+JOB_CALLBACK_OPTIONS = dict(
+    background=True,
+    progress=[
+        Output("job_progress", "value"),
+        Output("job_progress", "max"),
+        Output("job_progress", "label"),
+    ],
+    progress_default=[0, 1, ""],
+    cancel=[Input("cancel_job_button", "n_clicks")],
+    running=[
+        (
+            Output("job_status", "style"),
+            {"display": "flex", "align-items": "center", "margin-top": "10px"},
+            {"display": "none"},
+        )
+    ],
 )
 
 import nemo_inspector.callbacks.common as common
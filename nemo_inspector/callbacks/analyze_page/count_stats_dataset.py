@@ -13,31 +13,35 @@
 # limitations under the License.
 
 import logging
-from typing import List
+from typing import Callable, List
 
 from dash import no_update
 from dash.dependencies import Input, Output, State
 
-from nemo_inspector.callbacks import app
+from nemo_inspector.callbacks import JOB_CALLBACK_OPTIONS, app
 from nemo_inspector.layouts import (
+    get_error_layout,
     get_tables_layout,
     get_stats_input,
 )
 from nemo_inspector.settings.constants import (
     CHOOSE_GENERATION,
+    CUSTOM_STATS_PREFETCH,
+    DATA_PAGE_SIZE,
     DELETE,
     ERROR_MESSAGE_TEMPLATE,
     GENERAL_STATS,
     INLINE_STATS,
 )
 from nemo_inspector.utils.common import (
-    calculate_metrics_for_whole_data,
+    compute_custom_stats,
     get_custom_stats,
     get_deleted_stats,
     get_general_custom_stats,
     get_stats_raw,
     get_table_data,
 )
+from nemo_inspector.utils.supervisor import UserCodeError
 
 
 @app.callback(
@@ -79,8 +83,10 @@ def toggle_modal_stats(
         State("stats_modes", "value"),
     ],
     prevent_initial_call=True,
+    **JOB_CALLBACK_OPTIONS,
 )
 def apply_new_stat(
+    set_progress: Callable,
     n_click: int,
     code_raw: str,
     base_model: str,
@@ -118,7 +124,21 @@ def apply_new_stat(
             ] = code_raw
     if base_model == CHOOSE_GENERATION:
         return []
-    calculate_metrics_for_whole_data(get_table_data(), base_model)
+    table = get_table_data()
+    try:
+        # other questions get their stats when they are displayed
+        compute_custom_stats(
+            table, range(len(table))[: DATA_PAGE_SIZE + CUSTOM_STATS_PREFETCH]
+        )
+    except UserCodeError as e:
+        # inline stats that do not fit into the budget are not added
+        if not stats_modes or (
+            GENERAL_STATS not in stats_modes and DELETE not in stats_modes
+        ):
+            for name in namespace["new_stats"]:
+                get_custom_stats().pop(name, None)
+            get_stats_raw()[INLINE_STATS].pop(" ".join(namespace["new_stats"].keys()))
+        return [get_error_layout(e)] + get_tables_layout(base_model=base_model)
     return get_tables_layout(base_model=base_model)
 
 
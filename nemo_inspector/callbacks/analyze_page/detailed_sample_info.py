@@ -41,6 +41,7 @@ from nemo_inspector.utils.common import (
     get_filtered_files,
     get_table_data,
 )
+from nemo_inspector.utils.jobs import holds_data_lock
 
 
 @app.callback(
@@ -60,6 +61,7 @@ from nemo_inspector.utils.common import (
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def update_data_table(
     new_rows_values: List[str],
     models: List[str],
@@ -74,23 +76,18 @@ def update_data_table(
     if not ctx.triggered or not idx:
         return no_update, no_update
 
-    file_ids = {}
+    table = get_table_data()
+    rows = {}
     question_id = current_page * page_size + idx[0]
     for model_id, name in enumerate(file_names):
-        for file_id, file in enumerate(
-            get_table_data()[question_id][models[model_id]]
-            if len(get_table_data())
-            else []
-        ):
-            if file[FILE_NAME] == name:
-                file_ids[models[model_id]] = file_id
+        row = table.find_row(question_id, models[model_id], name) if len(table) else None
+        if row is not None:
+            rows[models[model_id]] = row
 
     for new_rows_id, new_rows_value in zip(new_rows_ids, new_rows_values):
         updated_field = new_rows_id["id"]
         updated_model = new_rows_id["model_name"]
-        get_table_data()[question_id][updated_model][file_ids[updated_model]][
-            updated_field
-        ] = new_rows_value
+        table.store.set_value(rows[updated_model], updated_field, new_rows_value)
 
     return "", js_trigger + " "
 
@@ -132,6 +129,7 @@ def update_data_table(
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def show_item(
     idx: List[int],
     dummmy_trigger: str,
@@ -228,6 +226,7 @@ def compare(n_clicks: List[int], dummy_data: str, row_names: str, button_ids: Li
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def edit_row(
     n_clicks: List[int],
     rows: List[str],
@@ -344,6 +343,7 @@ def del_row(
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def add_model(
     n_clicks: int,
     header: List,
@@ -444,6 +444,7 @@ def del_model(
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def change_file(
     file_names: List[str],
     text_modes: List[List[str]],
@@ -523,6 +524,7 @@ def change_file(
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def change_files_order(
     filter_n_click: int,
     sorting_n_click: int,
@@ -13,16 +13,18 @@
 # limitations under the License.
 
 import json
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from dash import ALL, callback_context, html, no_update
 from dash.dependencies import Input, Output, State
 
-from nemo_inspector.callbacks import app
+from nemo_inspector.callbacks import JOB_CALLBACK_OPTIONS, app
 from nemo_inspector.layouts import (
+    get_error_layout,
     get_filtered_tables_layout,
     get_filter_text,
     get_sorted_tables_layout,
+    get_undone_tables_layout,
 )
 from nemo_inspector.settings.constants import (
     CHOOSE_GENERATION,
@@ -30,6 +32,9 @@ from nemo_inspector.settings.constants import (
     QUESTIONS_FILTERING,
 )
 from nemo_inspector.utils.common import get_table_data
+from nemo_inspector.utils.jobs import holds_data_lock
+from nemo_inspector.utils.store import FILTER_LAYER, SORT_LAYER
+from nemo_inspector.utils.supervisor import UserCodeError
 
 
 @app.callback(
@@ -82,8 +87,10 @@ def toggle_modal_filter(n1: int, n2: int, is_open: bool, js_trigger: str) -> boo
         State("loading_container", "children"),
     ],
     prevent_initial_call=True,
+    **JOB_CALLBACK_OPTIONS,
 )
 def filter_data(
+    set_progress: Callable,
     n_ckicks: int,
     filter_function: str,
     apply_on_filtered_data: int,
@@ -102,21 +109,34 @@ def filter_data(
         return [], no_update, no_update
     if len(get_table_data()) == 0:  # TODO fix
         models = [models[0]]
-    get_filtered_tables_layout(
-        base_model=base_model,
-        filtering_function=filter_function,
-        filter_mode=(
-            FILES_FILTERING if filter_mode and len(filter_mode) else QUESTIONS_FILTERING
-        ),
-        apply_on_filtered_data=(apply_on_filtered_data if apply_on_filtered_data else 0),
-        models=models,
-    )
-    return (
-        get_sorted_tables_layout(
+    try:
+        get_filtered_tables_layout(
+            base_model=base_model,
+            filtering_function=filter_function,
+            filter_mode=(
+                FILES_FILTERING
+                if filter_mode and len(filter_mode)
+                else QUESTIONS_FILTERING
+            ),
+            apply_on_filtered_data=(
+                apply_on_filtered_data if apply_on_filtered_data else 0
+            ),
+            models=models,
+        )
+        tables_layout = get_sorted_tables_layout(
             base_model=base_model,
             sorting_function=sorting_function,
             models=models,
-        ),
+            new_layer=False,
+        )
+    except UserCodeError as e:
+        return (
+            [get_error_layout(e)] + get_sorted_tables_layout(base_model, "", models),
+            no_update,
+            loading_container + " ",
+        )
+    return (
+        tables_layout,
         (
             html.Pre(f"Filtering function:\n{filter_function}")
             if not apply_on_filtered_data or not filtering_functions
@@ -150,3 +170,43 @@ def change_filter_mode(modes: List[str], js_trigger: str) -> str:
         "",
         js_trigger + " ",
     )
+
+
+@app.callback(
+    [
+        Output("compare_models_rows", "children", allow_duplicate=True),
+        Output("filtering_container", "children", allow_duplicate=True),
+        Output("sorting_container", "children", allow_duplicate=True),
+        Output("loading_container", "children", allow_duplicate=True),
+    ],
+    Input("undo_view_button", "n_clicks"),
+    [
+        State({"type": "model_selector", "id": ALL}, "value"),
+        State("base_model_answers_selector", "value"),
+        State("loading_container", "children"),
+    ],
+    prevent_initial_call=True,
+)
+@holds_data_lock
+def undo_view_change(
+    n_clicks: int, models: List[str], base_model: str, loading_container: str
+) -> Tuple[List[html.Tr], html.Pre, html.Pre, str]:
+    if not n_clicks or base_model == CHOOSE_GENERATION:
+        return no_update, no_update, no_update, no_update
+    layout = get_undone_tables_layout(base_model=base_model, models=models)
+    filtering_functions = get_table_data().active_functions(FILTER_LAYER)
+    sorting_functions = get_table_data().active_functions(SORT_LAYER)
+    return (
+        layout,
+        (
+            html.Pre("Filtering function:\n" + "\n".join(filtering_functions))
+            if filtering_functions
+            else ""
+        ),
+        (
+            html.Pre(f"Sorting function:\n{sorting_functions[-1]}")
+            if sorting_functions
+            else ""
+        ),
+        loading_container + " ",
+    )
@@ -22,13 +22,13 @@ from nemo_inspector.callbacks import app
 from nemo_inspector.settings.constants import (
     CHOOSE_LABEL,
     FILE_NAME,
-    LABEL,
     LABEL_SELECTOR_ID,
 )
 from nemo_inspector.utils.common import (
     get_labels,
     get_table_data,
 )
+from nemo_inspector.utils.jobs import holds_data_lock
 
 
 @app.callback(
@@ -86,6 +86,7 @@ def toggle_modal_label(n1: int, n2: int, n3: int, is_open: bool) -> bool:
     ],
     prevent_initial_call=True,
 )
+@holds_data_lock
 def change_label(
     n_click_apply: List[int],
     n_click_del: List[int],
@@ -139,39 +140,29 @@ def change_label(
         question_ids = [current_page * page_size + idx[0]]
 
     apply_for_all_files = bool(len(apply_for_all[button_id - 1]))
+    table = get_table_data()
     for question_id in question_ids:
         for model, current_file_options, current_file in models_to_process:
+            rows = table.rows(question_id, model)
+            if not len(rows):
+                continue
             options = (
                 current_file_options
                 if button_id != 0
-                else [
-                    {"value": file[FILE_NAME]}
-                    for file in get_table_data()[question_id][model]
-                ]
+                else [{"value": table.store.get_value(row, FILE_NAME)} for row in rows]
             )
             for file in options:
                 if not apply_for_all_files and not file["value"] == current_file:
                     continue
 
-                file_id = 0
-                for i, model_file in enumerate(get_table_data()[question_id][model]):
-                    if model_file[FILE_NAME] == file["value"]:
-                        file_id = i
-                        break
+                row = table.store.find_row(rows, file["value"])
+                if row is None:
+                    row = rows[0]
 
-                if (
-                    labels[button_id]
-                    not in get_table_data()[question_id][model][file_id][LABEL]
-                ):
-                    if is_apply:
-                        get_table_data()[question_id][model][file_id][LABEL].append(
-                            labels[button_id]
-                        )
-
-                elif not is_apply:
-                    get_table_data()[question_id][model][file_id][LABEL].remove(
-                        labels[button_id]
-                    )
+                if is_apply:
+                    table.store.add_label(row, labels[button_id])
+                else:
+                    table.store.remove_label(row, labels[button_id])
 
     return dummy_data + "1"
 
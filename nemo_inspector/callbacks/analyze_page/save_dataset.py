@@ -14,18 +14,20 @@
 
 import json
 import os
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from dash import callback_context, html, no_update
 from dash.dependencies import Input, Output, State
 
-from nemo_inspector.callbacks import app
+from nemo_inspector.callbacks import JOB_CALLBACK_OPTIONS, app
 from nemo_inspector.settings.constants import (
     EXTRA_FIELDS,
     FILE_NAME,
 )
 from nemo_inspector.settings.constants.paths import PATH_TO_THE_REPOSITORY
-from nemo_inspector.utils.common import get_table_data
+from nemo_inspector.utils.common import compute_custom_stats, get_table_data
+from nemo_inspector.utils.jobs import report_progress
+from nemo_inspector.utils.supervisor import UserCodeError
 
 
 @app.callback(
@@ -52,8 +54,11 @@ def open_save_dataset_modal(n1: int) -> bool:
         State("save_path", "value"),
     ],
     prevent_initial_call=True,
+    **JOB_CALLBACK_OPTIONS,
 )
-def save_dataset(n_click: int, base_model: str, save_path: str) -> Tuple[List, bool]:
+def save_dataset(
+    set_progress: Callable, n_click: int, base_model: str, save_path: str
+) -> Tuple[List, bool]:
     if not n_click or not save_path or not base_model:
         return no_update, no_update
     if save_path.startswith("nemo_inspector"):
@@ -66,7 +71,15 @@ def save_dataset(n_click: int, base_model: str, save_path: str) -> Tuple[List, b
 
     new_data = {}
 
-    for data in get_table_data():
+    table_data = get_table_data()
+    try:
+        # custom stats are saved with the files, so they are needed for every question
+        compute_custom_stats(table_data)
+    except UserCodeError as e:
+        return True, html.Pre(str(e))
+    for question_index, data in enumerate(table_data):
+        # a cancelled job stops here, before any file is written
+        report_progress(question_index, len(table_data))
         for file_data in data[base_model]:
             file_name = file_data[FILE_NAME]
             if file_name not in new_data:
@@ -23,7 +23,12 @@ from nemo_inspector.layouts import (
     get_stats_input,
 )
 from nemo_inspector.settings.constants import CHOOSE_GENERATION
-from nemo_inspector.utils.common import get_excluded_row, get_table_data
+from nemo_inspector.utils.common import (
+    compute_displayed_custom_stats,
+    get_excluded_row,
+    get_table_data,
+)
+from nemo_inspector.utils.jobs import holds_data_lock
 
 
 @app.callback(
@@ -35,6 +40,7 @@ from nemo_inspector.utils.common import get_excluded_row, get_table_data
     State("loading_container", "children"),
     prevent_initial_call=True,
 )
+@holds_data_lock
 def choose_base_model(
     base_model: str,
     loading_container: str,
@@ -58,16 +64,21 @@ def choose_base_model(
     ],
     State("base_model_answers_selector", "value"),
 )
+@holds_data_lock
 def change_page(page_current: int, page_size: int, base_model: str) -> List[Dict]:
     if not get_table_data():
         return no_update
-    return [
-        data[base_model][0]
-        for data in get_table_data()[
-            page_current * page_size : (page_current + 1) * page_size
-        ]
-        if base_model in data.keys()
+    table = get_table_data()
+    page_questions = range(len(table))[
+        page_current * page_size : (page_current + 1) * page_size
     ]
+    compute_displayed_custom_stats(table, page_questions)
+    # records of the page are read together, every prediction file once
+    return table.store.records(
+        table.rows(question_id, base_model)[0]
+        for question_id in page_questions
+        if len(table.rows(question_id, base_model))
+    )
 
 
 @app.callback(
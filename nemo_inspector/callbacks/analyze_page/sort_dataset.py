@@ -13,14 +13,15 @@
 # limitations under the License.
 
 import json
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from dash import ALL, callback_context, html, no_update
 from dash.dependencies import Input, Output, State
 
-from nemo_inspector.callbacks import app
-from nemo_inspector.layouts import get_sorted_tables_layout
+from nemo_inspector.callbacks import JOB_CALLBACK_OPTIONS, app
+from nemo_inspector.layouts import get_error_layout, get_sorted_tables_layout
 from nemo_inspector.settings.constants import CHOOSE_GENERATION
+from nemo_inspector.utils.supervisor import UserCodeError
 
 
 @app.callback(
@@ -69,8 +70,10 @@ def toggle_modal_sorting(n1: int, n2: int, is_open: bool, js_trigger: str) -> bo
         State("loading_container", "children"),
     ],
     prevent_initial_call=True,
+    **JOB_CALLBACK_OPTIONS,
 )
 def sorting_data(
+    set_progress: Callable,
     n_ckicks: int,
     sorting_function: str,
     models: List[str],
@@ -79,12 +82,20 @@ def sorting_data(
 ) -> Tuple[List[html.Tr], bool]:
     if base_model == CHOOSE_GENERATION or not sorting_function:
         return no_update, no_update, no_update
-    return (
-        get_sorted_tables_layout(
+    try:
+        tables_layout = get_sorted_tables_layout(
             base_model=base_model,
             sorting_function=sorting_function,
             models=models,
-        ),
+        )
+    except UserCodeError as e:
+        return (
+            [get_error_layout(e)] + get_sorted_tables_layout(base_model, "", models),
+            no_update,
+            loading_container + " ",
+        )
+    return (
+        tables_layout,
         html.Pre(f"Sorting function:\n{sorting_function}"),
         loading_container + " ",
     )
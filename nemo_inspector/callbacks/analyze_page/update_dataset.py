@@ -12,14 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from dash import ALL, html, no_update
 from dash.dependencies import Input, Output, State
 
-from nemo_inspector.callbacks import app
-from nemo_inspector.layouts import get_updated_tables_layout
+from nemo_inspector.callbacks import JOB_CALLBACK_OPTIONS, app
+from nemo_inspector.layouts import (
+    get_error_layout,
+    get_sorted_tables_layout,
+    get_updated_tables_layout,
+)
 from nemo_inspector.settings.constants import CHOOSE_GENERATION
+from nemo_inspector.utils.supervisor import UserCodeError
 
 
 @app.callback(
@@ -55,8 +60,10 @@ def open_update_dataset_modal(n1: int, n2: int, is_open: bool, js_trigger: str)
         State("loading_container", "children"),
     ],
     prevent_initial_call=True,
+    **JOB_CALLBACK_OPTIONS,
 )
 def update_dataset(
+    set_progress: Callable,
     n_ckicks: int,
     update_function: str,
     models: List[str],
@@ -65,9 +72,12 @@ def update_dataset(
 ) -> Tuple[List[html.Tr], bool]:
     if base_model == CHOOSE_GENERATION or not update_function:
         return no_update, no_update
-    return (
-        get_updated_tables_layout(
+    try:
+        tables_layout = get_updated_tables_layout(
             base_model=base_model, update_function=update_function, models=models
-        ),
-        loading_container + " ",
-    )
+        )
+    except UserCodeError as e:
+        tables_layout = [get_error_layout(e)] + get_sorted_tables_layout(
+            base_model, "", models
+        )
+    return tables_layout, loading_container + " "
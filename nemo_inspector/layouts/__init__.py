@@ -16,6 +16,7 @@ from nemo_inspector.layouts.analyze_page_layouts.base_layout import (
     get_compare_test_layout,
     get_filtered_tables_layout,
     get_tables_layout,
+    get_undone_tables_layout,
     get_updated_tables_layout,
     get_sorted_tables_layout,
 )
@@ -28,6 +29,7 @@ from nemo_inspector.layouts.base_layouts import (
     get_main_page_layout,
 )
 from nemo_inspector.layouts.common_layouts import (
+    get_error_layout,
     get_selector_layout,
     get_single_prompt_output_layout,
     get_switch_layout,
@@ -13,9 +13,10 @@
 # limitations under the License.
 
 import logging
-from typing import List
+from typing import Dict, List, Tuple
 
 import dash_bootstrap_components as dbc
+import numpy as np
 from dash import dcc, html
 
 from nemo_inspector.layouts.analyze_page_layouts.table_layouts import (
@@ -27,22 +28,48 @@ from nemo_inspector.layouts.common_layouts import (
     get_selector_layout,
 )
 from nemo_inspector.settings.constants import (
-    BASE_GENERATION,
     CHOOSE_GENERATION,
     ERROR_MESSAGE_TEMPLATE,
     FILES_FILTERING,
 )
 from nemo_inspector.utils.common import (
     catch_eval_exception,
-    clear_table_data,
-    custom_deepcopy,
+    compute_custom_stats,
     get_available_models,
+    get_base_metrics_state,
+    get_filtering_jobs,
     get_data_from_files,
     get_eval_function,
-    get_metrics,
+    get_result_cache,
     get_table_data,
+    get_user_code_limits,
     is_detailed_answers_rows_key,
+    restore_base_metrics,
+    set_groups_metrics,
+    set_table_data,
+    uses_custom_stats,
 )
+from nemo_inspector.utils.filtering import (
+    filter_files_parallel,
+    filter_questions,
+    filter_questions_parallel,
+    filter_rows,
+    get_filter_expressions,
+    get_filtering_functions,
+    get_sort_keys,
+    is_filter_query,
+    normalize_code,
+    order_by_key_lists,
+    parse_filter_query,
+)
+from nemo_inspector.utils.store import (
+    FILTER_LAYER,
+    SORT_LAYER,
+    PartialRank,
+    TableView,
+    ViewLayer,
+)
+from nemo_inspector.utils.supervisor import Progress, UserCodeError, run_supervised
 from nemo_inspector.layouts.analyze_page_layouts.modals_layouts import (
     get_add_stats_modal_layout,
     get_change_label_modal_layout,
@@ -64,6 +91,11 @@ def get_compare_test_layout() -> html.Div:
                     get_change_label_modal_layout(apply_for_all_files=False),
                     get_update_dataset_modal_layout(),
                     get_save_dataset_modal_layout(),
+                    dbc.Button(
+                        "Undo",
+                        id="undo_view_button",
+                        class_name="button-class",
+                    ),
                     dbc.Button(
                         "+",
                         id="add_model",
@@ -89,6 +121,21 @@ def get_compare_test_layout() -> html.Div:
                 type="circle",
                 style={"margin-top": "50px"},
             ),
+            html.Div(
+                [
+                    dbc.Progress(
+                        id="job_progress", value=0, max=1, style={"flex-grow": "1"}
+                    ),
+                    dbc.Button(
+                        "Cancel",
+                        id="cancel_job_button",
+                        class_name="button-class",
+                        style={"margin-left": "10px"},
+                    ),
+                ],
+                id="job_status",
+                style={"display": "none"},
+            ),
             html.Div(
                 children=[],
                 id="compare_models_rows",
@@ -108,27 +155,37 @@ def get_updated_tables_layout(
             for model_name, model_info in get_available_models().items()
         }
 
-        for question_id in range(len(get_table_data())):
-            new_dicts = list(
-                map(
-                    lambda data: catch_eval_exception(
-                        available_models,
-                        update_eval_function,
-                        data,
-                        data,
-                        errors_dict,
-                    ),
-                    get_table_data()[question_id][base_model],
+        table = get_table_data()
+        if uses_custom_stats(update_function):
+            compute_custom_stats(table)
+        rows = [
+            row
+            for question_id in range(len(table))
+            for row in table.rows(question_id, base_model)
+        ]
+
+        # records are updated only after the function succeeded for all of them,
+        # only the fields it changed come back from the worker
+        def update_records(
+            progress: Progress,
+        ) -> Tuple[List[Tuple[Dict, List[str]]], Dict]:
+            changes, update_errors = [], {}
+            for data in table.store.lazy_records(rows, with_original=True):
+                new_record = catch_eval_exception(
+                    available_models,
+                    update_eval_function,
+                    data,
+                    data,
+                    update_errors,
                 )
-            )
-            for i, new_dict in enumerate(new_dicts):
-                for key, value in new_dict.items():
-                    get_table_data()[question_id][base_model][i][key] = value
+                changes.append(data.changes(new_record))
+                progress(len(changes))
+            return changes, update_errors
 
-                keys = list(get_table_data()[question_id][base_model][i].keys())
-                for key in keys:
-                    if key not in new_dict:
-                        get_table_data()[question_id][base_model][i].pop(key)
+        ((changes, errors_dict),) = run_supervised(
+            [update_records], [len(rows)], "update", *get_user_code_limits()
+        )
+        table.store.update_records(rows, changes)
 
     if len(errors_dict):
         logging.error(ERROR_MESSAGE_TEMPLATE.format("update_dataset", errors_dict))
@@ -153,42 +210,56 @@ def get_updated_tables_layout(
 
 
 def get_sorted_tables_layout(
-    base_model: str, sorting_function: str, models: List[str]
+    base_model: str, sorting_function: str, models: List[str], new_layer: bool = True
 ) -> List[html.Tr]:
+    """Sorts the view, new_layer=False reorders the last layer instead of adding one."""
     errors_dict = {}
     if sorting_function:
-        sortting_eval_function = get_eval_function(sorting_function.strip())
         available_models = {
             model_name: model_info["file_paths"]
             for model_name, model_info in get_available_models().items()
         }
+        table = get_table_data()
+        store = table.store
+        layer = table.layers[-1]
+        data_state = get_base_metrics_state(store)
+        key = (table.state, SORT_LAYER, normalize_code(sorting_function), base_model)
+        result_cache = get_result_cache()
+        cached = result_cache.get(data_state, key)
+        if cached is not None:
+            rank, questions, cached_errors = cached
+            errors_dict.update(cached_errors)
+        else:
+            if uses_custom_stats(sorting_function):
+                compute_custom_stats(table)
+            rows = table.visible_rows()
+            keys = get_sort_keys(
+                sorting_function, store, rows, available_models, errors_dict
+            )
+            groups = (
+                store.questions[rows].astype(np.int64) * len(store.models)
+                + store.model_codes[rows]
+            )
+            # files and questions are ordered only as far as they are displayed
+            rank = PartialRank(table.rank, rows, groups, keys)
 
-        for question_id in range(len(get_table_data())):
-            for model in get_table_data()[question_id].keys():
-                get_table_data()[question_id][model].sort(
-                    key=lambda data: catch_eval_exception(
-                        available_models,
-                        sortting_eval_function,
-                        data,
-                        0,
-                        errors_dict,
-                    )
-                )
-
-        get_table_data().sort(
-            key=lambda single_question_data: tuple(
-                map(
-                    lambda data: catch_eval_exception(
-                        available_models,
-                        sortting_eval_function,
-                        data,
-                        0,
-                        errors_dict,
-                    ),
-                    single_question_data[base_model],
-                )
+            # questions are ordered by the keys of their base model files in display order
+            positions = np.zeros(store.num_questions, dtype=np.int64)
+            positions[table.questions] = np.arange(len(table))
+            base_rows = store.model_codes[rows] == store.model_ids.get(base_model, -1)
+            questions = order_by_key_lists(
+                table.questions,
+                positions[store.questions[rows[base_rows]]],
+                keys[base_rows],
             )
-        )
+            result_cache.put(data_state, key, (rank, questions, dict(errors_dict)))
+        logging.info(f"Filter and sort results: {result_cache}")
+        # the layer is added only once the keys are computed, so failed sorts leave no trace
+        if new_layer:
+            layer = table.push_layer(SORT_LAYER, sorting_function)
+        layer.rank = rank
+        layer.questions = questions
+        layer.state = (store.version, key)
     if len(errors_dict):
         logging.error(ERROR_MESSAGE_TEMPLATE.format("sorting", errors_dict))
 
@@ -211,6 +282,105 @@ def get_sorted_tables_layout(
     )
 
 
+def get_questions_rows(table: TableView) -> List[List[Tuple[str, np.ndarray]]]:
+    """Returns (model, visible rows) of every displayed question in display order."""
+    return [
+        [
+            (model_id, table.rows(question_id, model_id))
+            for model_id in table.models(question_id)
+        ]
+        for question_id in range(len(table))
+    ]
+
+
+def filter_table(
+    table: TableView,
+    layer: ViewLayer,
+    base_model: str,
+    filtering_function: str,
+    filter_mode: str,
+    errors_dict: Dict,
+) -> None:
+    """Applies the filter to the layer pushed for it, the top layer of the view."""
+    available_models = {
+        model_name: model_info["file_paths"]
+        for model_name, model_info in get_available_models().items()
+    }
+    is_query = is_filter_query(filtering_function)
+    if not is_query:
+        # compiling in this process reports syntax errors before anything is sent to workers
+        get_filtering_functions(filtering_function, base_model, filter_mode)
+    n_jobs = get_filtering_jobs()
+
+    if filter_mode == FILES_FILTERING:
+        questions_rows = get_questions_rows(table)
+        expressions = (
+            parse_filter_query(filtering_function, base_model)
+            if is_query
+            else get_filter_expressions(filtering_function, base_model)
+        )
+        if expressions is not None:
+            visible_rows = table.visible_rows()
+            rows_keep = np.zeros(len(table.store), dtype=bool)
+            rows_keep[visible_rows] = filter_rows(
+                expressions, table.store, visible_rows, available_models, errors_dict
+            )
+            questions_keep = [
+                [rows_keep[rows] for _, rows in groups] for groups in questions_rows
+            ]
+        else:
+            questions_keep = filter_files_parallel(
+                filtering_function,
+                base_model,
+                available_models,
+                table.store,
+                questions_rows,
+                errors_dict,
+                n_jobs,
+            )
+        changed_rows = np.zeros(len(table.store), dtype=bool)
+        clean_questions = []
+        selected = table.selected.copy()
+        for question_id, (groups, groups_keep) in enumerate(
+            zip(questions_rows, questions_keep)
+        ):
+            good_data = True
+            for (model_id, rows), keep in zip(groups, groups_keep):
+                # metrics of a group whose files are all kept stay the same
+                if not keep.all():
+                    selected[rows[~keep]] = False
+                    changed_rows[rows[keep]] = True
+
+                if not keep.any():
+                    good_data = False
+            if good_data:
+                clean_questions.append(question_id)
+        set_groups_metrics(table.store, np.flatnonzero(changed_rows))
+        layer.select(selected, table.store.group_ids)
+    elif is_query:
+        questions_keep = filter_questions(
+            parse_filter_query(filtering_function, base_model, question_level=True),
+            table.store,
+            table.questions,
+            table.visible_rows(),
+            available_models,
+            errors_dict,
+        )
+        clean_questions = np.flatnonzero(questions_keep)
+    else:
+        questions_keep = filter_questions_parallel(
+            filtering_function,
+            base_model,
+            filter_mode,
+            table.store,
+            get_questions_rows(table),
+            errors_dict,
+            n_jobs,
+        )
+        clean_questions = np.flatnonzero(np.array(questions_keep, dtype=bool))
+    layer.questions = table.questions[np.array(clean_questions, dtype=int)]
+
+
 def get_filtered_tables_layout(
     base_model: str,
     filtering_function: str,
@@ -218,102 +388,53 @@ def get_filtered_tables_layout(
     models: List[str],
     filter_mode: str,
 ) -> List[html.Tr]:
-    clean_table_data = []
+    if get_table_data().store is not get_data_from_files():
+        set_table_data(TableView(get_data_from_files()))
+    table = get_table_data()
     if not apply_on_filtered_data:
-        clear_table_data()
-        get_table_data().extend(custom_deepcopy(get_data_from_files()))
-        for question_id in range(len(get_table_data())):
-            for model_id, files_data in get_table_data()[question_id].items():
-                stats = get_metrics(files_data)
-                get_table_data()[question_id][model_id] = list(
-                    map(
-                        lambda data: {**data, **stats},
-                        get_table_data()[question_id][model_id],
-                    )
-                )
+        layer = table.push_layer(FILTER_LAYER, filtering_function, from_base=True)
+        set_visible_metrics(table)
+    elif filtering_function:
+        layer = table.push_layer(FILTER_LAYER, filtering_function)
 
     errors_dict = {}
     if filtering_function:
-        available_models = {
-            model_name: model_info["file_paths"]
-            for model_name, model_info in get_available_models().items()
-        }
-        filter_lines = filtering_function.strip().split("\n")
-        common_expressions, splitted_filters = (
-            "\n".join(filter_lines[:-1]),
-            filter_lines[-1],
+        data_state = get_base_metrics_state(table.store)
+        key = (
+            table.state,
+            FILTER_LAYER,
+            normalize_code(filtering_function),
+            filter_mode,
+            base_model,
         )
-        full_splitted_filters = [
-            common_expressions + "\n" + single_filter
-            for single_filter in splitted_filters.split("&&")
-        ]
-        filtering_functions = (
-            list(
-                [
-                    get_eval_function(f"{BASE_GENERATION} = '{base_model}'\n" + func)
-                    for func in full_splitted_filters
-                ]
-            )
-            if filtering_function
-            else []
-        )
-
-        if filter_mode == FILES_FILTERING:
-            for question_id in range(len(get_table_data())):
-                good_data = True
-                for model_id in get_table_data()[question_id].keys():
-
-                    def filtering_key_function(file_dict):
-                        data = {model_id: file_dict}
-                        return all(
-                            [
-                                catch_eval_exception(
-                                    available_models,
-                                    filter_function,
-                                    data,
-                                    True,
-                                    errors_dict,
-                                )
-                                for filter_function in filtering_functions
-                            ],
-                        )
-
-                    get_table_data()[question_id][model_id] = list(
-                        filter(
-                            filtering_key_function,
-                            get_table_data()[question_id][model_id],
-                        )
-                    )
-                    stats = get_metrics(get_table_data()[question_id][model_id])
-                    get_table_data()[question_id][model_id] = list(
-                        map(
-                            lambda data: {**data, **stats},
-                            get_table_data()[question_id][model_id],
-                        )
-                    )
-
-                    if get_table_data()[question_id][model_id] == []:
-                        good_data = False
-                if good_data:
-                    clean_table_data.append(get_table_data()[question_id])
-        else:
-            func = get_eval_function(
-                f"{BASE_GENERATION} = '{base_model}'\n" + filtering_function.strip()
-            )
-            clean_table_data = list(
-                filter(
-                    lambda data: catch_eval_exception(
-                        available_models=[],
-                        eval_func=func,
-                        data=data,
-                        default_answer=True,
-                        errors_dict=errors_dict,
-                    ),
-                    get_table_data(),
+        result_cache = get_result_cache()
+        cached = result_cache.get(data_state, key)
+        try:
+            if cached is not None:
+                selected, layer.questions, cached_errors = cached
+                errors_dict.update(cached_errors)
+                if selected is not layer.selected:
+                    layer.select(selected, table.store.group_ids)
+                    set_visible_metrics(table)
+            else:
+                if uses_custom_stats(filtering_function):
+                    compute_custom_stats(table)
+                filter_table(
+                    table, layer, base_model, filtering_function, filter_mode, errors_dict
                 )
-            )
-        clear_table_data()
-        get_table_data().extend(clean_table_data)
+                result_cache.put(
+                    data_state,
+                    key,
+                    (layer.selected, layer.questions, dict(errors_dict)),
+                )
+        except Exception:
+            # a filter that failed leaves the view as it was
+            table.pop_layer(layer)
+            set_visible_metrics(table)
+            raise
+        logging.info(f"Filter and sort results: {result_cache}")
+        # the version tells apart layers computed before and after an edit of the data
+        layer.state = (table.store.version, key)
     if len(errors_dict):
         logging.error(ERROR_MESSAGE_TEMPLATE.format("filtering", errors_dict))
 
@@ -336,9 +457,34 @@ def get_filtered_tables_layout(
     )
 
 
+def set_visible_metrics(table: TableView) -> None:
+    """Sets metrics of every visible question/model group from its visible files.
+
+    Metrics over all files are restored from the load time ones, so only
+    groups with hidden files are recomputed.
+    """
+    store = table.store
+    restore_base_metrics(store)
+    visible_questions = np.zeros(store.num_questions, dtype=bool)
+    visible_questions[table.question_ids()] = True
+    hidden_rows = np.flatnonzero(~table.selected & visible_questions[store.questions])
+    groups = np.unique(store.group_ids[hidden_rows])
+    set_groups_metrics(
+        store, np.flatnonzero(table.selected & np.isin(store.group_ids, groups))
+    )
+
+
+def get_undone_tables_layout(base_model: str, models: List[str]) -> List[html.Tr]:
+    """Drops the last filter or sort of the view."""
+    table = get_table_data()
+    if table.pop_layer():
+        set_visible_metrics(table)
+    return get_sorted_tables_layout(base_model, "", models)
+
+
 def get_tables_layout(base_model: str) -> List:
-    if get_table_data() == []:
-        get_table_data().extend(custom_deepcopy(get_data_from_files()))
+    if len(get_table_data()) == 0:
+        set_table_data(TableView(get_data_from_files()))
     return (
         get_short_info_table_layout()
         + get_general_stats_layout(base_model)
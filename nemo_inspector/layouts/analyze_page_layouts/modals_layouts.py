@@ -35,7 +35,7 @@ from nemo_inspector.settings.constants import (
     GENERAL_STATS,
 )
 from nemo_inspector.settings.constants.configurations import STATS_KEYS
-from nemo_inspector.utils.common import get_labels, get_metrics, get_table_data
+from nemo_inspector.utils.common import get_labels, get_metrics_names, get_table_data
 
 
 def get_filter_modal_layout(
@@ -127,12 +127,15 @@ def get_sorting_modal_layout(id: int = -1, available_params: List[str] = []) ->
     available_params = list(
         get_table_data()[0][list(get_table_data()[0].keys())[0]][0].keys()
         if len(get_table_data()) and not available_params
-        else STATS_KEYS + list(get_metrics([]).keys()) + ["+ all fields in json"]
+        else STATS_KEYS + get_metrics_names() + ["+ all fields in json"]
     )
     text = (
         "Write an expression to sort the data\n\n"
         "For example: len(data['question'])\n\n"
         "The function has to return sortable type\n\n"
+        "Or write a query starting with order by, e.g.:\n"
+        "order by is_correct desc, len(generation)\n"
+        "Files where a key is missing go after the others, also with desc\n\n"
         "Available parameters to sort data:\n"
         + "\n".join(
             [
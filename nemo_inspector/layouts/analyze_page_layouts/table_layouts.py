@@ -15,7 +15,7 @@
 import json
 import logging
 import math
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Tuple
 
 
 import dash_bootstrap_components as dbc
@@ -41,6 +41,7 @@ from nemo_inspector.settings.constants import (
     ERROR_MESSAGE_TEMPLATE,
     FILE_NAME,
     FILES_ONLY,
+    GENERAL_STATS,
     LABEL,
     LATEX,
     MODEL_SELECTOR_ID,
@@ -48,16 +49,24 @@ from nemo_inspector.settings.constants import (
 )
 from nemo_inspector.utils.common import (
     catch_eval_exception,
+    compute_custom_stats,
+    compute_displayed_custom_stats,
     get_available_models,
+    get_base_metrics_state,
     get_compared_rows,
     get_editable_rows,
     get_excluded_row,
     get_filtered_files,
     get_general_custom_stats,
-    get_metrics,
+    get_general_stats_cache,
+    get_metrics_names,
+    get_stats_raw,
     get_table_data,
+    get_user_code_limits,
     is_detailed_answers_rows_key,
+    uses_custom_stats,
 )
+from nemo_inspector.utils.supervisor import Progress, UserCodeError, run_supervised
 
 
 def get_short_info_table_layout() -> List[dbc.Row]:
@@ -72,7 +81,7 @@ def get_short_info_table_layout() -> List[dbc.Row]:
                             "id": name,
                             "hideable": True,
                         }
-                        for name in STATS_KEYS + list(get_metrics([]).keys())
+                        for name in STATS_KEYS + get_metrics_names()
                     ],
                     row_selectable="single",
                     cell_selectable=False,
@@ -347,6 +356,7 @@ def get_detailed_info_table_content(
     sorting_functions: List[str],
     text_modes: List[List[str]],
 ) -> List:
+    compute_displayed_custom_stats(get_table_data(), range(question_id, question_id + 1))
     table_data = []
     for col_id, (model, file_id, filter_function, sorting_function, modes) in enumerate(
         zip(models, files_id, filter_functions, sorting_functions, text_modes)
@@ -375,26 +385,64 @@ def get_detailed_info_table_content(
 def get_general_stats_layout(
     base_model: str,
 ) -> html.Div:
-    data_for_base_model = [data.get(base_model, []) for data in get_table_data()]
+    table = get_table_data()
+    # read from the running counts of the view, so a sorted view is not ordered
+    # beyond its first page and nothing is recounted after a sort or an edit
+    overall_samples = dataset_size = 0
+    data_state = None
+    if table.store is not None:
+        overall_samples, dataset_size = table.answer_counts(base_model)
+        data_state = get_base_metrics_state(table.store)
     custom_stats = {}
+    stats_cache = get_general_stats_cache()
+    # general stats run again only after the data, the view or the stats changed
+    missing_stats = {}
     for name, func in get_general_custom_stats().items():
+        cached = stats_cache.get(data_state, (table.state, base_model, name, func))
+        if cached is not None:
+            (custom_stats[name],) = cached
+        else:
+            missing_stats[name] = func
+    if missing_stats:
+        if uses_custom_stats(" ".join(get_stats_raw()[GENERAL_STATS].values())):
+            try:
+                compute_custom_stats(table)
+            except UserCodeError as e:
+                logging.error(str(e))
+        data_for_base_model = [
+            table.files(question_id, base_model) for question_id in range(len(table))
+        ]
+    for name, func in missing_stats.items():
+
+        def apply_stat(progress: Progress, func: Callable = func) -> Tuple[Any, Dict]:
+            stat_errors = {}
+            value = catch_eval_exception(
+                [],
+                func,
+                data_for_base_model,
+                "Got error when applying function",
+                stat_errors,
+            )
+            return value, stat_errors
+
         errors_dict = {}
-        custom_stats[name] = catch_eval_exception(
-            [],
-            func,
-            data_for_base_model,
-            "Got error when applying function",
-            errors_dict,
-        )
+        try:
+            ((custom_stats[name], errors_dict),) = run_supervised(
+                [apply_stat], [1], name, *get_user_code_limits()
+            )
+        except UserCodeError as e:
+            custom_stats[name] = str(e)
+        else:
+            stats_cache.put(
+                data_state, (table.state, base_model, name, func), (custom_stats[name],)
+            )
         if len(errors_dict):
             logging.error(ERROR_MESSAGE_TEMPLATE.format(name, errors_dict))
 
-    overall_samples = sum(len(question_data) for question_data in data_for_base_model)
-    dataset_size = len(list(filter(lambda x: bool(x), data_for_base_model)))
     stats = {
         "dataset size": dataset_size,
         "overall number of samples": overall_samples,
         "generations per sample": (overall_samples / dataset_size if dataset_size else 0),
-        **custom_stats,
+        **{name: custom_stats[name] for name in get_general_custom_stats()},
     }
     return [html.Div([html.Pre(f"{name}: {value}") for name, value in stats.items()])]
@@ -19,7 +19,7 @@ import dash_ace
 
 from nemo_inspector.layouts.common_layouts import get_selector_layout
 from nemo_inspector.settings.constants import STATS_KEYS
-from nemo_inspector.utils.common import get_metrics, get_table_data
+from nemo_inspector.utils.common import get_metrics_names, get_table_data
 from nemo_inspector.settings.constants.common import (
     CUSTOM,
     DELETE,
@@ -42,7 +42,7 @@ def get_filter_text(
     available_filters = list(
         get_table_data()[0][list(get_table_data()[0].keys())[0]][0].keys()
         if len(get_table_data()) and not available_filters
-        else STATS_KEYS + list(get_metrics([]).keys()) + ["+ all fields in json"]
+        else STATS_KEYS + get_metrics_names() + ["+ all fields in json"]
     )
     if mode == FILES_ONLY:
         return (
@@ -64,6 +64,8 @@ def get_filter_text(
             + "You can use base_generation variable to access data from the current generation\n\n"
             + "For example:\ndata['generation1']['correct_responses'] > 0.5 && data[base_generation]['no_response'] < 0.2\n\n"
             + "The expression has to return bool.\n\n"
+            + "Or write a query starting with where (fields without generation are from the current one):\n"
+            + "where is_correct and error_message in ['syntax', 'timeout'] && generation1.score > 0.5\n\n"
             + "Available parameters to filter data:\n"
             + "\n".join(
                 [
@@ -80,6 +82,9 @@ def get_filter_text(
             + "You can use base_generation variable to access data from the current generation\n\n"
             + "For example:\ndata['generation1'][0]['is_correct'] != data[base_generation][0]['is_correct']\n\n"
             + "The expression has to return bool.\n\n"
+            + "Or write a query starting with where, aggregating files with any, all, count, sum, mean, min, max:\n"
+            + "where count(is_correct) >= 2 and not any(generation1.is_correct)\n"
+            + "Questions without files of an aggregated generation are kept, like when data[...] fails\n\n"
             + "Available parameters to filter data:\n"
             + "\n".join(
                 [
@@ -61,6 +61,10 @@ def get_switch_layout(
     )
 
 
+def get_error_layout(error: Exception) -> html.Pre:
+    return html.Pre(str(error), style={"color": "red"})
+
+
 def get_selector_layout(options: Iterable, id: str, value: str = "") -> dbc.Select:
     if value not in options:
         options = [value] + list(options)
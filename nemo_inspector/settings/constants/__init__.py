@@ -14,10 +14,17 @@
 
 
 from nemo_inspector.settings.constants.configurations import (
+    BASE_STATS_KEYS,
+    CATEGORICAL_MAX_UNIQUE,
     CODE_SEPARATORS,
+    CUSTOM_STATS_PREFETCH,
     DATA_PAGE_SIZE,
+    EAGER_FIELDS,
     EXTRA_FIELDS,
     IGNORE_FIELDS,
+    INDEX_MAX_CARDINALITY,
+    LAZY_FIELD_MIN_LENGTH,
+    MIN_SORTED_PREFIX,
     PARAMS_TO_REMOVE,
     RETRIEVAL_FIELDS,
     SEPARATOR_DISPLAY,
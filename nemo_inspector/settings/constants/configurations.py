@@ -19,9 +19,17 @@ CODE_SEPARATORS = {
     "code_output_end": "{code_output_end}",
     "code_output_format": "llama",
 }
+CATEGORICAL_MAX_UNIQUE = 4096
+# questions after the displayed ones whose custom stats are computed with them
+CUSTOM_STATS_PREFETCH = 10
 DATA_PAGE_SIZE = 10
+EAGER_FIELDS = ["predicted_answer", "is_correct", "judgement", "expected_answer"]
 EXTRA_FIELDS = ["page_index", "file_name"]
 IGNORE_FIELDS = ["stop_phrases", "used_prompt", "server_type"]
+INDEX_MAX_CARDINALITY = 256
+LAZY_FIELD_MIN_LENGTH = 512
+# questions ordered at once when a sorted view is read past its ordered part
+MIN_SORTED_PREFIX = 10 * DATA_PAGE_SIZE
 PARAMS_TO_REMOVE = [
     "output_file",
     "dataset",
@@ -29,6 +37,13 @@ PARAMS_TO_REMOVE = [
     "retriever",
     "_context_template",
     "save_generations_path",
+    "parse_cache_dir",
+    "parse_cache_max_mb",
+    "watch_interval",
+    "filtering_jobs",
+    "user_code_timeout",
+    "user_code_memory_mb",
+    "result_cache_size",
 ]
 RETRIEVAL_FIELDS = [
     "max_retrieved_chars_field",
@@ -53,3 +68,5 @@ STATS_KEYS = [
     "question_index",
     "problem",
 ]
+# built-in stats of every question/model group, custom stats follow them
+BASE_STATS_KEYS = ["correct_responses", "wrong_responses", "no_response"]
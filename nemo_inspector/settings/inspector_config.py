@@ -23,6 +23,25 @@ from nemo_skills.utils import nested_dataclass, unroll_files
 class BaseInspectorConfig:
     model_prediction: Dict[str, str] = field(default_factory=dict)
     save_generations_path: str = "nemo_inspector/results/saved_generations"
+    # parsed prediction files are cached here (e.g. ~/.cache/nemo_inspector), empty value
+    # (default) disables the cache
+    parse_cache_dir: str = ""
+    # megabytes the parse cache may take, least recently used entries are removed beyond
+    # it, 0 disables the limit
+    parse_cache_max_mb: int = 4096
+    # seconds between checks for lines appended to the prediction files, 0 disables
+    watch_interval: float = 0
+    # processes that evaluate filters on large tables (-1 for all cores, 1 disables the pool)
+    filtering_jobs: int = -1
+    # seconds that code typed in the UI (filters, sorting, updates, custom stats) may run,
+    # a limit runs this code in supervised worker processes, 0 (default) disables it
+    user_code_timeout: float = 0
+    # megabytes this code may allocate on top of the inspector memory, 0 (default) disables
+    # the limit (with no timeout either the code runs in the inspector process)
+    user_code_memory_mb: int = 0
+    # filter, sort and general stats results kept for repeated operations on unchanged
+    # data, 0 disables
+    result_cache_size: int = 32
     use_judgement: bool = False
 
     def __post_init__(self):
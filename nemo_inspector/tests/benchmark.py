@@ -0,0 +1,314 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the analyze page hot paths on deterministic synthetic data.
+
+Example:
+    python nemo_inspector/tests/benchmark.py --questions 2000 --files 8 --models 3 \\
+        --output bench.json
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parents[2]))
+
+from nemo_inspector.settings.constants import FILES_FILTERING, QUESTIONS_FILTERING
+from nemo_inspector.settings.inspector_config import BaseInspectorConfig
+
+WORDS = (
+    "let us compute the value of x where sum product integer prime number "
+    "therefore we get answer equation solve both sides divide multiply"
+).split()
+ERROR_MESSAGES = ["", "", "", "SyntaxError: invalid syntax", "TimeoutError"]
+
+
+def get_text(rng: random.Random, length: int) -> str:
+    words = []
+    size = 0
+    while size < length:
+        words.append(rng.choice(WORDS))
+        size += len(words[-1]) + 1
+    return " ".join(words)
+
+
+def generate_synthetic_data(
+    root: str, num_questions: int, num_files: int, num_models: int, seed: int = 0
+) -> Dict[str, List[str]]:
+    """Writes an input file and num_files prediction files for every model.
+
+    Returns paths of the prediction files of every model.
+    """
+    rng = random.Random(seed)
+    expected_answers = [str(rng.randint(0, 100)) for _ in range(num_questions)]
+    with open(os.path.join(root, "input.jsonl"), "w") as file:
+        for question_id in range(num_questions):
+            sample = {
+                "problem": get_text(rng, rng.randint(200, 800)),
+                "reference_solution": get_text(rng, rng.randint(500, 2000)),
+                "expected_answer": expected_answers[question_id],
+                "level": f"Level {rng.randint(1, 5)}",
+                "type": rng.choice(["Algebra", "Geometry", "Number Theory"]),
+            }
+            file.write(json.dumps(sample) + "\n")
+
+    model_files = {}
+    for model_id in range(num_models):
+        model = f"model_{model_id}"
+        os.makedirs(os.path.join(root, model), exist_ok=True)
+        model_files[model] = []
+        for file_id in range(num_files):
+            path = os.path.join(root, model, f"output-rs{file_id}.jsonl")
+            with open(path, "w") as file:
+                for question_id in range(num_questions):
+                    is_correct = rng.random() < 0.6
+                    predicted_answer = (
+                        expected_answers[question_id]
+                        if is_correct
+                        else rng.choice([None, str(rng.randint(0, 100))])
+                    )
+                    sample = {
+                        "generation": get_text(rng, rng.randint(1000, 4000)),
+                        "predicted_answer": predicted_answer,
+                        "is_correct": is_correct,
+                        "error_message": rng.choice(ERROR_MESSAGES),
+                        "num_generated_tokens": rng.randint(100, 2000),
+                    }
+                    file.write(json.dumps(sample) + "\n")
+            model_files[model].append(path)
+    return model_files
+
+
+def get_config(
+    root: str, model_files: Dict[str, List[str]], args: argparse.Namespace
+) -> Dict:
+    # the shipped defaults, so the benchmark measures what users run
+    inspector_params = dataclasses.asdict(BaseInspectorConfig())
+    inspector_params.update(
+        {
+            "model_prediction": model_files,
+            "save_generations_path": os.path.join(root, "saved_generations"),
+            "parse_cache_dir": os.path.join(root, "parse_cache") if args.cache else "",
+            "user_code_timeout": args.user_code_timeout,
+            "user_code_memory_mb": args.user_code_memory_mb,
+            "code_separators": ("<llm-code>", "</llm-code>"),
+            "code_output_separators": ("<llm-code-output>", "</llm-code-output>"),
+        }
+    )
+    return {
+        "input_file": os.path.join(root, "input.jsonl"),
+        "inspector_params": inspector_params,
+        "types": {},
+        "prompt": {},
+    }
+
+
+def measure(name: str, function: Callable, trace_memory: bool) -> Dict:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    result = {"name": name, "wall_time_s": round(time.perf_counter() - start, 4)}
+    if trace_memory:
+        result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    print(json.dumps(result), file=sys.stderr)
+    return result
+
+
+def run_benchmarks(args: argparse.Namespace, root: str) -> Dict:
+    start = time.perf_counter()
+    model_files = generate_synthetic_data(
+        root, args.questions, args.files, args.models, args.seed
+    )
+    generation_time = time.perf_counter() - start
+
+    from nemo_inspector.callbacks import app
+    from nemo_inspector.callbacks.analyze_page.short_info_table import change_page
+    from nemo_inspector.layouts import (
+        get_filtered_tables_layout,
+        get_sorted_tables_layout,
+        get_tables_layout,
+    )
+    from nemo_inspector.utils.common import (
+        calculate_metrics_for_whole_data,
+        get_data_from_files,
+        get_result_cache,
+        get_table_data,
+        set_table_data,
+    )
+    from nemo_inspector.utils.store import TableView
+
+    app.server.config.update({"nemo_inspector": get_config(root, model_files, args)})
+    models = list(model_files)
+    base_model = models[0]
+    steps = [
+        ("get_data_from_files", get_data_from_files),
+        ("get_tables_layout", lambda: get_tables_layout(base_model)),
+        (
+            "get_filtered_tables_layout[files]",
+            lambda: get_filtered_tables_layout(
+                base_model,
+                f"data['{base_model}']['is_correct']",
+                False,
+                models,
+                FILES_FILTERING,
+            ),
+        ),
+        (
+            # methods of long texts are not column expressions, records are evaluated
+            "get_filtered_tables_layout[files, python]",
+            lambda: get_filtered_tables_layout(
+                base_model,
+                f"data['{base_model}']['generation'].startswith('let')",
+                False,
+                models,
+                FILES_FILTERING,
+            ),
+        ),
+        (
+            "get_filtered_tables_layout[questions]",
+            lambda: get_filtered_tables_layout(
+                base_model,
+                f"sum(file['is_correct'] for file in data['{base_model}']) > 1",
+                False,
+                models,
+                QUESTIONS_FILTERING,
+            ),
+        ),
+        (
+            # the same filter again is answered from the result cache
+            "get_filtered_tables_layout[questions, cached]",
+            lambda: get_filtered_tables_layout(
+                base_model,
+                f"sum(file['is_correct'] for file in data['{base_model}']) > 1",
+                False,
+                models,
+                QUESTIONS_FILTERING,
+            ),
+        ),
+        (
+            "get_filtered_tables_layout[questions query]",
+            lambda: get_filtered_tables_layout(
+                base_model,
+                "where count(is_correct) > 1",
+                False,
+                models,
+                QUESTIONS_FILTERING,
+            ),
+        ),
+        (
+            "get_sorted_tables_layout",
+            lambda: get_sorted_tables_layout(
+                base_model, "data['num_generated_tokens']", models
+            ),
+        ),
+        (
+            "get_sorted_tables_layout[python]",
+            lambda: get_sorted_tables_layout(
+                base_model, "str(data['num_generated_tokens'])[::-1]", models
+            ),
+        ),
+        (
+            "calculate_metrics_for_whole_data",
+            lambda: calculate_metrics_for_whole_data(get_table_data(), base_model),
+        ),
+        ("change_page", lambda: change_page(0, 10, base_model)),
+    ]
+    results = []
+    with app.server.app_context():
+        for _ in range(args.repeat):
+            get_data_from_files.cache_clear()
+            set_table_data(TableView())
+            for name, function in steps:
+                results.append(measure(name, function, args.trace_memory))
+        result_cache = str(get_result_cache())
+
+    return {
+        "parameters": vars(args),
+        "data_generation_s": round(generation_time, 4),
+        "data_size_mb": round(
+            sum(os.path.getsize(path) for paths in model_files.values() for path in paths)
+            / 2**20,
+            2,
+        ),
+        "steps": results,
+        "result_cache": result_cache,
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10, 2
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeMo Inspector benchmarks")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=8, help="files per model")
+    parser.add_argument("--models", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="use the parse cache, later repeats then measure warm loads",
+    )
+    parser.add_argument(
+        "--user-code-timeout",
+        type=float,
+        default=BaseInspectorConfig.user_code_timeout,
+        help="seconds user code may run, a limit runs it in supervised workers",
+    )
+    parser.add_argument(
+        "--user-code-memory-mb",
+        type=int,
+        default=BaseInspectorConfig.user_code_memory_mb,
+        help="megabytes user code may allocate, a limit runs it in supervised workers",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="report peak Python allocations of every step (slows the steps down)",
+    )
+    parser.add_argument(
+        "--data-dir", help="where to generate data, a temporary dir by default"
+    )
+    parser.add_argument("--output", help="JSON file for the report, stdout by default")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        report = run_benchmarks(args, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            report = run_benchmarks(args, root)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
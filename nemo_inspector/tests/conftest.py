@@ -0,0 +1,118 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from nemo_inspector.settings.constants import FILES_FILTERING, LAZY_FIELD_MIN_LENGTH
+from nemo_inspector.utils.common import catch_eval_exception
+from nemo_inspector.utils.filtering import get_filtering_functions
+from nemo_inspector.utils.store import (
+    GenerationStore,
+    GenerationStoreBuilder,
+    get_file_stat,
+    read_prediction_file,
+)
+
+MODELS = ["gen1", "gen2"]
+BASE_MODEL = "gen1"
+NUM_QUESTIONS = 40
+
+
+def make_record(rng: random.Random, question: int) -> Dict:
+    """Returns a line with missing fields, nulls, mixed types and long texts."""
+    record = {
+        "question": f"question {question}",
+        "is_correct": rng.random() < 0.5,
+        "score": round(rng.random(), 3),
+        "predicted_answer": rng.choice(["1", "2", "10", None, 3]),
+        "error_message": rng.choice(["", "timeout", "syntax error"]),
+        "labels": rng.choice([[], ["bad"], ["bad", "long"]]),
+        "generation": rng.choice(["let x = 1", "so"])
+        + "x" * rng.choice([10, LAZY_FIELD_MIN_LENGTH]),
+    }
+    if question % 5 == 0:
+        del record["score"]
+    if question % 7 == 0:
+        record["is_correct"] = None
+    return record
+
+
+def write_jsonl(path, records: List[Dict]) -> str:
+    with open(path, "w") as file:
+        file.writelines(json.dumps(record) + "\n" for record in records)
+    return str(path)
+
+
+def build_store(paths: List[str], models: List[str]) -> GenerationStore:
+    builder = GenerationStoreBuilder(
+        models, paths, source_stats=[get_file_stat(path) for path in paths]
+    )
+    for source_id, (path, model) in enumerate(zip(paths, models)):
+        parsed_file = read_prediction_file(path)
+        builder.add_chunk(
+            model,
+            np.arange(parsed_file.num_rows),
+            parsed_file.columns,
+            source_id,
+            parsed_file.offsets,
+        )
+    return builder.build()
+
+
+def python_filter_rows(
+    store: GenerationStore, code: str, rows: np.ndarray
+) -> Tuple[np.ndarray, Dict]:
+    """Evaluates a files filter on plain dicts, the way it runs without the store."""
+    functions = get_filtering_functions(code, BASE_MODEL, FILES_FILTERING)
+    errors = {}
+    keep = [
+        all(
+            catch_eval_exception(
+                MODELS,
+                function,
+                {store.models[store.model_codes[row]]: store.record(row)},
+                True,
+                errors,
+            )
+            for function in functions
+        )
+        for row in rows
+    ]
+    return np.array(keep), errors
+
+
+@pytest.fixture
+def source_records() -> List[List[Dict]]:
+    rng = random.Random(0)
+    return [
+        [make_record(rng, question) for question in range(NUM_QUESTIONS)] for _ in MODELS
+    ]
+
+
+@pytest.fixture
+def source_paths(tmp_path, source_records) -> List[str]:
+    return [
+        write_jsonl(tmp_path / f"{model}.jsonl", records)
+        for model, records in zip(MODELS, source_records)
+    ]
+
+
+@pytest.fixture
+def store(source_paths) -> GenerationStore:
+    return build_store(source_paths, MODELS)
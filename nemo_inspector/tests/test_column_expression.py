@@ -0,0 +1,47 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo_inspector.utils.filtering import filter_rows, get_filter_expressions
+
+from conftest import BASE_MODEL, MODELS, python_filter_rows
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "data[base_generation]['is_correct']",
+        "data['gen1']['score'] > 0.5",
+        "data['gen2']['predicted_answer'] == '1'",
+        "data[base_generation]['predicted_answer'] in ['1', '2', 3]",
+        "data[base_generation]['predicted_answer'] is None",
+        "'bad' in data[base_generation]['labels']",
+        "len(data[base_generation]['labels']) > 1",
+        "not data[base_generation]['error_message']",
+        "data[base_generation]['score'] > 0.3 and data[base_generation]['is_correct']"
+        " or data[base_generation]['error_message'] == 'timeout'",
+        "data[base_generation]['score'] >= 0.2 && data[base_generation]['is_correct']",
+    ],
+)
+def test_files_filter_matches_python(store, code):
+    rows = np.arange(len(store))
+    expressions = get_filter_expressions(code, BASE_MODEL)
+    assert expressions is not None
+    errors = {}
+    keep = filter_rows(expressions, store, rows, MODELS, errors)
+    expected_keep, expected_errors = python_filter_rows(store, code, rows)
+    assert keep.tolist() == expected_keep.tolist()
+    assert errors == expected_errors
@@ -0,0 +1,94 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo_inspector.utils.common import get_eval_function
+from nemo_inspector.utils.filtering import filter_rows, get_filter_expressions
+from nemo_inspector.utils.store import MISSING
+
+from conftest import MODELS
+
+FIELDS = ["is_correct", "predicted_answer", "error_message", "labels"]
+
+
+def scan(store, key, value):
+    truth = []
+    for row in range(len(store)):
+        stored = store.raw_value(row, key)
+        if key == "labels":
+            truth.append(stored is not MISSING and value in stored)
+        else:
+            truth.append(type(stored) is type(value) and stored == value)
+    return truth
+
+
+def check_lookups(store):
+    for key in FIELDS:
+        index = store.get_index(key)
+        assert index is not None and index.elements == (key == "labels")
+        for value in index.bitmaps:
+            assert index.lookup([value]).tolist() == scan(store, key, value)
+        assert not index.lookup(["not stored"]).any()
+
+
+def test_lookup_matches_scan(store):
+    check_lookups(store)
+    assert store.get_index("score") is None
+    assert store.get_index("not stored") is None
+
+
+def test_edits_update_the_index(store):
+    check_lookups(store)
+    indexes = dict(store.indexes)
+    store.set_value(0, "error_message", "out of memory")
+    store.set_value(1, "predicted_answer", "1")
+    store.add_label(2, "checked")
+    store.delete_value(3, "is_correct")
+    check_lookups(store)
+    assert all(store.indexes[key] is indexes[key] for key in FIELDS)
+
+
+@pytest.mark.parametrize(
+    "filtering_function",
+    [
+        "data['gen1']['error_message'] == 'timeout'",
+        "data['gen1']['predicted_answer'] in ['1', 3]",
+        "data['gen1']['is_correct'] != True",
+        "'bad' in data['gen1']['labels']",
+        "'long' not in data['gen1']['labels'] and data['gen1']['score'] > 0.5",
+    ],
+)
+def test_indexed_filters_match_code(store, filtering_function):
+    rows = np.flatnonzero(store.model_codes == MODELS.index("gen1"))
+    errors_dict = {}
+    keep = filter_rows(
+        get_filter_expressions(filtering_function, "gen1"),
+        store,
+        rows,
+        MODELS,
+        errors_dict,
+    )
+    function = get_eval_function(filtering_function)
+    expected, expected_errors = [], {}
+    for record in store.records(rows):
+        try:
+            expected.append(bool(function({"gen1": record})))
+        except KeyError as error:
+            expected.append(True)
+            expected_errors[str(error)] = expected_errors.get(str(error), 0) + 1
+    assert keep.tolist() == expected
+    assert errors_dict == expected_errors
+    assert any(key in store.indexes for key in FIELDS)
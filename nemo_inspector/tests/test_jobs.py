@@ -0,0 +1,77 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import pytest
+
+from nemo_inspector.utils.jobs import (
+    Job,
+    JobCancelled,
+    current_job,
+    data_lock,
+    holds_data_lock,
+    report_progress,
+)
+from nemo_inspector.utils.supervisor import UserCodeError, run_supervised
+
+
+def test_report_progress():
+    report_progress(1, 2)  # outside of jobs it does nothing
+
+    job = Job("key")
+    reports = []
+    job.set_progress = reports.append
+    token = current_job.set(job)
+    try:
+        report_progress(1, 2)
+        assert reports == [(1, 2, "1 / 2")]
+        job.cancelled.set()
+        with pytest.raises(JobCancelled):
+            report_progress(2, 2)
+    finally:
+        current_job.reset(token)
+
+
+def test_cancelled_job_stops_in_process_functions():
+    def run(progress):
+        for done in range(1000):
+            progress(done)
+        return done
+
+    job = Job("key")
+    job.cancelled.set()
+    token = current_job.set(job)
+    try:
+        with pytest.raises(UserCodeError, match="cancelled"):
+            run_supervised([run], [1000], "filter", 0, 0)
+    finally:
+        current_job.reset(token)
+
+
+def test_holds_data_lock():
+    events = []
+
+    @holds_data_lock
+    def callback():
+        events.append("callback")
+
+    thread = threading.Thread(target=callback)
+    with data_lock:
+        thread.start()
+        thread.join(0.2)
+        events.append("job")
+    thread.join()
+    assert events == ["job", "callback"]
+    assert callback.__name__ == "callback"
@@ -0,0 +1,147 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo_inspector.settings.constants import QUESTIONS_FILTERING
+from nemo_inspector.utils.filtering import parallel_filter
+from nemo_inspector.utils.filtering.parallel_filter import (
+    filter_files_parallel,
+    filter_questions_parallel,
+    snapshot_shard,
+)
+from nemo_inspector.utils.store import LAZY, SourceChangedError, StoredRows
+from nemo_inspector.utils.supervisor import can_supervise
+
+from conftest import MODELS
+
+FILES_FILTER = "data['gen1']['score'] > 0.5"
+QUESTIONS_FILTER = (
+    "data['gen1'][0]['is_correct'] and len(data['gen2'][0]['generation']) > 100"
+)
+
+# (n_jobs, user code limits) of the in-process, pool and supervised paths
+PATHS = {
+    "in_process": pytest.param(1, (0, 0)),
+    "pool": pytest.param(2, (0, 0)),
+    "supervised": pytest.param(
+        2,
+        (30, 0),
+        marks=pytest.mark.skipif(
+            not can_supervise(), reason="processes cannot be forked"
+        ),
+    ),
+}
+
+
+def get_questions_groups(store):
+    return [
+        [
+            (model, store.group_rows(question, model))
+            for model in store.question_models(question)
+        ]
+        for question in range(store.num_questions)
+    ]
+
+
+def run_filters(store, n_jobs, limits, monkeypatch):
+    monkeypatch.setattr(parallel_filter, "MIN_SHARD_SIZE", 5)
+    monkeypatch.setattr(parallel_filter, "get_user_code_limits", lambda: limits)
+    questions_groups = get_questions_groups(store)
+    files_errors, questions_errors = {}, {}
+    files_keep = filter_files_parallel(
+        FILES_FILTER, MODELS[0], MODELS, store, questions_groups, files_errors, n_jobs
+    )
+    questions_keep = filter_questions_parallel(
+        QUESTIONS_FILTER,
+        MODELS[0],
+        QUESTIONS_FILTERING,
+        store,
+        questions_groups,
+        questions_errors,
+        n_jobs,
+    )
+    return (
+        [[keep.tolist() for keep in groups_keep] for groups_keep in files_keep],
+        files_errors,
+        questions_keep,
+        questions_errors,
+    )
+
+
+@pytest.mark.parametrize("n_jobs, limits", PATHS.values(), ids=PATHS.keys())
+def test_filters_match_records(store, monkeypatch, n_jobs, limits):
+    files_keep, files_errors, questions_keep, questions_errors = run_filters(
+        store, n_jobs, limits, monkeypatch
+    )
+    expected_files_keep, expected_questions_keep = [], []
+    for groups in get_questions_groups(store):
+        expected_files_keep.append(
+            [
+                [
+                    model != "gen1" or "score" not in record or record["score"] > 0.5
+                    for record in store.records(rows)
+                ]
+                for model, rows in groups
+            ]
+        )
+        first = {model: store.record(rows[0]) for model, rows in groups}
+        expected_questions_keep.append(
+            bool(first["gen1"]["is_correct"] and len(first["gen2"]["generation"]) > 100)
+        )
+    assert files_keep == expected_files_keep
+    assert questions_keep == expected_questions_keep
+    # missing scores are counted once per file, questions have no errors
+    num_missing = sum(
+        "score" not in record
+        for rows in (
+            store.group_rows(question, "gen1") for question in range(store.num_questions)
+        )
+        for record in store.records(rows)
+    )
+    assert files_errors == {"'score'": num_missing}
+    assert questions_errors == {}
+
+
+def test_stored_rows(store, source_paths):
+    rows = np.arange(len(store))[::-1]
+    snapshot = pickle.loads(pickle.dumps(StoredRows(store, rows)))
+    assert len(snapshot) == len(rows)
+    assert any(value is LAZY for record in snapshot.records for value in record.values())
+    for record, row in zip(snapshot.lazy_records(range(len(snapshot))), rows):
+        assert dict(record) == store.record(row)
+
+    source_id = snapshot.source_ids[0]
+    with open(source_paths[source_id], "a") as file:
+        file.write("{}\n")
+    os.utime(source_paths[source_id], ns=(0, 0))
+    with pytest.raises(SourceChangedError):
+        snapshot.check_source(source_id)
+
+
+def test_snapshot_groups_address_the_shard_rows(store):
+    shard = get_questions_groups(store)[3:7]
+    snapshot, snapshot_groups = snapshot_shard(store, shard)
+    for groups, groups_in_snapshot in zip(shard, snapshot_groups):
+        for (model, rows), (snapshot_model, snapshot_rows) in zip(
+            groups, groups_in_snapshot
+        ):
+            assert model == snapshot_model
+            assert [dict(record) for record in snapshot.lazy_records(snapshot_rows)] == (
+                store.records(rows)
+            )
@@ -0,0 +1,115 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import os
+import shutil
+
+import pytest
+
+from nemo_inspector.utils.store import (
+    LAZY,
+    cache_prediction_file,
+    get_cache_path,
+    is_compressed,
+    load_parsed_file,
+    read_prediction_file,
+    read_prediction_file_cached,
+    read_record,
+    sweep_cache,
+)
+from nemo_inspector.utils.store.parse_cache import META_FILE, is_private
+
+
+def parsed_values(parsed_file):
+    return {
+        key: [column.get(row) for row in range(parsed_file.num_rows)]
+        for key, column in parsed_file.columns.items()
+    }
+
+
+def test_cached_file_matches_parsed_file(tmp_path, source_paths):
+    cache_dir = str(tmp_path / "cache")
+    parsed_file = read_prediction_file(source_paths[0])
+    for _ in range(2):
+        cached_file = read_prediction_file_cached(source_paths[0], cache_dir)
+        assert parsed_values(cached_file) == parsed_values(parsed_file)
+        assert cached_file.offsets.tolist() == parsed_file.offsets.tolist()
+        assert cached_file.end == parsed_file.end
+    assert os.listdir(cache_dir) == [
+        os.path.basename(get_cache_path(cache_dir, source_paths[0]))
+    ]
+
+
+def test_changed_file_replaces_its_entry(tmp_path, source_paths):
+    cache_dir = str(tmp_path / "cache")
+    old_entry = cache_prediction_file(source_paths[0], cache_dir)
+    with open(source_paths[0], "a") as file:
+        file.write('{"id": 1}\n')
+    new_entry = cache_prediction_file(source_paths[0], cache_dir)
+    assert new_entry != old_entry
+    assert os.listdir(cache_dir) == [os.path.basename(new_entry)]
+    assert (
+        load_parsed_file(new_entry).num_rows
+        == read_prediction_file(source_paths[0]).num_rows
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="ownership is not checked")
+def test_entries_of_other_users_are_not_loaded(tmp_path, source_paths):
+    cache_dir = str(tmp_path / "cache")
+    entry_path = cache_prediction_file(source_paths[0], cache_dir)
+    assert is_private(entry_path) and is_private(os.path.join(entry_path, META_FILE))
+
+    os.chmod(os.path.join(entry_path, META_FILE), 0o666)
+    with pytest.raises(PermissionError):
+        load_parsed_file(entry_path)
+    # the file is parsed again instead
+    assert parsed_values(
+        read_prediction_file_cached(source_paths[0], cache_dir)
+    ) == parsed_values(read_prediction_file(source_paths[0]))
+
+
+def test_sweep_removes_least_recently_used(tmp_path, source_paths):
+    cache_dir = str(tmp_path / "cache")
+    entries = [cache_prediction_file(path, cache_dir) for path in source_paths]
+    os.utime(os.path.join(entries[0], META_FILE), (0, 0))
+    os.utime(os.path.join(entries[1], META_FILE), (1, 1))
+
+    sweep_cache(cache_dir, 1)
+    assert sorted(os.listdir(cache_dir)) == sorted(map(os.path.basename, entries))
+
+    sweep_cache(cache_dir, 1e-9, keep=[entries[1]])
+    assert os.listdir(cache_dir) == [os.path.basename(entries[1])]
+    sweep_cache(cache_dir, 1e-9)
+    assert os.listdir(cache_dir) == []
+
+def test_compressed_file_matches_plain_file(tmp_path, source_paths):
+    compressed_path = str(tmp_path / "output.jsonl.gz")
+    with open(source_paths[0], "rb") as source, gzip.open(compressed_path, "wb") as file:
+        shutil.copyfileobj(source, file)
+    assert is_compressed(compressed_path) and not is_compressed(source_paths[0])
+
+    parsed_file = read_prediction_file(source_paths[0])
+    compressed_file = read_prediction_file(compressed_path)
+    assert compressed_file.offsets.tolist() == parsed_file.offsets.tolist()
+    # lines of compressed files are not read back, so no field is lazy
+    values = parsed_values(compressed_file)
+    assert all(value is not LAZY for column in values.values() for value in column)
+    for row, offset in enumerate(parsed_file.offsets.tolist()):
+        record = read_record(source_paths[0], offset)
+        assert {
+            key: column[row] for key, column in values.items() if key in record
+        } == record
+        assert read_record(compressed_path, offset) == record
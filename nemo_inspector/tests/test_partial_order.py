@@ -0,0 +1,81 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo_inspector.utils.store import PartialOrder, PartialRank, rank_within_groups
+
+
+def make_order(primary, secondary):
+    items = np.arange(len(primary)) * 10
+
+    def order_positions(positions):
+        return positions[np.lexsort((secondary[positions], primary[positions]))]
+
+    expected = items[np.lexsort((secondary, primary))]
+    return PartialOrder(items, primary, order_positions), expected
+
+
+@pytest.mark.parametrize("with_nan", [False, True])
+def test_partial_order_prefixes(with_nan):
+    rng = np.random.default_rng(0)
+    primary = rng.integers(0, 50, 5000).astype(np.float64)
+    if with_nan:
+        primary[rng.random(5000) < 0.1] = np.nan
+    secondary = rng.random(5000)
+    order, expected = make_order(primary, secondary)
+
+    assert len(order) == len(expected)
+    assert order.prefix(10).tolist() == expected[:10].tolist()
+    assert order[0] == expected[0]
+    assert order[-1] == expected[-1]
+    assert order.prefix(3000).tolist() == expected[:3000].tolist()
+    assert order.complete().tolist() == expected.tolist()
+    assert order.prefix(10).tolist() == expected[:10].tolist()
+
+
+def test_partial_order_of_few_items():
+    order, expected = make_order(np.array([2.0, 1.0, 2.0]), np.array([0.5, 0.1, 0.2]))
+    assert order.prefix(10).tolist() == expected.tolist()
+    with pytest.raises(IndexError):
+        order[3]
+
+
+def test_rank_within_groups():
+    groups = np.array([0, 1, 0, 0, 1])
+    keys = np.array([3, 1, 1, 3, 0])
+    previous_rank = np.array([1, 0, 2, 0, 1])
+    # equal keys of group 0 keep their previous order
+    assert rank_within_groups(groups, keys, previous_rank).tolist() == [2, 1, 0, 1, 0]
+
+
+def test_partial_rank():
+    rng = np.random.default_rng(0)
+    groups = np.sort(rng.integers(0, 20, 200))
+    previous_rank = rank_within_groups(groups, rng.random(200), np.zeros(200))
+    rows = np.flatnonzero(rng.random(200) < 0.7)
+    keys = rng.integers(0, 3, len(rows))
+    rank = PartialRank(previous_rank, rows, groups[rows], keys)
+
+    expected = previous_rank.copy()
+    expected[rows] = rank_within_groups(groups[rows], keys, previous_rank[rows])
+    for group in range(20):
+        group_rows = rows[groups[rows] == group]
+        assert (
+            np.argsort(rank[group_rows]).tolist()
+            == np.argsort(expected[group_rows]).tolist()
+        )
+    assert rank.complete().tolist() == expected.tolist()
+    assert len(rank) == 200
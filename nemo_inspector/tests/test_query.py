@@ -0,0 +1,177 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo_inspector.utils.common import catch_eval_exception, get_eval_function
+from nemo_inspector.utils.filtering import (
+    QueryError,
+    filter_questions,
+    filter_rows,
+    get_sort_keys,
+    normalize_code,
+    parse_filter_query,
+    parse_sort_query,
+)
+
+from conftest import BASE_MODEL, MODELS, python_filter_rows
+
+
+@pytest.mark.parametrize(
+    "query, code",
+    [
+        ("where is_correct", "data[base_generation]['is_correct']"),
+        (
+            "where gen2.score >= 0.5 and not is_correct",
+            "data['gen2']['score'] >= 0.5 and not data[base_generation]['is_correct']",
+        ),
+        ("where labels contains 'bad'", "'bad' in data[base_generation]['labels']"),
+        (
+            "where predicted_answer in ['1', 3]",
+            "data[base_generation]['predicted_answer'] in ['1', 3]",
+        ),
+        (
+            "where `gen2`.predicted_answer is null",
+            "data['gen2']['predicted_answer'] is None",
+        ),
+        (
+            "where score > -1 && error_message != ''",
+            "data[base_generation]['score'] > -1"
+            " && data[base_generation]['error_message'] != ''",
+        ),
+        (
+            "where len(labels) == 0 or score < .25",
+            "len(data[base_generation]['labels']) == 0"
+            " or data[base_generation]['score'] < 0.25",
+        ),
+    ],
+)
+def test_query_matches_python(store, query, code):
+    rows = np.arange(len(store))
+    errors = {}
+    keep = filter_rows(parse_filter_query(query, BASE_MODEL), store, rows, MODELS, errors)
+    expected_keep, expected_errors = python_filter_rows(store, code, rows)
+    assert keep.tolist() == expected_keep.tolist()
+    assert errors == expected_errors
+
+
+@pytest.mark.parametrize(
+    "query, code",
+    [
+        ("where any(gen2.is_correct)", "any(f['is_correct'] for f in data['gen2'])"),
+        (
+            "where not any(gen2.is_correct)",
+            "not any(f['is_correct'] for f in data['gen2'])",
+        ),
+        (
+            "where count(gen2.is_correct) >= 1",
+            "sum(bool(f['is_correct']) for f in data['gen2']) >= 1",
+        ),
+        (
+            "where all(gen2.is_correct) or any(is_correct)",
+            "all(f['is_correct'] for f in data['gen2'])"
+            " or any(f['is_correct'] for f in data['gen1'])",
+        ),
+        ("where count(true) > 1", "len(data['gen1']) > 1"),
+    ],
+)
+def test_question_query_matches_python(store, query, code):
+    # some questions have no files of gen2, their aggregates fail and they are kept
+    rows = np.arange(len(store))
+    rows = rows[
+        ~((store.model_codes == store.model_ids["gen2"]) & (store.questions % 4 == 0))
+    ]
+    questions = np.arange(store.num_questions)
+    errors = {}
+    keep = filter_questions(
+        parse_filter_query(query, BASE_MODEL, question_level=True),
+        store,
+        questions,
+        rows,
+        MODELS,
+        errors,
+    )
+
+    function = get_eval_function(f"base_generation = '{BASE_MODEL}'\n{code}")
+    expected_errors = {}
+    expected_keep = []
+    for question in questions:
+        question_rows = rows[store.questions[rows] == question]
+        data = {}
+        for model in MODELS:
+            model_rows = question_rows[
+                store.model_codes[question_rows] == store.model_ids[model]
+            ]
+            if len(model_rows):
+                data[model] = store.records(model_rows)
+        expected_keep.append(
+            bool(catch_eval_exception(MODELS, function, data, True, expected_errors))
+        )
+    assert keep.tolist() == expected_keep
+    assert errors == expected_errors
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "where",
+        "where is_correct &&",
+        "where score >",
+        "where (is_correct",
+        "where score @ 1",
+        "where -is_correct",
+        "where score in [is_correct]",
+        "where labels contains 'a' contains 'b'",
+        "where in > 1",
+        "where is_correct is_correct",
+    ],
+)
+def test_invalid_filter_queries(query):
+    with pytest.raises(QueryError):
+        parse_filter_query(query, BASE_MODEL)
+
+
+def test_question_queries_need_aggregates():
+    with pytest.raises(QueryError):
+        parse_filter_query("where is_correct", BASE_MODEL, question_level=True)
+    assert parse_filter_query("where any(is_correct)", BASE_MODEL, question_level=True)
+
+
+def test_sort_queries():
+    keys = parse_sort_query("ORDER BY score desc, `is_correct` asc, len(labels)")
+    assert [descending for _, descending in keys] == [True, False, False]
+    with pytest.raises(QueryError):
+        parse_sort_query("order by gen1.score")
+    with pytest.raises(QueryError):
+        parse_sort_query("order by score desc desc")
+
+
+def test_normalize_code():
+    assert normalize_code("where  score>1&&is_correct ") == normalize_code(
+        "WHERE score > 1 && is_correct"
+    ).replace("WHERE", "where")
+    assert normalize_code("  x = 1  \n\n  y  ") == "x = 1\n  y"
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_missing_sort_keys_go_last(store, direction):
+    rows = np.arange(len(store))
+    keys = get_sort_keys(f"order by score {direction}", store, rows, MODELS, {})
+    scores = [
+        store.get_value(row, "score") for row in rows[np.argsort(keys, kind="stable")]
+    ]
+    present = [score for score in scores if score is not None]
+    assert scores == present + [None] * (len(scores) - len(present))
+    assert present == sorted(present, reverse=direction == "desc")
@@ -0,0 +1,122 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo_inspector.utils.store import (
+    LAZY,
+    MISSING,
+    Column,
+    SourceChangedError,
+    columns_from_records,
+)
+
+
+def source_record(store, source_records, row):
+    model = store.models[store.model_codes[row]]
+    return source_records[store.model_ids[model]][store.questions[row]]
+
+
+def test_records_match_source_lines(store, source_records):
+    assert len(store) == sum(len(records) for records in source_records)
+    for row in range(len(store)):
+        assert store.record(row) == source_record(store, source_records, row)
+
+
+def test_records_are_grouped_by_question_and_model(store):
+    group_ids = store.questions * len(store.models) + store.model_codes
+    assert (np.diff(group_ids) >= 0).all()
+    for question in range(store.num_questions):
+        assert store.question_models(question) == store.models
+
+
+def test_edits_change_the_version(store):
+    version = store.version
+    store.set_value(0, "score", 2.0)
+    store.add_label(0, "checked")
+    assert store.version > version
+    assert store.record(0)["score"] == 2.0
+    assert store.record(0)["labels"][-1] == "checked"
+    store.delete_value(0, "score")
+    assert "score" not in store.record(0)
+
+
+def test_long_texts_are_lazy(store, source_records):
+    lazy_rows = [
+        row for row in range(len(store)) if store.raw_value(row, "generation") is LAZY
+    ]
+    assert lazy_rows
+    for row in lazy_rows:
+        expected = source_record(store, source_records, row)["generation"]
+        assert store.get_value(row, "generation") == expected
+
+
+def test_lazy_records(store, source_records):
+    rows = np.arange(len(store))
+    records = store.lazy_records(rows)
+    for row, record in zip(rows, records):
+        expected = source_record(store, source_records, row)
+        assert dict(record) == expected
+        assert pickle.loads(pickle.dumps(record)) == expected
+
+
+def test_update_records_keeps_unchanged_texts(store):
+    rows = np.arange(len(store))
+    lazy_before = sum(store.raw_value(row, "generation") is LAZY for row in rows)
+    version = store.version
+    changes = []
+    for record in store.lazy_records(rows, with_original=True):
+        new_record = {**record, "score": 2.0}
+        del new_record["labels"]
+        changes.append(record.changes(new_record))
+    assert all(set(changed) == {"score"} for changed, _ in changes)
+    assert all(removed == ["labels"] for _, removed in changes)
+
+    store.update_records(rows, changes)
+    assert store.version == version + 1
+    assert sum(store.raw_value(row, "generation") is LAZY for row in rows) == lazy_before
+    for row in rows:
+        record = store.record(row)
+        assert record["score"] == 2.0
+        assert "labels" not in record
+
+
+def test_changed_source_is_detected(store, source_paths):
+    row = next(
+        row for row in range(len(store)) if store.raw_value(row, "generation") is LAZY
+    )
+    with open(source_paths[store.source_ids[row]], "a") as file:
+        file.write("{}\n")
+    os.utime(source_paths[store.source_ids[row]], ns=(0, 0))
+    with pytest.raises(SourceChangedError):
+        store.get_value(row, "generation")
+
+
+@pytest.mark.parametrize("order", [None, np.array([5, 0, 3, 1, 4, 2])])
+def test_concat(order):
+    chunks = [
+        columns_from_records([{"value": 1}, {"value": None}])["value"],
+        None,
+        columns_from_records([{"value": 2.5}, {"value": "text"}])["value"],
+    ]
+    sizes = [2, 2, 2]
+    values = [1, None, MISSING, MISSING, 2.5, "text"]
+    column = Column.concat(chunks, sizes, order)
+    expected = values if order is None else [values[position] for position in order]
+    assert [column.get(row) for row in range(len(expected))] == expected
+    assert column.is_present().tolist() == [value is not MISSING for value in expected]
@@ -0,0 +1,74 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+
+import pytest
+
+from nemo_inspector.utils.supervisor import (
+    UserCodeError,
+    can_supervise,
+    resource,
+    run_supervised,
+)
+
+needs_fork = pytest.mark.skipif(not can_supervise(), reason="processes cannot be forked")
+
+
+def get_pid(progress):
+    return os.getpid()
+
+
+def test_without_limits_runs_in_process():
+    assert run_supervised([get_pid, get_pid], [1, 1], "filter", 0, 0) == [os.getpid()] * 2
+
+
+@needs_fork
+@pytest.mark.parametrize("timeout, memory_mb", [(30, 0), (0, 1024)])
+def test_workers_return_results(timeout, memory_mb):
+    functions = [lambda progress, shard=shard: (shard, os.getpid()) for shard in range(3)]
+    results = run_supervised(functions, [1, 1, 1], "filter", timeout, memory_mb)
+    assert [shard for shard, _ in results] == [0, 1, 2]
+    assert all(pid != os.getpid() for _, pid in results)
+
+
+@needs_fork
+def test_exceptions_are_raised():
+    def fail(progress):
+        raise KeyError("score")
+
+    with pytest.raises(KeyError, match="score"):
+        run_supervised([fail], [1], "filter", 30, 0)
+
+
+@needs_fork
+def test_timeout():
+    def sleep(progress):
+        time.sleep(30)
+
+    start = time.monotonic()
+    with pytest.raises(UserCodeError, match="filter"):
+        run_supervised([sleep, get_pid], [1, 1], "filter", 0.5, 0)
+    assert time.monotonic() - start < 10
+
+
+@needs_fork
+@pytest.mark.skipif(resource is None, reason="memory cannot be limited")
+def test_memory_limit():
+    def allocate(progress):
+        return len(bytearray(512 * 2**20))
+
+    with pytest.raises(UserCodeError, match="memory"):
+        run_supervised([allocate], [1], "filter", 0, 64)
@@ -0,0 +1,85 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import time
+
+import pytest
+
+from nemo_inspector.utils.store import TailFollower, read_prediction_file
+
+from conftest import write_jsonl
+
+
+def column_values(parsed_file, key):
+    column = parsed_file.columns[key]
+    return [column.get(row) for row in range(parsed_file.num_rows)]
+
+
+@pytest.fixture
+def followed(tmp_path):
+    path = write_jsonl(tmp_path / "output.jsonl", [{"id": 0}, {"id": 1}])
+    follower = TailFollower({path: os.path.getsize(path)}, interval=0.05)
+    return path, follower
+
+
+def test_appended_lines(followed):
+    path, follower = followed
+    assert follower.poll(follower.files[path]) is None
+
+    end = os.path.getsize(path)
+    with open(path, "a") as file:
+        file.write(json.dumps({"id": 2}) + '\n{"id": ')
+    update = follower.poll(follower.files[path])
+    # the last line is still being written
+    assert not update.reloaded
+    assert column_values(update.parsed_file, "id") == [2]
+    assert update.parsed_file.offsets.tolist() == [end]
+    assert follower.poll(follower.files[path]) is None
+
+    with open(path, "a") as file:
+        file.write("3}\n")
+    update = follower.poll(follower.files[path])
+    assert column_values(update.parsed_file, "id") == [3]
+    assert follower.files[path].end == os.path.getsize(path)
+
+
+@pytest.mark.parametrize("records", [[{"id": 5}], [{"id": 5}, {"id": 6}, {"id": 7}]])
+def test_rewritten_file_is_reloaded(followed, records):
+    path, follower = followed
+    write_jsonl(path, records)
+    update = follower.poll(follower.files[path])
+    assert update.reloaded
+    assert column_values(update.parsed_file, "id") == [record["id"] for record in records]
+    assert (
+        update.parsed_file.offsets.tolist() == read_prediction_file(path).offsets.tolist()
+    )
+
+
+def test_background_thread(followed):
+    path, follower = followed
+    follower.start()
+    try:
+        with open(path, "a") as file:
+            file.write(json.dumps({"id": 2}) + "\n")
+        deadline = time.monotonic() + 10
+        updates = []
+        while not updates and time.monotonic() < deadline:
+            time.sleep(0.05)
+            updates = follower.pop_updates()
+    finally:
+        follower.stop()
+    assert [column_values(update.parsed_file, "id") for update in updates] == [[2]]
+    assert follower.pop_updates() == []
@@ -18,6 +18,7 @@ import json
 import logging
 import os
 import re
+import threading
 from collections import defaultdict
 from dataclasses import fields, is_dataclass
 from types import NoneType, UnionType
@@ -36,17 +37,22 @@ from typing import (
     get_type_hints,
 )
 
+import numpy as np
+import pandas as pd
 from flask import current_app
 from joblib import Parallel, delayed
 
 from nemo_inspector.settings.constants import (
+    BASE_STATS_KEYS,
     EXPECTED_ANSWER_FIELD,
     CUSTOM,
+    CUSTOM_STATS_PREFETCH,
     ERROR_MESSAGE_TEMPLATE,
     FILE_NAME,
     GENERAL_STATS,
     IGNORE_FIELDS,
     INLINE_STATS,
+    LABEL,
     PARAMS_TO_REMOVE,
     QUESTION_FIELD,
     RETRIEVAL_FIELDS,
@@ -56,6 +62,32 @@ from nemo_inspector.settings.constants import (
     UNDEFINED,
 )
 
+from nemo_inspector.settings.constants.paths import PATH_TO_THE_REPOSITORY
+from nemo_inspector.utils.supervisor import Progress, UserCodeError, run_supervised
+from nemo_inspector.utils.store import (
+    CATEGORY,
+    INT,
+    MISSING,
+    OBJECT,
+    Column,
+    GenerationStore,
+    GenerationStoreBuilder,
+    ParsedFile,
+    ResultCache,
+    SourceChangedError,
+    TableView,
+    TailFollower,
+    cache_prediction_file,
+    columns_from_records,
+    get_file_stat,
+    get_memory_report,
+    is_compressed,
+    open_jsonl,
+    load_cache_entry,
+    read_prediction_file,
+    sweep_cache,
+)
+
 from nemo_skills.evaluation.metrics.utils import is_correct_judgement
 from nemo_skills.prompt.few_shot_examples import examples_map
 from nemo_skills.prompt.utils import PromptConfig, PromptTemplate
@@ -68,7 +100,25 @@ editable_rows = set()
 compared_rows = set()
 stats_raw = {INLINE_STATS: {CUSTOM: ""}, GENERAL_STATS: {CUSTOM: ""}}
 
-dataset_data = []
+dataset_data = TableView()
+# state of the tail-follow mode: models and file ids that read every followed
+# file and the number of its lines that are already loaded
+tail_follower = None
+follow_lock = threading.Lock()
+followed_files = defaultdict(list)
+loaded_lines = {}
+# metrics of every question/model group over all of its files, computed at load
+# and restored when filters are reset, and the state they were computed for
+base_metrics = {}
+base_metrics_state = None
+# question/model groups whose custom stats are computed and the state of the data
+# and of the view they were computed for
+custom_stats_done = np.zeros(0, dtype=bool)
+custom_stats_state = None
+# results of recent filters and sorts, its size is set from the config on use
+result_cache = ResultCache(max_size=0)
+# values of general custom stats for recent views, sized like the result cache
+general_stats_cache = ResultCache(max_size=0)
 labels = []
 
 
@@ -104,12 +154,13 @@ def get_stats_raw() -> Dict:
     return stats_raw
 
 
-def clear_table_data() -> None:
+def set_table_data(table: TableView) -> None:
     global dataset_data
-    dataset_data = []
+    dataset_data = table
 
 
-def get_table_data() -> List:
+def get_table_data() -> TableView:
+    apply_followed_updates()
     return dataset_data
 
 
@@ -193,7 +244,7 @@ def parse_model_answer(answer: str) -> List[Dict]:
 def get_dataset_sample(index: int, dataset: str) -> Tuple[Dict, int]:
     if not dataset or dataset == UNDEFINED or os.path.isfile(dataset) is False:
         return {QUESTION_FIELD: "", EXPECTED_ANSWER_FIELD: ""}, 0
-    with open(dataset) as file:
+    with open_jsonl(dataset, "rt") as file:
         tests = file.readlines()
         index = max(min(len(tests), index), 1)
         test = (
@@ -276,56 +327,199 @@ def get_utils_from_config(cfg: Dict, display_path: bool = True) -> Dict:
     }
 
 
-def get_stats(all_files_data: List[Dict]) -> Tuple[float, float, float]:
-    """Returns the percentage of correct, wrong, and no response answers in the given data.
+def get_metrics_names() -> List[str]:
+    """Returns names of the stats stored in the rows of every question/model group."""
+    return BASE_STATS_KEYS + list(get_custom_stats())
+
+
+def map_column(
+    column: Column, function: Callable[[Any], bool], default: Any
+) -> np.ndarray:
+    """Returns function(value) of every value in the column, absent values are the default.
 
-    If not data is provided, returns -1 for all values.
+    For typed columns the function is called once per distinct value.
+    """
+    if column.kind == OBJECT:
+        return np.fromiter(
+            (function(default if value is MISSING else value) for value in column.values),
+            dtype=bool,
+            count=len(column),
+        )
+    if column.kind == CATEGORY:
+        outcomes = [function(category) for category in column.categories]
+        # code -1 of absent values picks the last outcome
+        return np.array(outcomes + [function(default)], dtype=bool)[column.values]
+    distinct, inverse = np.unique(column.values, return_inverse=True)
+    outcomes = np.array([function(value) for value in distinct.tolist()], dtype=bool)
+    return np.where(column.is_present(), outcomes[inverse], function(default))
+
+
+def get_answer_outcomes(
+    store: GenerationStore, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns which rows have a correct answer and which have no answer at all.
+
+    Rows without predicted_answer have no answer. Other rows are correct if
+    is_correct is true or, with use_judgement, if the judgement says so.
     """
     config = current_app.config["nemo_inspector"]["inspector_params"]
+    no_response = map_column(
+        store.full_column("predicted_answer").take(rows),
+        lambda answer: answer is None,
+        None,
+    )
+    if config["use_judgement"]:
+        correct = map_column(
+            store.full_column("judgement").take(rows), is_correct_judgement, ""
+        )
+    else:
+        correct = map_column(store.full_column("is_correct").take(rows), bool, False)
+    return correct & ~no_response, no_response
+
+
+def get_stats_table(
+    store: GenerationStore, rows: np.ndarray, group_ids: np.ndarray, num_groups: int
+) -> pd.DataFrame:
+    """Returns the share of correct, wrong and no response answers of groups of rows.
+
+    group_ids[i] is the group of rows[i]. All groups are counted at once from the
+    answer columns, one line per group, groups without rows get -1.
+    """
+    correct, no_response = get_answer_outcomes(store, rows)
+    sizes = np.bincount(group_ids, minlength=num_groups)
+    stats = {}
+    for name, outcome in zip(
+        BASE_STATS_KEYS, [correct, ~correct & ~no_response, no_response]
+    ):
+        counts = np.bincount(group_ids, weights=outcome, minlength=num_groups)
+        stats[name] = np.where(
+            sizes > 0, np.round(counts / np.maximum(sizes, 1), 2), -1.0
+        )
+    return pd.DataFrame(stats)
+
+
+def get_custom_stats_table(
+    store: GenerationStore,
+    rows: np.ndarray,
+    group_ids: np.ndarray,
+    errors_dict: Dict,
+    progress: Optional[Progress] = None,
+) -> pd.DataFrame:
+    """Returns custom stats of every group that has rows, indexed by the group id.
+
+    Custom stats get the records of the group in the order of rows.
+    """
+    order = np.argsort(group_ids, kind="stable")
+    groups, starts = np.unique(group_ids[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    stats = {name: [] for name in get_custom_stats()}
+    for done, (start, end) in enumerate(zip(starts, ends), start=1):
+        records = store.lazy_records(rows[order[start:end]])
+        for name, func in get_custom_stats().items():
+            stats[name].append(
+                catch_eval_exception(
+                    [],
+                    func,
+                    records,
+                    "Got error when applying function",
+                    errors_dict.setdefault(name, {}),
+                )
+            )
+        if progress is not None:
+            progress(done)
+    # object columns keep the values as they are when joined with other groups
+    return pd.DataFrame(stats, index=groups, dtype=object)
+
+
+def get_groups_metrics(store: GenerationStore, rows: np.ndarray) -> pd.DataFrame:
+    """Returns built-in stats of the given rows of every question/model group.
+
+    The table has a line for every group id of the store. Custom stats are
+    computed separately, only for the groups that are shown.
+    """
+    return get_stats_table(store, rows, store.group_ids[rows], store.num_groups)
 
-    correct = 0
-    wrong = 0
-    no_response = 0
-    for data in all_files_data:
-        if data.get("predicted_answer") is None:
-            no_response += 1
-        elif not config["use_judgement"] and data.get("is_correct", False):
-            correct += 1
-        elif config["use_judgement"] and is_correct_judgement(data.get("judgement", "")):
-            correct += 1
-        else:
-            wrong += 1
 
-    if len(all_files_data):
+def set_groups_metrics(store: GenerationStore, rows: np.ndarray) -> None:
+    """Stores metrics of the groups of the rows computed from these rows only."""
+    metrics = get_groups_metrics(store, rows)
+    groups = np.unique(store.group_ids[rows])
+    store.set_group_values(
+        groups, {key: metrics[key].to_numpy()[groups] for key in metrics.columns}
+    )
+
+
+def compute_custom_stats(
+    table: TableView, positions: Optional[Iterable[int]] = None
+) -> None:
+    """Stores custom stats of the questions at the positions of the view (all by default).
+
+    Stats of every question/model group are computed from its visible files
+    in display order and memoized until the data, the custom stats or the
+    selection or order of the files change, so only groups without them run
+    the user code.
+    """
+    global custom_stats_done, custom_stats_state
+    store = table.store
+    if not get_custom_stats() or store is None:
+        return
+    # views with equal states select and order the files the same way
+    state = (store, store.version, tuple(get_custom_stats().items()), table.state)
+    if state != custom_stats_state:
+        custom_stats_done = np.zeros(store.num_groups, dtype=bool)
+        custom_stats_state = state
+    if positions is None:
+        rows = table.visible_rows()
+    else:
+        questions = np.zeros(store.num_questions, dtype=bool)
+        questions[[table.question(position) for position in positions]] = True
+        rows = np.flatnonzero(table.selected & questions[store.questions])
+    rows = rows[~custom_stats_done[store.group_ids[rows]]]
+    if not len(rows):
+        return
+    rows = table.display_order(rows)
+    group_ids = store.group_ids[rows]
+    groups = np.unique(group_ids)
+
+    # custom stats run as user code, they are stored once all of them are computed
+    def compute(progress: Progress) -> Tuple[pd.DataFrame, Dict]:
+        errors_dict = {}
         return (
-            correct / len(all_files_data),
-            wrong / len(all_files_data),
-            no_response / len(all_files_data),
+            get_custom_stats_table(store, rows, group_ids, errors_dict, progress),
+            errors_dict,
         )
-    return -1, -1, -1
-
-
-def get_metrics(all_files_data: List[Dict], errors_dict: Dict = {}) -> Dict:
-    correct_responses, wrong_responses, no_response = get_stats(all_files_data)
-    custom_stats = {}
-    for name, func in get_custom_stats().items():
-        if name not in errors_dict:
-            errors_dict[name] = {}
-        custom_stats[name] = catch_eval_exception(
-            [],
-            func,
-            all_files_data,
-            "Got error when applying function",
-            errors_dict[name],
+
+    ((stats, errors_dict),) = run_supervised(
+        [compute], [len(groups)], "custom stats", *get_user_code_limits()
+    )
+    store.set_group_values(groups, {key: stats[key].to_numpy() for key in stats.columns})
+    custom_stats_done[groups] = True
+    log_stats_errors(errors_dict)
+
+
+def compute_displayed_custom_stats(table: TableView, positions: range) -> None:
+    """Computes custom stats of the displayed questions and of the ones shown next.
+
+    Stats that run out of the user code budget stay empty and the error is logged.
+    """
+    try:
+        compute_custom_stats(
+            table,
+            range(len(table))[positions.start : positions.stop + CUSTOM_STATS_PREFETCH],
         )
+    except UserCodeError as e:
+        logging.error(str(e))
+
+
+def uses_custom_stats(code: str) -> bool:
+    """Tells whether the code may read custom stats, which then have to be computed for all questions."""
+    return any(name in code for name in get_custom_stats())
 
-    stats = {
-        "correct_responses": round(correct_responses, 2),
-        "wrong_responses": round(wrong_responses, 2),
-        "no_response": round(no_response, 2),
-        **custom_stats,
-    }
-    return stats
+
+def log_stats_errors(errors_dict: Dict) -> None:
+    for name, error_dict in errors_dict.items():
+        if len(error_dict):
+            logging.error(ERROR_MESSAGE_TEMPLATE.format(name, error_dict))
 
 
 def get_eval_function(text):
@@ -344,20 +538,37 @@ def eval_function(data):
     return namespace["eval_function"]
 
 
-def calculate_metrics_for_whole_data(table_data: List, model_id: str) -> Dict:
-    errors_dict = {}
-    for question_id in range(len(table_data)):
-        stats = get_metrics(table_data[question_id][model_id], errors_dict)
-        table_data[question_id][model_id] = list(
-            map(
-                lambda data: {**data, **stats},
-                table_data[question_id][model_id],
-            )
-        )
-    if len(errors_dict):
-        for name, error_dict in errors_dict.items():
-            if len(error_dict):
-                logging.error(ERROR_MESSAGE_TEMPLATE.format(name, error_dict))
+def calculate_metrics_for_whole_data(
+    table_data: TableView, model_id: str
+) -> pd.DataFrame:
+    """Stores metrics of the visible answers of the model to every visible question.
+
+    Custom stats are computed for all visible questions at once, as exports
+    and code reading them need. Returns the metrics as a table indexed by the
+    question id.
+    """
+    store = table_data.store
+    if model_id not in store.model_ids:
+        # the model has no loaded answers
+        return pd.DataFrame(columns=[*BASE_STATS_KEYS, *get_custom_stats()])
+    rows = table_data.visible_rows()
+    rows = rows[store.model_codes[rows] == store.model_ids[model_id]]
+    group_ids = store.questions[rows].astype(np.int64)
+    metrics = get_stats_table(store, rows, group_ids, store.num_questions)
+    questions = np.unique(group_ids)
+    store.set_group_values(
+        questions * len(store.models) + store.model_ids[model_id],
+        {key: metrics[key].to_numpy()[questions] for key in metrics.columns},
+    )
+    metrics = metrics.loc[np.sort(table_data.question_ids())]
+
+    compute_custom_stats(table_data)
+    groups = metrics.index.to_numpy() * len(store.models) + store.model_ids[model_id]
+    for name in get_custom_stats():
+        values = [store.group_columns[name].get(group) for group in groups]
+        # questions without answers of the model have no custom stats
+        metrics[name] = [np.nan if value is MISSING else value for value in values]
+    return metrics
 
 
 def catch_eval_exception(
@@ -371,6 +582,9 @@ def catch_eval_exception(
         if eval_func is None:
             return default_answer
         return eval_func(data)
+    except (MemoryError, SourceChangedError):
+        # running out of memory or reading a changed file stops the whole evaluation
+        raise
     except Exception as e:
         if str(e).split(" ")[-1].replace("'", "") not in available_models:
             if str(e) not in errors_dict:
@@ -379,78 +593,308 @@ def catch_eval_exception(
         return default_answer
 
 
-def custom_deepcopy(data) -> List:
-    new_data = []
-    for item in data:
-        new_item = {}
-        for key, value_list in item.items():
-            new_item[key] = value_list
-        new_data.append(new_item)
-    return new_data
+def get_file_names(paths: List[str]) -> List[str]:
+    file_names = []
+    name_counts = {}
+    for path in paths:
+        file_name = path.split("/")[-1].split(".")[0]
+        if file_name in name_counts:
+            name_counts[file_name] += 1
+            file_name += f"_{name_counts[file_name]}"
+        else:
+            name_counts[file_name] = 1
+        file_names.append(file_name)
+    return file_names
+
+
+def get_filtering_jobs() -> int:
+    return current_app.config["nemo_inspector"]["inspector_params"]["filtering_jobs"]
+
+
+def get_user_code_limits() -> Tuple[float, int]:
+    config = current_app.config["nemo_inspector"]["inspector_params"]
+    return config["user_code_timeout"], config["user_code_memory_mb"]
+
+
+def get_result_cache() -> ResultCache:
+    config = current_app.config["nemo_inspector"]["inspector_params"]
+    result_cache.max_size = config["result_cache_size"]
+    return result_cache
+
+
+def get_general_stats_cache() -> ResultCache:
+    config = current_app.config["nemo_inspector"]["inspector_params"]
+    general_stats_cache.max_size = config["result_cache_size"]
+    return general_stats_cache
+
+
+def get_parse_cache_dir() -> Optional[str]:
+    config = current_app.config["nemo_inspector"]["inspector_params"]
+    cache_dir = os.path.expanduser(config["parse_cache_dir"])
+    if not cache_dir:
+        return None
+    if cache_dir.startswith("nemo_inspector"):
+        cache_dir = os.path.join(PATH_TO_THE_REPOSITORY, cache_dir)
+    return cache_dir
 
 
 @functools.lru_cache(maxsize=1)
-def get_data_from_files() -> List:
+def get_data_from_files() -> GenerationStore:
     base_config = current_app.config["nemo_inspector"]
-    dataset = None
+    dataset_columns = {}
     if os.path.isfile(base_config["input_file"]):
-        with open(base_config["input_file"]) as f:
-            dataset = [json.loads(line) for line in f]
+        with open_jsonl(base_config["input_file"], "rt") as f:
+            dataset_columns = columns_from_records(json.loads(line) for line in f)
 
     available_models = {
         model_name: model_info["file_paths"]
         for model_name, model_info in get_available_models().items()
     }
+    sources = list(
+        dict.fromkeys(path for files in available_models.values() for path in files)
+    )
+    source_ids = {path: source_id for source_id, path in enumerate(sources)}
+    # taken before parsing, so a file changed meanwhile is reported when it is read
+    source_stats = [
+        None if is_compressed(path) else get_file_stat(path) for path in sources
+    ]
 
-    all_models_data_array = []
+    # every file is a separate task, the largest go first to keep all workers busy.
+    # Without the cache workers return the parsed columns. With it they write them
+    # into the cache and return only their entry, whose buffers are memory-mapped
+    # here instead of being pickled. The store does not keep the mappings, the
+    # builder copies them once into its own arrays in row order
+    cache_dir = get_parse_cache_dir()
+    num_cores = -1
+    paths = sorted(sources, key=os.path.getsize, reverse=True)
+    if cache_dir:
+        entry_paths = Parallel(n_jobs=num_cores)(
+            delayed(cache_prediction_file)(path, cache_dir) for path in paths
+        )
+        parsed_files = {
+            path: load_cache_entry(path, entry_path)
+            for path, entry_path in zip(paths, entry_paths)
+        }
+        sweep_cache(
+            cache_dir,
+            base_config["inspector_params"]["parse_cache_max_mb"],
+            keep=[entry_path for entry_path in entry_paths if entry_path is not None],
+        )
+    else:
+        parsed_files = dict(
+            zip(
+                paths,
+                Parallel(n_jobs=num_cores)(
+                    delayed(read_prediction_file)(path) for path in paths
+                ),
+            )
+        )
 
-    def process_model_files(model_id, results_files, dataset):
-        model_data = defaultdict(list)
-        file_names = {}
-        for file_id, path in enumerate(results_files):
-            file_name = path.split("/")[-1].split(".")[0]
-            if file_name in file_names:
-                file_names[file_name] += 1
-                file_name += f"_{file_names[file_name]}"
-            else:
-                file_names[file_name] = 1
-            with open(path) as f:
-                answers = map(json.loads, f)
-                for question_index, answer in enumerate(answers):
-                    result = {
-                        FILE_NAME: file_name,
-                        **(
-                            dataset[question_index]
-                            if dataset and len(dataset) > question_index
-                            else {}
-                        ),
-                        "question_index": question_index + 1,
-                        "page_index": file_id,
-                        "labels": [],
-                        **answer,
-                    }
-                    model_data[question_index].append(result)
-        return model_id, model_data
+    # input file fields are stored once per question and shared by all answers
+    builder = GenerationStoreBuilder(
+        list(available_models.keys()),
+        sources,
+        question_columns=dataset_columns,
+        keys=[FILE_NAME, *dataset_columns, "question_index", "page_index", LABEL],
+        defaults={LABEL: list},
+        source_stats=source_stats,
+    )
+    followed_files.clear()
+    loaded_lines.clear()
+    for model_id, results_files in available_models.items():
+        file_names = get_file_names(results_files)
+        for file_id, (file_name, path) in enumerate(zip(file_names, results_files)):
+            followed_files[path].append((model_id, file_name, file_id))
+            add_file_chunk(
+                builder, parsed_files[path], source_ids[path], *followed_files[path][-1]
+            )
+    # compressed files are archives, they are not followed
+    ends = {
+        path: parsed_file.end
+        for path, parsed_file in parsed_files.items()
+        if not is_compressed(path)
+    }
+    loaded_lines.update(
+        {path: parsed_file.num_rows for path, parsed_file in parsed_files.items()}
+    )
+    store = builder.build()
+    parsed_files.clear()
+    logging.info(f"Loaded generations: {get_memory_report(store)}")
+    set_generation_metrics(store)
+
+    watch_interval = base_config["inspector_params"]["watch_interval"]
+    store.follows_sources = watch_interval > 0
+    global tail_follower
+    if tail_follower is not None:
+        tail_follower.stop()
+        tail_follower = None
+    if watch_interval > 0:
+        tail_follower = TailFollower(ends, watch_interval)
+        tail_follower.start()
+    return store
+
+
+def add_file_chunk(
+    builder: GenerationStoreBuilder,
+    parsed_file: ParsedFile,
+    source_id: int,
+    model_id: str,
+    file_name: str,
+    file_id: int,
+    first_question: int = 0,
+) -> None:
+    num_rows = parsed_file.num_rows
+    questions = first_question + np.arange(num_rows)
+    columns = {
+        FILE_NAME: Column.constant(file_name, num_rows),
+        "question_index": Column(INT, questions + 1),
+        "page_index": Column(INT, np.full(num_rows, file_id, dtype=np.int64)),
+        **parsed_file.columns,
+    }
+    builder.add_chunk(model_id, questions, columns, source_id, parsed_file.offsets)
 
-    num_cores = -1
-    model_data_list = Parallel(n_jobs=num_cores)(
-        delayed(process_model_files)(model_id, results_files, dataset)
-        for model_id, results_files in available_models.items()
+
+def get_base_metrics_state(store: GenerationStore) -> Tuple:
+    return (store, store.version, tuple(get_custom_stats().items()))
+
+
+def set_generation_metrics(
+    store: GenerationStore, questions: Optional[Iterable[int]] = None
+) -> None:
+    """Stores metrics of every question/model group (of all questions by default).
+
+    Metrics of all questions are also kept as the base metrics.
+    """
+    global base_metrics, base_metrics_state
+    if questions is not None:
+        set_groups_metrics(
+            store, np.flatnonzero(np.isin(store.questions, list(questions)))
+        )
+        return
+    metrics = get_groups_metrics(store, np.arange(len(store)))
+    # groups without answers have no metrics
+    present = np.diff(store.group_starts) > 0
+    base_metrics = {
+        key: Column.from_array(metrics[key].to_numpy(), present)
+        for key in metrics.columns
+    }
+    base_metrics_state = get_base_metrics_state(store)
+    restore_base_metrics(store)
+
+
+def restore_base_metrics(store: GenerationStore) -> None:
+    """Sets metrics of all files to every group, they are recomputed only if the data changed."""
+    if base_metrics_state != get_base_metrics_state(store):
+        set_generation_metrics(store)
+        return
+    for key, column in base_metrics.items():
+        store.set_group_column(key, column.take(np.arange(len(column))))
+
+
+def remap_base_metrics(store: GenerationStore, changed_questions: np.ndarray) -> None:
+    """Follows a change of the store rows after metrics of changed questions were set."""
+    global base_metrics_state
+    changed_groups = (
+        changed_questions[:, np.newaxis] * len(store.models)
+        + np.arange(len(store.models))
+    ).ravel()
+    for key, column in base_metrics.items():
+        # groups of new questions follow the existing ones
+        column = Column.concat(
+            [column, None], [len(column), max(store.num_groups - len(column), 0)]
+        )
+        for group in changed_groups.tolist():
+            column.set(group, store.group_columns[key].get(group))
+        base_metrics[key] = column
+    base_metrics_state = get_base_metrics_state(store)
+
+
+def get_replaced_rows(
+    store: GenerationStore, removed: np.ndarray, new_rows: GenerationStore
+) -> np.ndarray:
+    """Returns the removed row with the same question, model and file as every new row.
+
+    A reloaded line replaces the row of its previous version, new lines get -1.
+    """
+    removed_rows = {
+        key: row
+        for row, key in zip(
+            np.flatnonzero(removed).tolist(),
+            zip(
+                store.questions[removed].tolist(),
+                store.model_codes[removed].tolist(),
+                store.source_ids[removed].tolist(),
+            ),
+        )
+    }
+    return np.array(
+        [
+            removed_rows.get(key, -1)
+            for key in zip(
+                new_rows.questions.tolist(),
+                new_rows.model_codes.tolist(),
+                new_rows.source_ids.tolist(),
+            )
+        ],
+        dtype=np.int64,
     )
 
-    for model_id, model_data in model_data_list:
-        for question_index, results in model_data.items():
-            if len(all_models_data_array) <= question_index:
-                all_models_data_array.append({})
-            all_models_data_array[question_index][model_id] = results
-            stats = get_metrics(all_models_data_array[question_index][model_id])
-            all_models_data_array[question_index][model_id] = list(
-                map(
-                    lambda data: {**data, **stats},
-                    all_models_data_array[question_index][model_id],
+
+def apply_followed_updates() -> None:
+    """Adds lines appended to the followed files since the last call to the loaded data."""
+    if tail_follower is None:
+        return
+    with follow_lock:
+        updates = tail_follower.pop_updates()
+        if not updates:
+            return
+        # a rewrite makes earlier updates of the same file obsolete
+        last_reloads = {
+            update.path: update_id
+            for update_id, update in enumerate(updates)
+            if update.reloaded
+        }
+        updates = [
+            update
+            for update_id, update in enumerate(updates)
+            if update_id >= last_reloads.get(update.path, 0)
+        ]
+        store = get_data_from_files()
+        source_ids = {path: source_id for source_id, path in enumerate(store.sources)}
+        builder = GenerationStoreBuilder(store.models, store.sources)
+        removed = np.zeros(len(store), dtype=bool)
+        for update in updates:
+            source_id = source_ids[update.path]
+            # lines of a rewritten file moved, so its cached lines are dropped too
+            store.set_source_stat(source_id)
+            if update.reloaded:
+                # the file was rewritten, so all of its rows are replaced
+                removed |= store.source_ids == source_id
+                loaded_lines[update.path] = 0
+            for file_info in followed_files[update.path]:
+                add_file_chunk(
+                    builder,
+                    update.parsed_file,
+                    source_id,
+                    *file_info,
+                    first_question=loaded_lines[update.path],
                 )
-            )
-    return all_models_data_array
+            loaded_lines[update.path] += update.parsed_file.num_rows
+        new_rows = builder.build()
+        replaced = get_replaced_rows(store, removed, new_rows)
+        changed_questions = np.union1d(new_rows.questions, store.questions[removed])
+        base_metrics_valid = base_metrics_state == get_base_metrics_state(store)
+        previous_rows = store.extend(new_rows, removed)
+        # rows of new_rows keep their relative order when they are merged
+        replaced_rows = np.full(len(store), -1)
+        replaced_rows[previous_rows < 0] = replaced[
+            np.lexsort((new_rows.model_codes, new_rows.questions))
+        ]
+        set_generation_metrics(store, changed_questions.tolist())
+        if base_metrics_valid:
+            remap_base_metrics(store, changed_questions)
+        if dataset_data.store is store:
+            dataset_data.remap(previous_rows, replaced_rows)
 
 
 def get_filtered_files(
@@ -492,7 +936,7 @@ def is_detailed_answers_rows_key(key: str) -> bool:
     return (
         key not in get_deleted_stats()
         and "index" not in key
-        and key not in STATS_KEYS + list(get_metrics([]).keys())
+        and key not in STATS_KEYS + get_metrics_names()
         or key == QUESTION_FIELD
     )
 
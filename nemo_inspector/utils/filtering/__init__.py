@@ -0,0 +1,41 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from nemo_inspector.utils.filtering.column_expression import (
+    ColumnExpression,
+    UnsupportedExpression,
+    filter_rows,
+    get_filter_expressions,
+)
+from nemo_inspector.utils.filtering.parallel_filter import (
+    filter_files_parallel,
+    filter_questions_parallel,
+    get_filtering_functions,
+)
+from nemo_inspector.utils.filtering.query import (
+    QueryError,
+    QueryExpression,
+    filter_questions,
+    is_filter_query,
+    is_sort_query,
+    normalize_code,
+    parse_filter_query,
+    parse_sort_query,
+)
+from nemo_inspector.utils.filtering.sorting import (
+    get_sort_keys,
+    get_sortable_array,
+    order_by_key_lists,
+)
@@ -0,0 +1,625 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from nemo_inspector.settings.constants import BASE_GENERATION
+from nemo_inspector.utils.store import (
+    CATEGORY,
+    LAZY,
+    OBJECT,
+    GenerationStore,
+    object_array,
+)
+
+COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+NUMPY_COMPARISONS = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+}
+NUMBER_TYPES = (bool, int, float)
+
+
+class UnsupportedExpression(Exception):
+    """The expression is outside of the subset that can be evaluated over columns."""
+
+
+class Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Values:
+    """Results of a subexpression for every evaluated row.
+
+    values is a NumPy array (codes into categories for dictionary encoded
+    strings), errors holds the id of the error message raised for the row
+    or 0 if the row was evaluated successfully.
+    """
+
+    __slots__ = ("values", "errors", "categories")
+
+    def __init__(
+        self, values: np.ndarray, errors: np.ndarray, categories: Optional[List] = None
+    ):
+        self.values = values
+        self.errors = errors
+        self.categories = categories
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.categories is None and self.values.dtype != object
+
+    def objects(self) -> np.ndarray:
+        if self.categories is not None:
+            return object_array(self.categories + [None])[self.values]
+        if self.values.dtype == object:
+            return self.values
+        return object_array(self.values.tolist())
+
+
+Operand = Union[Constant, Values]
+
+
+class EvaluationContext:
+    def __init__(
+        self,
+        store: GenerationStore,
+        rows: np.ndarray,
+        scope: Optional[np.ndarray] = None,
+    ):
+        """scope holds all rows of the evaluation, which can be wider than rows."""
+        self.store = store
+        self.rows = rows
+        self.scope = rows if scope is None else scope
+        self.model_codes = store.model_codes[rows]
+        self.messages = [None]
+        self.message_ids = {}
+        # results computed once for the whole scope (e.g. aggregates)
+        self.cache = {}
+
+    def derive(self, rows: np.ndarray) -> "EvaluationContext":
+        """Returns a context for other rows of the same evaluation sharing its errors."""
+        context = EvaluationContext(self.store, rows, self.scope)
+        context.messages, context.message_ids = self.messages, self.message_ids
+        context.cache = self.cache
+        return context
+
+    def error_id(self, message: str) -> int:
+        if message not in self.message_ids:
+            self.message_ids[message] = len(self.messages)
+            self.messages.append(message)
+        return self.message_ids[message]
+
+    def no_errors(self) -> np.ndarray:
+        return np.zeros(len(self.rows), dtype=np.int32)
+
+
+def merge_errors(errors: np.ndarray, other: np.ndarray, where: np.ndarray = True) -> None:
+    """Keeps the first error of every row, as evaluation stops at the first exception."""
+    np.copyto(errors, other, where=(errors == 0) & (other != 0) & where)
+
+
+def map_elements(
+    context: EvaluationContext, function: Callable, *operands: Operand
+) -> Values:
+    """Applies a Python function to every row, exceptions become row errors."""
+    errors = context.no_errors()
+    columns = []
+    for operand in operands:
+        if isinstance(operand, Values):
+            merge_errors(errors, operand.errors)
+            columns.append(operand.objects())
+        else:
+            columns.append(None)
+    results = np.zeros(len(context.rows), dtype=object)
+    for row in np.flatnonzero(errors == 0):
+        arguments = [
+            operand.value if column is None else column[row]
+            for operand, column in zip(operands, columns)
+        ]
+        try:
+            results[row] = function(*arguments)
+        except Exception as e:
+            errors[row] = context.error_id(str(e))
+    return Values(results, errors)
+
+
+def map_categories(
+    context: EvaluationContext, function: Callable, values: Values
+) -> Values:
+    """Applies a Python function once per category of a dictionary encoded column."""
+    results = np.zeros(len(values.categories) + 1, dtype=object)
+    category_errors = np.zeros(len(values.categories) + 1, dtype=np.int32)
+    for code, category in enumerate(values.categories):
+        try:
+            results[code] = function(category)
+        except Exception as e:
+            category_errors[code] = context.error_id(str(e))
+    errors = values.errors.copy()
+    merge_errors(errors, category_errors[values.values])
+    return Values(results[values.values], errors)
+
+
+def get_truth(context: EvaluationContext, operand: Operand) -> Values:
+    """Returns truthiness of every row as a bool array."""
+    if isinstance(operand, Constant):
+        try:
+            truth = bool(operand.value)
+        except Exception as e:
+            return Values(
+                np.zeros(len(context.rows), dtype=bool),
+                np.full(len(context.rows), context.error_id(str(e)), dtype=np.int32),
+            )
+        return Values(np.full(len(context.rows), truth), context.no_errors())
+    if operand.categories is not None:
+        operand = map_categories(context, bool, operand)
+    elif operand.is_numeric:
+        return Values(operand.values.astype(bool), operand.errors)
+    elif operand.values.dtype == object:
+        operand = map_elements(context, bool, operand)
+    return Values(operand.values.astype(bool), operand.errors)
+
+
+class ColumnExpression:
+    """A filter or sorting expression evaluated over store columns instead of records.
+
+    Only a common subset of Python is translated: constants, field access
+    (data[model][field] when model_scoped, data[field] otherwise), len(),
+    comparisons including in/is, and/or/not. and/or are translated only
+    where just the truth of their value is used. Anything else raises
+    UnsupportedExpression, so the caller can fall back to calling the
+    compiled function for every record. Rows where the original code would
+    raise get an error instead of a value, like in catch_eval_exception.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        base_model: str,
+        model_scoped: bool = True,
+        truth_value: bool = True,
+    ):
+        """truth_value tells that only the truth of the result is used (filters)."""
+        self.text = text
+        self.base_model = base_model
+        self.model_scoped = model_scoped
+        body = self._parse(text)
+        # nodes whose value is used only as a truth value
+        self.truth_nodes = {id(body)} if truth_value else set()
+        self.function = self._compile(body)
+
+    def evaluate(
+        self, store: GenerationStore, rows: np.ndarray
+    ) -> Tuple[Values, List[str]]:
+        """Returns the values for given rows and the messages of their error ids."""
+        context = EvaluationContext(store, rows)
+        result = self._run(context)
+        if isinstance(result, Constant):
+            result = map_elements(context, lambda value: value, result)
+        return result, context.messages
+
+    def evaluate_truth(
+        self, store: GenerationStore, rows: np.ndarray
+    ) -> Tuple[Values, List[str]]:
+        context = EvaluationContext(store, rows)
+        return get_truth(context, self._run(context)), context.messages
+
+    def _parse(self, text: str) -> ast.AST:
+        try:
+            return ast.parse(text.strip(), mode="eval").body
+        except SyntaxError:
+            raise UnsupportedExpression(text) from None
+
+    def _run(self, context: EvaluationContext) -> Operand:
+        if isinstance(self.function, Constant):
+            return self.function
+        return self.function(context)
+
+    def _compile(self, node: ast.AST) -> Union[Constant, Callable]:
+        # constants are folded at compile time and returned as Constant objects
+        if isinstance(node, ast.Constant):
+            return Constant(node.value)
+        # base_generation is defined only for filters, that are model scoped
+        if (
+            isinstance(node, ast.Name)
+            and node.id == BASE_GENERATION
+            and self.model_scoped
+        ):
+            return Constant(self.base_model)
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            items = [self._compile(item) for item in node.elts]
+            if not all(isinstance(item, Constant) for item in items):
+                raise UnsupportedExpression(ast.unparse(node))
+            container = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+            return Constant(container(item.value for item in items))
+        if isinstance(node, ast.UnaryOp):
+            return self._compile_unary(node)
+        if isinstance(node, ast.Subscript):
+            return self._compile_field(node)
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "len"
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            return self._compile_len(self._compile(node.args[0]))
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+        if isinstance(node, ast.BoolOp) and id(node) in self.truth_nodes:
+            return self._compile_bool_op(node)
+        raise UnsupportedExpression(ast.unparse(node))
+
+    def _compile_constant_key(self, node: ast.AST) -> Any:
+        key = self._compile(node)
+        if not isinstance(key, Constant):
+            raise UnsupportedExpression(ast.unparse(node))
+        return key.value
+
+    def _compile_unary(self, node: ast.UnaryOp) -> Callable:
+        if isinstance(node.op, ast.Not):
+            self.truth_nodes.add(id(node.operand))
+        operand = self._compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            if isinstance(operand, Constant):
+                return Constant(not operand.value)
+
+            def evaluate_not(context: EvaluationContext) -> Values:
+                truth = get_truth(context, operand(context))
+                return Values(~truth.values, truth.errors)
+
+            return evaluate_not
+        if (
+            isinstance(node.op, (ast.USub, ast.UAdd))
+            and isinstance(operand, Constant)
+            and type(operand.value) in NUMBER_TYPES
+        ):
+            return Constant(
+                -operand.value if isinstance(node.op, ast.USub) else +operand.value
+            )
+        raise UnsupportedExpression(ast.unparse(node))
+
+    def _split_field(self, node: ast.AST) -> Tuple[Optional[str], Any]:
+        """Returns (model, field) of data[model][field] or (None, field) of data[field]."""
+        if not isinstance(node, ast.Subscript):
+            raise UnsupportedExpression(ast.unparse(node))
+        if self.model_scoped:
+            record = node.value
+            if not (
+                isinstance(record, ast.Subscript)
+                and isinstance(record.value, ast.Name)
+                and record.value.id == "data"
+            ):
+                raise UnsupportedExpression(ast.unparse(node))
+            return self._compile_constant_key(record.slice), self._compile_constant_key(
+                node.slice
+            )
+        if not (isinstance(node.value, ast.Name) and node.value.id == "data"):
+            raise UnsupportedExpression(ast.unparse(node))
+        return None, self._compile_constant_key(node.slice)
+
+    def _is_record(self, node: ast.AST) -> bool:
+        """Checks if the node is the record itself: data[model] or data."""
+        if self.model_scoped:
+            return (
+                isinstance(node, ast.Subscript)
+                and isinstance(node.value, ast.Name)
+                and node.value.id == "data"
+            )
+        return isinstance(node, ast.Name) and node.id == "data"
+
+    def _record_errors(
+        self, context: EvaluationContext, model: Optional[str]
+    ) -> np.ndarray:
+        errors = context.no_errors()
+        if model is not None:
+            wrong_model = context.model_codes != context.store.model_ids.get(model, -1)
+            errors[wrong_model] = context.error_id(repr(model))
+        return errors
+
+    def _compile_field(self, node: ast.Subscript) -> Callable:
+        model, key = self._split_field(node)
+
+        def evaluate_field(context: EvaluationContext) -> Values:
+            store, rows = context.store, context.rows
+            errors = self._record_errors(context, model)
+            if key not in store.key_order:
+                merge_errors(errors, np.full(len(rows), context.error_id(repr(key))))
+                return Values(np.zeros(len(rows), dtype=bool), errors)
+            column = store.full_column(key).take(rows)
+            merge_errors(
+                errors, np.where(column.is_present(), 0, context.error_id(repr(key)))
+            )
+            if column.kind == CATEGORY:
+                return Values(column.values, errors, column.categories)
+            if column.kind == OBJECT:
+                values = column.values
+                lazy = (values == LAZY) & (errors == 0)
+                if lazy.any():
+                    values = values.copy()
+                    values[lazy] = store.column_values(key, rows[lazy])
+                return Values(values, errors)
+            return Values(column.values, errors)
+
+        return evaluate_field
+
+    def _compile_len(self, operand: Callable) -> Callable:
+        if isinstance(operand, Constant):
+            return Constant(len(operand.value))
+
+        def evaluate_len(context: EvaluationContext) -> Values:
+            values = operand(context)
+            if values.categories is not None:
+                return map_categories(context, len, values)
+            return map_elements(context, len, values)
+
+        return evaluate_len
+
+    def _compile_membership(
+        self, key_node: ast.AST, record_node: ast.AST, op
+    ) -> Callable:
+        """Compiles `key in data[model]`, which checks if the record has the field."""
+        key = self._compile_constant_key(key_node)
+        model = (
+            self._compile_constant_key(record_node.slice) if self.model_scoped else None
+        )
+
+        def evaluate_membership(context: EvaluationContext) -> Values:
+            errors = self._record_errors(context, model)
+            store = context.store
+            if key in store.key_order:
+                present = store.full_column(key).take(context.rows).is_present()
+            else:
+                present = np.zeros(len(context.rows), dtype=bool)
+            return Values(present if isinstance(op, ast.In) else ~present, errors)
+
+        return evaluate_membership
+
+    def _compile_compare(self, node: ast.Compare) -> Callable:
+        if (
+            len(node.ops) == 1
+            and isinstance(node.ops[0], (ast.In, ast.NotIn))
+            and self._is_record(node.comparators[0])
+        ):
+            return self._compile_membership(node.left, node.comparators[0], node.ops[0])
+        operands = [
+            (
+                (lambda context, operand=operand: operand)
+                if isinstance(operand, Constant)
+                else operand
+            )
+            for operand in map(self._compile, [node.left, *node.comparators])
+        ]
+
+        def evaluate_compare(context: EvaluationContext) -> Values:
+            left = operands[0](context)
+            truth = np.ones(len(context.rows), dtype=bool)
+            errors = context.no_errors()
+            if isinstance(left, Values):
+                merge_errors(errors, left.errors)
+            # like Python, the chain stops at the first false comparison
+            active = errors == 0
+            for op, right_operand in zip(node.ops, operands[1:]):
+                right = right_operand(context)
+                result = get_truth(context, compare(context, op, left, right))
+                merge_errors(errors, result.errors, active)
+                truth &= np.where(active, result.values, True)
+                active &= result.values & (errors == 0)
+                left = right
+            return Values(truth & (errors == 0), errors)
+
+        return self._compile_indexed_compare(node, evaluate_compare) or evaluate_compare
+
+    def _compile_indexed_compare(
+        self, node: ast.Compare, fallback: Callable
+    ) -> Optional[Callable]:
+        """Answers `field == value`, `field in values` and `value in list_field` from
+        the field index, falls back to the general comparison if there is no index.
+        """
+        if len(node.ops) != 1:
+            return None
+        op, left, right = node.ops[0], node.left, node.comparators[0]
+        if isinstance(op, (ast.Eq, ast.NotEq)):
+            if isinstance(left, ast.Subscript):
+                field_node, value_node = left, right
+            else:
+                field_node, value_node = right, left
+            elements = False
+        elif isinstance(op, (ast.In, ast.NotIn)):
+            field_node, value_node = (
+                (left, right) if isinstance(left, ast.Subscript) else (right, left)
+            )
+            elements = field_node is right
+        else:
+            return None
+        try:
+            model, key = self._split_field(field_node)
+            value = self._compile(value_node)
+        except UnsupportedExpression:
+            return None
+        if not isinstance(value, Constant):
+            return None
+        if isinstance(op, (ast.In, ast.NotIn)) and not elements:
+            if not isinstance(value.value, (list, tuple, set, frozenset)):
+                return None
+            values = list(value.value)
+        else:
+            values = [value.value]
+        negate = isinstance(op, (ast.NotEq, ast.NotIn))
+
+        def evaluate_indexed(context: EvaluationContext) -> Values:
+            store, rows = context.store, context.rows
+            index = store.get_index(key)
+            if index is None or index.elements != elements:
+                return fallback(context)
+            truth = index.lookup(values)
+            if truth is None:
+                return fallback(context)
+            errors = self._record_errors(context, model)
+            present = store.full_column(key).take(rows).is_present()
+            merge_errors(errors, np.where(present, 0, context.error_id(repr(key))))
+            truth = truth[rows]
+            return Values((~truth if negate else truth) & (errors == 0), errors)
+
+        return evaluate_indexed
+
+    def _compile_bool_op(self, node: ast.BoolOp) -> Callable:
+        self.truth_nodes.update(map(id, node.values))
+        operands = [self._compile(value) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def evaluate_bool_op(context: EvaluationContext) -> Values:
+            errors = context.no_errors()
+            truth = np.full(len(context.rows), is_and)
+            # rows for which the result is not decided yet
+            active = np.ones(len(context.rows), dtype=bool)
+            for operand in operands:
+                if isinstance(operand, Constant):
+                    result = get_truth(context, operand)
+                elif active.all():
+                    result = get_truth(context, operand(context))
+                elif active.any():
+                    # decided rows are not evaluated, so selective operands
+                    # (e.g. answered by an index) narrow down the rest
+                    subset = context.derive(context.rows[active])
+                    subset_result = get_truth(subset, operand(subset))
+                    result = Values(
+                        np.zeros(len(context.rows), dtype=bool), context.no_errors()
+                    )
+                    result.values[active] = subset_result.values
+                    result.errors[active] = subset_result.errors
+                else:
+                    break
+                merge_errors(errors, result.errors, active)
+                active &= result.errors == 0
+                decided = active & (result.values != is_and)
+                truth[decided] = not is_and
+                active &= ~decided
+            return Values(truth & (errors == 0), errors)
+
+        return evaluate_bool_op
+
+
+def compare(
+    context: EvaluationContext, op: ast.cmpop, left: Operand, right: Operand
+) -> Operand:
+    function = COMPARISONS[type(op)]
+    if isinstance(left, Constant) and isinstance(right, Constant):
+        return map_elements(context, function, left, right)
+    if type(op) in NUMPY_COMPARISONS:
+        numpy_function = NUMPY_COMPARISONS[type(op)]
+        if (
+            isinstance(left, Values)
+            and left.is_numeric
+            and isinstance(right, Values)
+            and right.is_numeric
+        ):
+            errors = left.errors.copy()
+            merge_errors(errors, right.errors)
+            return Values(numpy_function(left.values, right.values), errors)
+        for values, constant, function_args in (
+            (left, right, lambda values, value: (values, value)),
+            (right, left, lambda values, value: (value, values)),
+        ):
+            if (
+                isinstance(values, Values)
+                and values.is_numeric
+                and isinstance(constant, Constant)
+                and type(constant.value) in NUMBER_TYPES
+            ):
+                return Values(
+                    numpy_function(*function_args(values.values, constant.value)),
+                    values.errors,
+                )
+    if (
+        isinstance(left, Values)
+        and left.categories is not None
+        and isinstance(right, Constant)
+    ):
+        return map_categories(context, lambda value: function(value, right.value), left)
+    if (
+        isinstance(right, Values)
+        and right.categories is not None
+        and isinstance(left, Constant)
+    ):
+        return map_categories(context, lambda value: function(left.value, value), right)
+    return map_elements(context, function, left, right)
+
+
+def get_filter_expressions(
+    filtering_function: str, base_model: str
+) -> Optional[List[ColumnExpression]]:
+    """Translates a files filter into column expressions, None if it is not possible.
+
+    Filters with several lines (common expressions) define Python variables,
+    so they are always evaluated by the original code.
+    """
+    if "\n" in filtering_function.strip():
+        return None
+    try:
+        return [
+            ColumnExpression(single_filter, base_model)
+            for single_filter in filtering_function.strip().split("&&")
+        ]
+    except UnsupportedExpression:
+        return None
+
+
+def filter_rows(
+    expressions: List[ColumnExpression],
+    store: GenerationStore,
+    rows: np.ndarray,
+    available_models: Dict,
+    errors_dict: Dict,
+) -> np.ndarray:
+    """Returns which rows pass all filters, rows where a filter fails are kept."""
+    keep = np.ones(len(rows), dtype=bool)
+    for expression in expressions:
+        truth, messages = expression.evaluate_truth(store, rows)
+        keep &= truth.values | (truth.errors != 0)
+        count_errors(truth.errors, messages, available_models, errors_dict)
+    return keep
+
+
+def count_errors(
+    errors: np.ndarray, messages: List[str], available_models: Dict, errors_dict: Dict
+) -> None:
+    """Counts errors the same way as catch_eval_exception does."""
+    error_ids, counts = np.unique(errors[errors != 0], return_counts=True)
+    for error_id, count in zip(error_ids, counts):
+        message = messages[error_id]
+        if message.split(" ")[-1].replace("'", "") not in available_models:
+            errors_dict[message] = errors_dict.get(message, 0) + int(count)
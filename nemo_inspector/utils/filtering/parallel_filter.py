@@ -0,0 +1,263 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+
+from nemo_inspector.settings.constants import BASE_GENERATION, FILES_FILTERING
+from nemo_inspector.utils.common import (
+    catch_eval_exception,
+    get_eval_function,
+    get_user_code_limits,
+)
+from nemo_inspector.utils.jobs import JobCancelled, report_progress
+from nemo_inspector.utils.store import GenerationStore, SourceReader, StoredRows
+from nemo_inspector.utils.supervisor import Progress, UserCodeError, run_supervised
+
+# below this number of questions per shard sending their records to a worker
+# costs more than filtering them in place
+MIN_SHARD_SIZE = 200
+
+# rows of every model of a question, shards build the records from them
+FilesGroups = List[Tuple[str, np.ndarray]]
+
+
+@functools.lru_cache(maxsize=16)
+def get_filtering_functions(
+    filtering_function: str, base_model: str, filter_mode: str
+) -> Tuple[Callable, ...]:
+    """Compiles the filter, workers receive only its text and compile it once."""
+    if filter_mode != FILES_FILTERING:
+        return (
+            get_eval_function(
+                f"{BASE_GENERATION} = '{base_model}'\n" + filtering_function.strip()
+            ),
+        )
+    filter_lines = filtering_function.strip().split("\n")
+    common_expressions = "\n".join(filter_lines[:-1])
+    return tuple(
+        get_eval_function(
+            f"{BASE_GENERATION} = '{base_model}'\n{common_expressions}\n{single_filter}"
+        )
+        for single_filter in filter_lines[-1].split("&&")
+    )
+
+
+def filter_files_shard(
+    filtering_function: str,
+    base_model: str,
+    available_models: Dict,
+    store: Union[GenerationStore, StoredRows],
+    questions_groups: List[FilesGroups],
+    progress: Optional[Progress] = None,
+) -> Tuple[List[List[np.ndarray]], Dict]:
+    filtering_functions = get_filtering_functions(
+        filtering_function, base_model, FILES_FILTERING
+    )
+    errors_dict = {}
+    reader = SourceReader(store)
+
+    def filtering_key_function(model: str, file_dict: Dict) -> bool:
+        return all(
+            [
+                catch_eval_exception(
+                    available_models,
+                    filter_function,
+                    {model: file_dict},
+                    True,
+                    errors_dict,
+                )
+                for filter_function in filtering_functions
+            ]
+        )
+
+    keeps = []
+    for groups in questions_groups:
+        keeps.append(
+            [
+                np.array(
+                    [
+                        filtering_key_function(model, file_dict)
+                        for file_dict in store.lazy_records(rows, reader=reader)
+                    ],
+                    dtype=bool,
+                )
+                for model, rows in groups
+            ]
+        )
+        if progress is not None:
+            progress(len(keeps))
+    return keeps, errors_dict
+
+
+def filter_questions_shard(
+    filtering_function: str,
+    base_model: str,
+    filter_mode: str,
+    store: Union[GenerationStore, StoredRows],
+    questions_groups: List[FilesGroups],
+    progress: Optional[Progress] = None,
+) -> Tuple[List[bool], Dict]:
+    (function,) = get_filtering_functions(filtering_function, base_model, filter_mode)
+    errors_dict = {}
+    reader = SourceReader(store)
+    keeps = []
+    for groups in questions_groups:
+        data = {model: store.lazy_records(rows, reader=reader) for model, rows in groups}
+        keeps.append(
+            bool(
+                catch_eval_exception(
+                    available_models=[],
+                    eval_func=function,
+                    data=data,
+                    default_answer=True,
+                    errors_dict=errors_dict,
+                )
+            )
+        )
+        if progress is not None:
+            progress(len(keeps))
+    return keeps, errors_dict
+
+
+def snapshot_shard(
+    store: GenerationStore, shard: List[FilesGroups]
+) -> Tuple[StoredRows, List[FilesGroups]]:
+    """Returns the records of the shard rows and its groups addressing them."""
+    sizes = [len(rows) for groups in shard for _, rows in groups]
+    rows = (
+        np.concatenate([rows for groups in shard for _, rows in groups])
+        if sizes
+        else np.zeros(0, dtype=np.int64)
+    )
+    starts = np.cumsum([0] + sizes)
+    snapshot_groups, group_id = [], 0
+    for groups in shard:
+        snapshot_groups.append([])
+        for model, _ in groups:
+            snapshot_groups[-1].append(
+                (model, np.arange(starts[group_id], starts[group_id + 1]))
+            )
+            group_id += 1
+    return StoredRows(store, rows), snapshot_groups
+
+
+def run_in_pool(
+    shard_function: Callable, store: GenerationStore, shards: List, *args
+) -> List:
+    """Evaluates the shards in a joblib process pool, every worker gets the records of its shard."""
+    total = sum(len(shard) for shard in shards)
+    shard_results = []
+    results = Parallel(n_jobs=len(shards), return_as="generator")(
+        delayed(shard_function)(*args, *snapshot_shard(store, shard)) for shard in shards
+    )
+    done = 0
+    for shard, shard_result in zip(shards, results):
+        shard_results.append(shard_result)
+        done += len(shard)
+        try:
+            report_progress(done, total)
+        except JobCancelled:
+            raise UserCodeError(
+                f"filtering was cancelled, {done} of {total} items were processed"
+            ) from None
+    return shard_results
+
+
+def run_sharded(
+    shard_function: Callable,
+    store: GenerationStore,
+    items: Sequence,
+    errors_dict: Dict,
+    n_jobs: int,
+    *args,
+) -> List:
+    """Splits items (rows of one question each) into contiguous shards evaluated in parallel.
+
+    Results are returned in the order of items and errors of all shards
+    are added to errors_dict. With user code limits configured the shards
+    run in supervised forked workers that read the records from the store of
+    this process. Otherwise they run in a joblib process pool that receives
+    the records of every shard, and small inputs are evaluated in this process.
+    """
+    num_shards = max(
+        min(effective_n_jobs(n_jobs), math.ceil(len(items) / MIN_SHARD_SIZE)), 1
+    )
+    bounds = np.linspace(0, len(items), num_shards + 1).astype(int)
+    shards = [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    timeout, memory_mb = get_user_code_limits()
+    if num_shards == 1 or timeout > 0 or memory_mb > 0:
+        shard_results = run_supervised(
+            [functools.partial(shard_function, *args, store, shard) for shard in shards],
+            [len(shard) for shard in shards],
+            "filtering",
+            timeout,
+            memory_mb,
+        )
+    else:
+        shard_results = run_in_pool(shard_function, store, shards, *args)
+    results = []
+    for shard, shard_errors in shard_results:
+        results.extend(shard)
+        for error, count in shard_errors.items():
+            errors_dict[error] = errors_dict.get(error, 0) + count
+    return results
+
+
+def filter_files_parallel(
+    filtering_function: str,
+    base_model: str,
+    available_models: Dict,
+    store: GenerationStore,
+    questions_groups: List[FilesGroups],
+    errors_dict: Dict,
+    n_jobs: int = -1,
+) -> List[List[np.ndarray]]:
+    """Returns a mask of kept files for every (model, rows) group of every question."""
+    return run_sharded(
+        filter_files_shard,
+        store,
+        questions_groups,
+        errors_dict,
+        n_jobs,
+        filtering_function,
+        base_model,
+        available_models,
+    )
+
+
+def filter_questions_parallel(
+    filtering_function: str,
+    base_model: str,
+    filter_mode: str,
+    store: GenerationStore,
+    questions_groups: List[FilesGroups],
+    errors_dict: Dict,
+    n_jobs: int = -1,
+) -> List[bool]:
+    """Returns whether every question, given by its (model, rows) groups, passes the filter."""
+    return run_sharded(
+        filter_questions_shard,
+        store,
+        questions_groups,
+        errors_dict,
+        n_jobs,
+        filtering_function,
+        base_model,
+        filter_mode,
+    )
@@ -0,0 +1,526 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Declarative filter and sort queries.
+
+Filters starting with `where` and sorts starting with `order by` are parsed
+by the grammar below instead of being run as Python code:
+
+    query      := "where" clause ("&&" clause)*
+    sort       := "order by" clause ["asc" | "desc"] ("," clause ["asc" | "desc"])*
+    clause     := and_clause ("or" and_clause)*
+    and_clause := not_clause ("and" not_clause)*
+    not_clause := "not" not_clause | comparison
+    comparison := operand (operator operand)*
+    operator   := "==" | "!=" | "<" | "<=" | ">" | ">=" | "in" | "not in"
+                | "is" | "is not" | "contains"
+    operand    := number | string | "true" | "false" | "null" | "[" literals "]"
+                | field | generation "." field | function "(" clause ")" | "(" clause ")"
+    function   := "len" | "any" | "all" | "count" | "sum" | "mean" | "min" | "max"
+
+Fields without a generation belong to the base generation. Names that are
+not identifiers are quoted with backticks, e.g. `my-model`.score. Queries
+are translated to the Python subset of ColumnExpression, so they use the
+same vectorized kernels and field indexes and never run arbitrary code.
+"""
+
+import ast
+import re
+from typing import Dict, List, NoReturn, Tuple
+
+import numpy as np
+
+from nemo_inspector.settings.constants import BASE_GENERATION
+from nemo_inspector.utils.filtering.column_expression import (
+    NUMBER_TYPES,
+    ColumnExpression,
+    Constant,
+    EvaluationContext,
+    Operand,
+    UnsupportedExpression,
+    Values,
+    count_errors,
+    get_truth,
+    map_elements,
+)
+from nemo_inspector.utils.store import GenerationStore
+
+FILTER_QUERY_PATTERN = re.compile(r"\s*where\b", re.IGNORECASE)
+SORT_QUERY_PATTERN = re.compile(r"\s*order\s+by\b", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+        |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+        |(?P<quoted>`[^`]+`)
+        |(?P<name>[A-Za-z_]\w*)
+        |(?P<symbol>&&|==|!=|<=|>=|[<>.,()\[\]-])
+    )\s*""",
+    re.VERBOSE,
+)
+END = "end"
+NUMBER = "number"
+STRING = "string"
+QUOTED = "quoted"
+NAME = "name"
+SYMBOL = "symbol"
+
+COMPARISON_OPERATORS = {
+    "==": ast.Eq,
+    "!=": ast.NotEq,
+    "<": ast.Lt,
+    "<=": ast.LtE,
+    ">": ast.Gt,
+    ">=": ast.GtE,
+    "in": ast.In,
+    "is": ast.Is,
+}
+KEYWORDS = {"and", "or", "not", "in", "is", "contains", "asc", "desc"}
+LITERALS = {"true": True, "false": False, "null": None}
+# aggregates of the truth of an expression
+TRUTH_AGGREGATES = ("any", "all", "count")
+AGGREGATES = TRUTH_AGGREGATES + ("sum", "mean", "min", "max")
+
+
+class QueryError(ValueError):
+    """The query does not follow the grammar or uses an unsupported construct."""
+
+
+def is_filter_query(text: str) -> bool:
+    return FILTER_QUERY_PATTERN.match(text) is not None
+
+
+def is_sort_query(text: str) -> bool:
+    return SORT_QUERY_PATTERN.match(text) is not None
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(
+                f"unexpected character {text[position]!r} at position {position}"
+            )
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+def normalize_code(text: str) -> str:
+    """Drops the formatting of a filter or sort that does not change its meaning."""
+    if is_filter_query(text) or is_sort_query(text):
+        try:
+            return " ".join(value for _, value in tokenize(text))
+        except QueryError:
+            return text.strip()
+    return "\n".join(line.rstrip() for line in text.strip().split("\n") if line.strip())
+
+
+class QueryParser:
+    """Recursive descent parser producing the Python AST of ColumnExpression."""
+
+    def __init__(self, text: str, model_scoped: bool):
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.model_scoped = model_scoped
+
+    def parse_filter(self) -> List[ast.expr]:
+        clauses = [self.parse_or()]
+        while self.accept("&&"):
+            clauses.append(self.parse_or())
+        self.expect_end()
+        return clauses
+
+    def parse_sort(self) -> List[Tuple[ast.expr, bool]]:
+        keys = [self.parse_sort_key()]
+        while self.accept(","):
+            keys.append(self.parse_sort_key())
+        self.expect_end()
+        return keys
+
+    def parse_sort_key(self) -> Tuple[ast.expr, bool]:
+        key = self.parse_or()
+        descending = self.accept("desc")
+        if not descending:
+            self.accept("asc")
+        return key, descending
+
+    def parse_or(self) -> ast.expr:
+        values = [self.parse_and()]
+        while self.accept("or"):
+            values.append(self.parse_and())
+        return values[0] if len(values) == 1 else ast.BoolOp(op=ast.Or(), values=values)
+
+    def parse_and(self) -> ast.expr:
+        values = [self.parse_not()]
+        while self.accept("and"):
+            values.append(self.parse_not())
+        return values[0] if len(values) == 1 else ast.BoolOp(op=ast.And(), values=values)
+
+    def parse_not(self) -> ast.expr:
+        if self.accept("not"):
+            return ast.UnaryOp(op=ast.Not(), operand=self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> ast.expr:
+        operands = [self.parse_operand()]
+        operators = []
+        while True:
+            if self.is_next("not") and self.is_next("in", offset=1):
+                self.position += 2
+                operators.append(ast.NotIn())
+            elif self.is_next("is") and self.is_next("not", offset=1):
+                self.position += 2
+                operators.append(ast.IsNot())
+            elif self.accept("contains"):
+                operators.append(None)
+            elif self.is_next(*COMPARISON_OPERATORS):
+                operators.append(COMPARISON_OPERATORS[self.next_value()]())
+            else:
+                break
+            operands.append(self.parse_operand())
+        if not operators:
+            return operands[0]
+        if None in operators:
+            if len(operators) > 1:
+                raise QueryError("contains cannot be chained with other comparisons")
+            # `a contains b` is `b in a`
+            return ast.Compare(
+                left=operands[1], ops=[ast.In()], comparators=[operands[0]]
+            )
+        return ast.Compare(left=operands[0], ops=operators, comparators=operands[1:])
+
+    def parse_operand(self) -> ast.expr:
+        kind, value = self.peek()
+        if kind in (NUMBER, STRING):
+            self.position += 1
+            return ast.Constant(ast.literal_eval(value))
+        if self.accept("-"):
+            operand = self.parse_operand()
+            if not (
+                isinstance(operand, ast.Constant) and type(operand.value) in NUMBER_TYPES
+            ):
+                raise QueryError("only numbers can be negated")
+            return ast.Constant(-operand.value)
+        if self.accept("("):
+            clause = self.parse_or()
+            self.expect(")")
+            return clause
+        if self.accept("["):
+            return self.parse_list()
+        if kind == NAME and value.lower() in LITERALS:
+            self.position += 1
+            return ast.Constant(LITERALS[value.lower()])
+        if (
+            kind == NAME
+            and value.lower() in ("len", *AGGREGATES)
+            and self.is_next("(", offset=1)
+        ):
+            self.position += 2
+            argument = self.parse_or()
+            self.expect(")")
+            return ast.Call(
+                func=ast.Name(id=value.lower(), ctx=ast.Load()),
+                args=[argument],
+                keywords=[],
+            )
+        if kind in (NAME, QUOTED):
+            return self.parse_field()
+        self.error("expected a value or a field")
+
+    def parse_list(self) -> ast.expr:
+        items = []
+        while not self.accept("]"):
+            if items:
+                self.expect(",")
+            item = self.parse_operand()
+            if not isinstance(item, ast.Constant):
+                raise QueryError("lists can hold only literals")
+            items.append(item)
+        return ast.List(elts=items, ctx=ast.Load())
+
+    def parse_field(self) -> ast.expr:
+        names = [self.parse_name()]
+        if self.accept("."):
+            names.append(self.parse_name())
+        data = ast.Name(id="data", ctx=ast.Load())
+        if not self.model_scoped:
+            if len(names) > 1:
+                raise QueryError(
+                    "sorting keys are fields of the sorted files, without a generation"
+                )
+            return ast.Subscript(value=data, slice=ast.Constant(names[0]), ctx=ast.Load())
+        model = (
+            ast.Constant(names[0])
+            if len(names) > 1
+            else ast.Name(id=BASE_GENERATION, ctx=ast.Load())
+        )
+        return ast.Subscript(
+            value=ast.Subscript(value=data, slice=model, ctx=ast.Load()),
+            slice=ast.Constant(names[-1]),
+            ctx=ast.Load(),
+        )
+
+    def parse_name(self) -> str:
+        kind, value = self.peek()
+        if kind == QUOTED:
+            self.position += 1
+            return value[1:-1]
+        if kind == NAME and value.lower() not in KEYWORDS:
+            self.position += 1
+            return value
+        self.error("expected a field name (quote it with backticks if it is a keyword)")
+
+    def peek(self, offset: int = 0) -> Tuple[str, str]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (END, "")
+
+    def is_next(self, *values: str, offset: int = 0) -> bool:
+        kind, value = self.peek(offset)
+        if kind == NAME:
+            return value.lower() in values
+        return kind == SYMBOL and value in values
+
+    def next_value(self) -> str:
+        kind, value = self.peek()
+        self.position += 1
+        return value.lower() if kind == NAME else value
+
+    def accept(self, *values: str) -> bool:
+        if self.is_next(*values):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, value: str) -> None:
+        if not self.accept(value):
+            self.error(f"expected {value!r}")
+
+    def expect_end(self) -> None:
+        if self.peek()[0] != END:
+            self.error("expected the end of the query")
+
+    def error(self, message: str) -> NoReturn:
+        kind, value = self.peek()
+        found = "the end of the query" if kind == END else repr(value)
+        raise QueryError(f"{message}, found {found}")
+
+
+class QueryExpression(ColumnExpression):
+    """A column expression built from a parsed query.
+
+    Besides ColumnExpression it evaluates aggregates over the files of one
+    generation in a question. They are computed once per question from the
+    rows of the evaluation scope and are the same for all rows of the
+    question. Files where the aggregated expression fails are skipped.
+    """
+
+    def __init__(
+        self,
+        tree: ast.expr,
+        base_model: str,
+        model_scoped: bool = True,
+        truth_value: bool = True,
+    ):
+        self.tree = tree
+        self.aggregate_depth = 0
+        # whether fields are used outside of aggregates
+        self.uses_rows = False
+        try:
+            super().__init__(ast.unparse(tree), base_model, model_scoped, truth_value)
+        except UnsupportedExpression as e:
+            raise QueryError(f"{e} is not supported in queries") from None
+
+    def evaluate_questions(
+        self, store: GenerationStore, rows: np.ndarray
+    ) -> Tuple[np.ndarray, Values, List[str]]:
+        """Evaluates the truth once for every question of rows, aggregating all rows."""
+        questions, first_rows = np.unique(store.questions[rows], return_index=True)
+        context = EvaluationContext(store, rows[first_rows], scope=rows)
+        return questions, get_truth(context, self._run(context)), context.messages
+
+    def _parse(self, text: str) -> ast.AST:
+        return self.tree
+
+    def _compile(self, node: ast.AST):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in AGGREGATES
+        ):
+            return self._compile_aggregate(node.func.id, node.args[0])
+        if isinstance(node, ast.Subscript) and not self.aggregate_depth:
+            self.uses_rows = True
+        return super()._compile(node)
+
+    def _compile_aggregate(self, name: str, argument: ast.AST):
+        if not self.model_scoped:
+            raise QueryError(f"{name}() cannot be used in sorting keys")
+        if self.aggregate_depth:
+            raise QueryError(f"{name}() cannot be used inside of another aggregate")
+        models = {
+            self._split_field(node)[0]
+            for node in ast.walk(argument)
+            if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Subscript)
+        }
+        if len(models) > 1:
+            raise QueryError(
+                f"{name}() aggregates files of one generation, got {sorted(models)}"
+            )
+        model = models.pop() if models else self.base_model
+        if name in TRUTH_AGGREGATES:
+            self.truth_nodes.add(id(argument))
+        self.aggregate_depth += 1
+        operand = self._compile(argument)
+        self.aggregate_depth -= 1
+
+        def evaluate_aggregate(context: EvaluationContext) -> Values:
+            if id(argument) not in context.cache:
+                context.cache[id(argument)] = aggregate(context, name, model, operand)
+            questions, values, errors = context.cache[id(argument)]
+            groups = np.searchsorted(questions, context.store.questions[context.rows])
+            return Values(values[groups], errors[groups])
+
+        return evaluate_aggregate
+
+
+def to_number(value):
+    if type(value) not in NUMBER_TYPES:
+        raise TypeError(f"cannot aggregate values of type {type(value).__name__}")
+    return value
+
+
+def get_numbers(context: EvaluationContext, operand: Operand) -> Values:
+    """Converts the operand to an int64 or float64 array, other values are errors."""
+    if isinstance(operand, Values) and operand.is_numeric:
+        values = operand.values
+        return Values(
+            values.astype(np.float64 if values.dtype.kind == "f" else np.int64),
+            operand.errors,
+        )
+    numbers = map_elements(context, to_number, operand)
+    valid = numbers.errors == 0
+    is_float = any(type(value) is float for value in numbers.values[valid])
+    values = np.where(valid, numbers.values, 0).astype(
+        np.float64 if is_float else np.int64
+    )
+    return Values(values, numbers.errors)
+
+
+def aggregate(
+    context: EvaluationContext, name: str, model: str, operand
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the questions of the scope with the aggregate and the error of each one."""
+    store, scope = context.store, context.scope
+    questions = np.unique(store.questions[scope])
+    rows = scope[store.model_codes[scope] == store.model_ids.get(model, -1)]
+    subset = context.derive(rows)
+    values = operand if isinstance(operand, Constant) else operand(subset)
+    groups = np.searchsorted(questions, store.questions[rows])
+    errors = np.zeros(len(questions), dtype=np.int32)
+    # like data[model] in Python filters, a generation without files of the question
+    # fails with the KeyError message, so the question is kept and no error is reported
+    no_files = np.bincount(groups, minlength=len(questions)) == 0
+
+    if name in TRUTH_AGGREGATES:
+        errors[no_files] = context.error_id(repr(model))
+        truth = get_truth(subset, values)
+        valid = truth.errors == 0
+        counts = np.bincount(groups[valid & truth.values], minlength=len(questions))
+        if name == "count":
+            return questions, counts, errors
+        if name == "any":
+            return questions, counts > 0, errors
+        return (
+            questions,
+            counts == np.bincount(groups[valid], minlength=len(questions)),
+            errors,
+        )
+
+    numbers = get_numbers(subset, values)
+    valid = numbers.errors == 0
+    groups, numbers = groups[valid], numbers.values[valid]
+    totals = np.bincount(groups, minlength=len(questions))
+    if name in ("sum", "mean"):
+        results = np.zeros(len(questions), dtype=numbers.dtype)
+        np.add.at(results, groups, numbers)
+        if name == "sum":
+            return questions, results, errors
+        results = results / np.maximum(totals, 1)
+    else:
+        limits = np.finfo if numbers.dtype.kind == "f" else np.iinfo
+        initial = (
+            limits(numbers.dtype).max if name == "min" else limits(numbers.dtype).min
+        )
+        results = np.full(len(questions), initial, dtype=numbers.dtype)
+        (np.minimum if name == "min" else np.maximum).at(results, groups, numbers)
+    errors[totals == 0] = context.error_id(f"{name}() of no files")
+    errors[no_files] = context.error_id(repr(model))
+    return questions, results, errors
+
+
+def parse_filter_query(
+    text: str, base_model: str, question_level: bool = False
+) -> List[QueryExpression]:
+    """Parses a `where` query into one expression for every `&&` separated clause.
+
+    Question level queries (filtering whole questions) can use fields only
+    inside of aggregates.
+    """
+    match = FILTER_QUERY_PATTERN.match(text)
+    expressions = [
+        QueryExpression(clause, base_model)
+        for clause in QueryParser(text[match.end() :], model_scoped=True).parse_filter()
+    ]
+    if question_level and any(expression.uses_rows for expression in expressions):
+        raise QueryError(
+            "fields have to be aggregated to filter questions, e.g. any(is_correct)"
+        )
+    return expressions
+
+
+def parse_sort_query(text: str) -> List[Tuple[QueryExpression, bool]]:
+    """Parses an `order by` query into expressions of the keys and their direction."""
+    match = SORT_QUERY_PATTERN.match(text)
+    return [
+        (QueryExpression(key, "", model_scoped=False, truth_value=False), descending)
+        for key, descending in QueryParser(
+            text[match.end() :], model_scoped=False
+        ).parse_sort()
+    ]
+
+
+def filter_questions(
+    expressions: List[QueryExpression],
+    store: GenerationStore,
+    questions: np.ndarray,
+    rows: np.ndarray,
+    available_models: Dict,
+    errors_dict: Dict,
+) -> np.ndarray:
+    """Returns which questions pass all queries aggregating over the given rows.
+
+    Questions without rows and questions where a query fails are kept.
+    """
+    keep = np.ones(len(questions), dtype=bool)
+    if not len(rows):
+        return keep
+    for expression in expressions:
+        evaluated, truth, messages = expression.evaluate_questions(store, rows)
+        count_errors(truth.errors, messages, available_models, errors_dict)
+        positions = np.minimum(np.searchsorted(evaluated, questions), len(evaluated) - 1)
+        passed = truth.values | (truth.errors != 0)
+        keep &= passed[positions] | (evaluated[positions] != questions)
+    return keep
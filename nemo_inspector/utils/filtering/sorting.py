@@ -0,0 +1,227 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from nemo_inspector.utils.common import (
+    catch_eval_exception,
+    get_eval_function,
+    get_user_code_limits,
+)
+from nemo_inspector.utils.filtering.column_expression import (
+    ColumnExpression,
+    UnsupportedExpression,
+    count_errors,
+)
+from nemo_inspector.utils.filtering.query import is_sort_query, parse_sort_query
+from nemo_inspector.utils.store import GenerationStore, PartialOrder
+from nemo_inspector.utils.supervisor import Progress, run_supervised
+
+NUMBER_TYPES = (bool, int, float)
+
+
+def get_dense_codes(keys: Sequence) -> np.ndarray:
+    """Returns integer codes that order the keys like sorted() does, equal keys share a code.
+
+    Keys that Python cannot compare (e.g. numbers and strings) are ordered
+    by their type name first, and by their text if they are still not comparable.
+    """
+    for sorting_key in (
+        lambda key: key,
+        lambda key: (type(key).__name__, key),
+        lambda key: (type(key).__name__, str(key)),
+    ):
+        try:
+            order = sorted(range(len(keys)), key=lambda index: sorting_key(keys[index]))
+            break
+        except TypeError:
+            continue
+    codes = np.zeros(len(keys), dtype=np.int64)
+    for previous, index in zip(order, order[1:]):
+        previous_key, key = sorting_key(keys[previous]), sorting_key(keys[index])
+        codes[index] = codes[previous] + (previous_key < key)
+    return codes
+
+
+def get_sortable_array(keys: Sequence) -> np.ndarray:
+    """Converts sort keys to an array that NumPy orders like Python orders the keys."""
+    types = set(map(type, keys))
+    if types <= set(NUMBER_TYPES):
+        try:
+            return np.array(keys, dtype=np.float64 if float in types else np.int64)
+        except OverflowError:
+            pass
+    elif types == {str}:
+        return np.unique(np.array(keys, dtype=str), return_inverse=True)[1].ravel()
+    return get_dense_codes(keys)
+
+
+def get_sort_keys(
+    sorting_function: str,
+    store: GenerationStore,
+    rows: np.ndarray,
+    available_models: Dict,
+    errors_dict: Dict,
+) -> np.ndarray:
+    """Evaluates the sorting function once for every row.
+
+    Rows where a Python sorting function fails get key 0. Rows where a key of
+    a query is missing or fails go after the other rows in both directions.
+    """
+    if is_sort_query(sorting_function):
+        keys = []
+        for expression, descending in parse_sort_query(sorting_function):
+            key, failed = evaluate_expression_keys(
+                expression, store, rows, available_models, errors_dict
+            )
+            keys.extend([failed.astype(np.int64), -key if descending else key])
+        return combine_sort_keys(keys)
+    try:
+        expression = ColumnExpression(
+            sorting_function, "", model_scoped=False, truth_value=False
+        )
+    except UnsupportedExpression:
+        expression = None
+    if expression is not None:
+        return get_expression_keys(expression, store, rows, available_models, errors_dict)
+
+    function = get_eval_function(sorting_function.strip())
+
+    def evaluate_keys(progress: Progress) -> Tuple[List, Dict]:
+        keys, keys_errors = [], {}
+        for record in store.lazy_records(rows):
+            keys.append(
+                catch_eval_exception(available_models, function, record, 0, keys_errors)
+            )
+            progress(len(keys))
+        return keys, keys_errors
+
+    ((keys, keys_errors),) = run_supervised(
+        [evaluate_keys], [len(rows)], "sorting", *get_user_code_limits()
+    )
+    for error, count in keys_errors.items():
+        errors_dict[error] = errors_dict.get(error, 0) + count
+    return get_sortable_array(keys)
+
+
+def evaluate_expression_keys(
+    expression: ColumnExpression,
+    store: GenerationStore,
+    rows: np.ndarray,
+    available_models: Dict,
+    errors_dict: Dict,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns sortable keys of the rows and where the expression failed, keys are 0 there."""
+    values, messages = expression.evaluate(store, rows)
+    count_errors(values.errors, messages, available_models, errors_dict)
+    failed = values.errors != 0
+    if values.is_numeric:
+        keys = values.values.astype(
+            np.float64 if values.values.dtype.kind == "f" else np.int64
+        )
+        keys[failed] = 0
+        return keys, failed
+    keys = values.objects()
+    keys[failed] = 0
+    return get_sortable_array(keys.tolist()), failed
+
+
+def get_expression_keys(
+    expression: ColumnExpression,
+    store: GenerationStore,
+    rows: np.ndarray,
+    available_models: Dict,
+    errors_dict: Dict,
+) -> np.ndarray:
+    return evaluate_expression_keys(
+        expression, store, rows, available_models, errors_dict
+    )[0]
+
+
+def combine_sort_keys(keys: List[np.ndarray]) -> np.ndarray:
+    """Returns a single key ordering rows like the tuples of the keys."""
+    if len(keys) == 1:
+        return keys[0]
+    # the last key of lexsort is the primary one
+    order = np.lexsort(keys[::-1])
+    changed = np.zeros(len(order) - 1 if len(order) else 0, dtype=bool)
+    for key in keys:
+        changed |= key[order][1:] != key[order][:-1]
+    combined = np.empty(len(order), dtype=np.int64)
+    combined[order] = np.concatenate([[0], np.cumsum(changed)])
+    return combined
+
+
+def order_by_key_lists(
+    items: np.ndarray, positions: np.ndarray, keys: np.ndarray
+) -> PartialOrder:
+    """Orders items stably by the sorted lists of their keys, compared like tuples.
+
+    keys[i] belongs to the list of items[positions[i]], keys of one item
+    have to be next to each other. An item without keys goes first and a
+    list goes before the lists that it is a prefix of. Only the order of
+    the first items is computed until more of them are read.
+    """
+    starts = np.flatnonzero(np.diff(positions, prepend=-1))
+    # the smallest key of a list decides first, lists without keys go before all
+    if keys.dtype.kind == "f":
+        primary = np.full(len(items), -np.inf)
+        if len(keys):
+            primary[positions[starts]] = np.fmin.reduceat(keys, starts)
+    else:
+        primary = np.full(len(items), np.iinfo(keys.dtype).min, dtype=keys.dtype)
+        if len(keys):
+            primary[positions[starts]] = np.minimum.reduceat(keys, starts)
+
+    def order_positions(candidates: np.ndarray) -> np.ndarray:
+        is_candidate = np.zeros(len(items), dtype=bool)
+        is_candidate[candidates] = True
+        rows = np.flatnonzero(is_candidate[positions])
+        order = rows[np.lexsort((keys[rows], positions[rows]))]
+        sorted_positions = positions[order]
+        # index of every key in the sorted list of its item
+        indexes = np.arange(len(order)) - np.searchsorted(
+            sorted_positions, sorted_positions
+        )
+        columns = np.searchsorted(candidates, sorted_positions)
+        return candidates[
+            order_key_matrix(columns, indexes, keys[order], len(candidates))
+        ]
+
+    return PartialOrder(items, primary, order_positions)
+
+
+def order_key_matrix(
+    positions: np.ndarray, indexes: np.ndarray, keys: np.ndarray, num_positions: int
+) -> np.ndarray:
+    """Returns the stable order of positions by their lists of keys, compared like tuples.
+
+    Every key belongs to the list of positions[i] at index indexes[i]. Lists
+    are padded into a matrix where a missing key sorts before any key, so
+    a list goes before the lists that it is a prefix of.
+    """
+    width = int(indexes.max()) + 1 if len(indexes) else 0
+    matrix = np.zeros((width, num_positions), dtype=keys.dtype)
+    present = np.zeros((width, num_positions), dtype=bool)
+    matrix[indexes, positions] = keys
+    present[indexes, positions] = True
+    # the last key of lexsort is the primary one
+    sort_keys = []
+    for index in reversed(range(width)):
+        sort_keys.extend([matrix[index], present[index]])
+    if not sort_keys:
+        return np.arange(num_positions)
+    return np.lexsort(sort_keys)
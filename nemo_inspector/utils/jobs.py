@@ -0,0 +1,221 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import functools
+import itertools
+import threading
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from dash.background_callback.managers import BaseBackgroundCallbackManager
+from dash.exceptions import PreventUpdate
+from flask import current_app
+
+
+class JobCancelled(Exception):
+    """The user cancelled the background job."""
+
+
+class Job:
+    """A background callback run, its progress and its result."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.set_progress: Optional[Callable] = None
+        self.progress = None
+        self.result = BaseBackgroundCallbackManager.UNDEFINED
+        self.updated_props = {}
+
+    def report(self, done: int, total: int) -> None:
+        if self.set_progress is not None:
+            self.set_progress((done, total, f"{done} / {total}"))
+
+
+# jobs and the callbacks that read or change the data loaded by the server
+# do not run concurrently, jobs that start nested operations take it again
+data_lock = threading.RLock()
+
+
+def holds_data_lock(function: Callable) -> Callable:
+    """Runs a callback that is not a job under the lock of the jobs."""
+
+    @functools.wraps(function)
+    def locked_function(*args, **kwargs):
+        with data_lock:
+            return function(*args, **kwargs)
+
+    return locked_function
+
+
+current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+def report_progress(done: int, total: int) -> None:
+    """Reports how many of the items the current background job processed.
+
+    Raises JobCancelled once the user cancelled the job, outside of jobs it
+    does nothing.
+    """
+    job = current_job.get()
+    if job is None:
+        return
+    job.report(done, total)
+    if job.cancelled.is_set():
+        raise JobCancelled()
+
+
+class InProcessManager(BaseBackgroundCallbackManager):
+    """Runs background callbacks in threads of the server process, one at a time.
+
+    Unlike DiskcacheManager the jobs see and change the data loaded by the
+    server, which every Analyze page operation works on. Progress outputs
+    receive (done, total, label), cancelled jobs stop at their next progress
+    report. Like the managers of Dash, it sets the callback context of jobs
+    through Dash internals, so Dash is pinned in requirements/inspector.txt.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.keys: Dict[str, str] = {}
+        # set_props of jobs whose result was already taken
+        self.updated_props: Dict[str, Dict] = {}
+        self.job_ids = itertools.count()
+        # operations on the shared data do not run concurrently
+        self.run_lock = data_lock
+        self.signing_secret = None
+        super().__init__(cache_by=None)
+
+    def make_job_fn(self, fn: Callable, progress: Any, key: Optional[str] = None):
+        def job_fn(job: Job, args: Any, context: Dict) -> None:
+            callback_context = AttributeDict(**context)
+            callback_context.ignore_register_page = False
+            callback_context.updated_props = job.updated_props
+            context_value.set(callback_context)
+            current_job.set(job)
+
+            def set_progress(value: Any) -> None:
+                job.progress = (
+                    list(value) if isinstance(value, (list, tuple)) else [value]
+                )
+
+            progress_args = []
+            if progress:
+                job.set_progress = set_progress
+                progress_args.append(set_progress)
+            try:
+                if isinstance(args, dict):
+                    result = fn(*progress_args, **args)
+                else:
+                    result = fn(*progress_args, *args)
+            except PreventUpdate:
+                result = {"_dash_no_update": "_dash_no_update"}
+            except Exception as e:
+                result = {
+                    "background_callback_error": {
+                        "msg": str(e),
+                        "tb": traceback.format_exc(),
+                    }
+                }
+            job.result = result
+
+        return job_fn
+
+    def call_job_fn(self, key: str, job_fn: Callable, args: Any, context: Dict) -> str:
+        job_id = str(next(self.job_ids))
+        job = Job(key)
+        self.jobs[job_id] = job
+        self.keys[key] = job_id
+        app = current_app._get_current_object()
+
+        def run() -> None:
+            try:
+                with self.run_lock, app.app_context():
+                    if not job.cancelled.is_set():
+                        job_fn(job, args, context)
+            finally:
+                job.finished.set()
+                if job.cancelled.is_set():
+                    # nobody waits for the result of a cancelled job
+                    self._forget(job_id)
+
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(run,))
+        thread.daemon = True
+        thread.start()
+        return job_id
+
+    def _get_job(self, key: str) -> Optional[Job]:
+        return self.jobs.get(self.keys.get(key))
+
+    def _forget(self, job_id: str) -> None:
+        job = self.jobs.pop(job_id, None)
+        if job is not None and self.keys.get(job.key) == job_id:
+            del self.keys[job.key]
+
+    def terminate_job(self, job: Optional[str]) -> None:
+        if job is None or job not in self.jobs:
+            return
+        self.jobs[job].cancelled.set()
+        if self.jobs[job].finished.is_set():
+            self._forget(job)
+
+    def terminate_unhealthy_job(self, job: str) -> bool:
+        return False
+
+    def job_running(self, job: str) -> bool:
+        return job in self.jobs and not self.jobs[job].finished.is_set()
+
+    def get_progress(self, key: str) -> Optional[list]:
+        job = self._get_job(key)
+        if job is None or job.progress is None:
+            return None
+        progress, job.progress = job.progress, None
+        return progress
+
+    def result_ready(self, key: str) -> bool:
+        job = self._get_job(key)
+        return job is not None and job.finished.is_set()
+
+    def get_result(self, key: str, job: Optional[str]) -> Any:
+        job_id = job if job in self.jobs else self.keys.get(key)
+        if job_id is None or not self.jobs[job_id].finished.is_set():
+            return self.UNDEFINED
+        finished_job = self.jobs[job_id]
+        if finished_job.updated_props:
+            self.updated_props[key] = finished_job.updated_props
+        self._forget(job_id)
+        return finished_job.result
+
+    def get_updated_props(self, key: str) -> Dict:
+        job = self._get_job(key)
+        if job is None:
+            return self.updated_props.pop(key, {})
+        updated_props = dict(job.updated_props)
+        job.updated_props.clear()
+        return updated_props
+
+    def clear_cache_entry(self, key: str) -> None:
+        if key in self.keys:
+            self._forget(self.keys[key])
+
+    def get_or_create_signing_secret(self, generate: Callable) -> bytes:
+        if self.signing_secret is None:
+            self.signing_secret = generate()
+        return self.signing_secret
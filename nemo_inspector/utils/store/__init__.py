@@ -0,0 +1,72 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from nemo_inspector.utils.store.column import (
+    BOOL,
+    CATEGORY,
+    FLOAT,
+    INT,
+    LAZY,
+    MISSING,
+    OBJECT,
+    Column,
+    columns_from_records,
+    object_array,
+)
+from nemo_inspector.utils.store.field_index import FieldIndex
+from nemo_inspector.utils.store.generation_store import (
+    GenerationStore,
+    GenerationStoreBuilder,
+    LazyRecord,
+    SourceChangedError,
+    SourceReader,
+    StoredRows,
+)
+from nemo_inspector.utils.store.jsonl_reader import (
+    ParsedFile,
+    build_line_offsets,
+    forget_records,
+    get_file_stat,
+    is_compressed,
+    open_jsonl,
+    read_prediction_file,
+    read_record,
+    read_records,
+)
+from nemo_inspector.utils.store.memory_report import MemoryReport, get_memory_report
+from nemo_inspector.utils.store.parse_cache import (
+    cache_prediction_file,
+    get_cache_path,
+    load_cache_entry,
+    load_parsed_file,
+    read_prediction_file_cached,
+    save_parsed_file,
+    sweep_cache,
+)
+from nemo_inspector.utils.store.partial_order import (
+    PartialOrder,
+    PartialRank,
+    rank_within_groups,
+)
+from nemo_inspector.utils.store.result_cache import ResultCache
+from nemo_inspector.utils.store.tail_follow import TailFollower
+from nemo_inspector.utils.store.table_view import (
+    BASE_LAYER,
+    FILTER_LAYER,
+    SORT_LAYER,
+    QuestionView,
+    TableView,
+    ViewLayer,
+)
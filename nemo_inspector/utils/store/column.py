@@ -0,0 +1,420 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from nemo_inspector.settings.constants import CATEGORICAL_MAX_UNIQUE
+
+BOOL = "bool"
+INT = "int"
+FLOAT = "float"
+CATEGORY = "category"
+OBJECT = "object"
+
+_NUMPY_DTYPES = {BOOL: np.bool_, INT: np.int64, FLOAT: np.float64}
+_PYTHON_TYPES = {BOOL: bool, INT: int, FLOAT: float}
+_NULLABLE_ARRAYS = {
+    BOOL: pd.arrays.BooleanArray,
+    INT: pd.arrays.IntegerArray,
+    FLOAT: pd.arrays.FloatingArray,
+}
+
+
+class _Marker:
+    """Singleton placeholder stored in object columns instead of a real value."""
+
+    _instances = {}
+
+    def __new__(cls, name: str):
+        if name not in cls._instances:
+            marker = super().__new__(cls)
+            marker.name = name
+            cls._instances[name] = marker
+        return cls._instances[name]
+
+    def __reduce__(self):
+        return (_Marker, (self.name,))
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def __bool__(self) -> bool:
+        return False
+
+
+# field is absent from a record (as opposed to a JSON null)
+MISSING = _Marker("MISSING")
+# field is present in the source file but is read from disk only on demand
+LAZY = _Marker("LAZY")
+# field was removed from a record and must not be taken from the question overlay
+DELETED = _Marker("DELETED")
+
+
+def object_array(values: List[Any]) -> np.ndarray:
+    # np.array would try to broadcast nested lists, so elements are placed one by one
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def concatenate(
+    parts: List[np.ndarray], order: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """np.concatenate(parts)[order], every part is copied once straight to its rows."""
+    if order is None:
+        return np.concatenate(parts)
+    result = np.empty(len(order), dtype=np.result_type(*parts))
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[order] = np.arange(len(order))
+    start = 0
+    for part in parts:
+        result[positions[start : start + len(part)]] = part
+        start += len(part)
+    return result
+
+
+class Column:
+    """A single typed column of the generation store.
+
+    Booleans, integers and floats are kept in NumPy arrays with an optional
+    presence mask, low-cardinality strings are dictionary encoded and
+    everything else (lists, dicts, nulls, long texts) stays in an object array
+    where absent values are marked with MISSING.
+    """
+
+    __slots__ = ("kind", "values", "present", "categories", "category_codes")
+
+    def __init__(
+        self,
+        kind: str,
+        values: np.ndarray,
+        present: Optional[np.ndarray] = None,
+        categories: Optional[List[str]] = None,
+    ):
+        self.kind = kind
+        self.values = values
+        self.present = present
+        self.categories = categories
+        self.category_codes = (
+            {category: code for code, category in enumerate(categories)}
+            if categories is not None
+            else None
+        )
+
+    @classmethod
+    def from_values(cls, values: List[Any]) -> "Column":
+        present_values = [value for value in values if value is not MISSING]
+        value_types = {type(value) for value in present_values}
+        has_missing = len(present_values) != len(values)
+
+        kind = OBJECT
+        if len(value_types) == 1:
+            value_type = next(iter(value_types))
+            if value_type in (bool, int, float):
+                kind = {bool: BOOL, int: INT, float: FLOAT}[value_type]
+            elif value_type is str:
+                unique_values = set(present_values)
+                if len(unique_values) <= CATEGORICAL_MAX_UNIQUE and len(
+                    unique_values
+                ) * 2 <= len(present_values):
+                    return cls._categorical(values, sorted(unique_values))
+
+        if kind in _NUMPY_DTYPES:
+            fill = _PYTHON_TYPES[kind]()
+            try:
+                array = np.array(
+                    [fill if value is MISSING else value for value in values],
+                    dtype=_NUMPY_DTYPES[kind],
+                )
+            except OverflowError:
+                kind = OBJECT
+            else:
+                present = (
+                    np.fromiter(
+                        (value is not MISSING for value in values),
+                        dtype=bool,
+                        count=len(values),
+                    )
+                    if has_missing
+                    else None
+                )
+                return cls(kind, array, present)
+
+        return cls(OBJECT, object_array(values))
+
+    @classmethod
+    def from_array(
+        cls, values: np.ndarray, present: Optional[np.ndarray] = None
+    ) -> "Column":
+        """Wraps an array of values, arrays of other dtypes are converted.
+
+        Values where present is False are absent.
+        """
+        if present is not None and present.all():
+            present = None
+        for kind, dtype in _NUMPY_DTYPES.items():
+            if values.dtype == dtype:
+                return cls(kind, values, present)
+        values = values.astype(object)
+        if present is not None:
+            values[~present] = MISSING
+        return cls.from_values(values.tolist())
+
+    @classmethod
+    def missing(cls, size: int) -> "Column":
+        return cls(OBJECT, object_array([MISSING] * size))
+
+    @classmethod
+    def constant(cls, value: Any, size: int) -> "Column":
+        if type(value) is str:
+            return cls(CATEGORY, np.zeros(size, dtype=np.int32), categories=[value])
+        return cls.from_values([value] * size)
+
+    @classmethod
+    def concat(
+        cls,
+        chunks: List[Optional["Column"]],
+        sizes: List[int],
+        order: Optional[np.ndarray] = None,
+    ) -> "Column":
+        """Concatenates columns, None chunks are treated as missing values of given size.
+
+        With order the result is concat(chunks, sizes).take(order), built
+        without the intermediate concatenation.
+        """
+        kinds = {chunk.kind for chunk in chunks if chunk is not None}
+        kind = kinds.pop() if len(kinds) == 1 else OBJECT
+
+        if kind == CATEGORY:
+            categories = sorted(
+                set().union(*(chunk.categories for chunk in chunks if chunk is not None))
+            )
+            codes = {category: code for code, category in enumerate(categories)}
+            parts = []
+            for chunk, size in zip(chunks, sizes):
+                if chunk is None:
+                    parts.append(np.full(size, -1, dtype=np.int32))
+                else:
+                    # the trailing -1 keeps missing codes missing after remapping
+                    remap = np.array(
+                        [codes[category] for category in chunk.categories] + [-1],
+                        dtype=np.int32,
+                    )
+                    parts.append(remap[chunk.values])
+            return cls(CATEGORY, concatenate(parts, order), categories=categories)
+
+        if kind in _NUMPY_DTYPES:
+            values = concatenate(
+                [
+                    (
+                        chunk.values
+                        if chunk is not None
+                        else np.zeros(size, _NUMPY_DTYPES[kind])
+                    )
+                    for chunk, size in zip(chunks, sizes)
+                ],
+                order,
+            )
+            present = concatenate(
+                [
+                    chunk.is_present() if chunk is not None else np.zeros(size, bool)
+                    for chunk, size in zip(chunks, sizes)
+                ],
+                order,
+            )
+            return cls(kind, values, None if present.all() else present)
+
+        return cls(
+            OBJECT,
+            concatenate(
+                [
+                    (
+                        chunk.object_values()
+                        if chunk is not None
+                        else cls.missing(size).values
+                    )
+                    for chunk, size in zip(chunks, sizes)
+                ],
+                order,
+            ),
+        )
+
+    @classmethod
+    def _categorical(cls, values: List[Any], categories: List[str]) -> "Column":
+        codes = {category: code for code, category in enumerate(categories)}
+        array = np.fromiter(
+            (codes.get(value, -1) for value in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return cls(CATEGORY, array, categories=categories)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def compact(self) -> "Column":
+        """Dictionary-encodes an object column of low-cardinality strings.
+
+        Strings of columns that stay object are interned through a pool, so
+        equal values coming from different files share one object.
+        """
+        if self.kind != OBJECT:
+            return self
+        pool = {}
+        num_strings = 0
+        for row, value in enumerate(self.values):
+            if type(value) is str:
+                self.values[row] = pool.setdefault(value, value)
+                num_strings += 1
+        if (
+            num_strings
+            and num_strings == np.count_nonzero(self.values != MISSING)
+            and len(pool) <= CATEGORICAL_MAX_UNIQUE
+            and len(pool) * 2 <= num_strings
+        ):
+            return Column._categorical(self.values, sorted(pool))
+        return self
+
+    def take(self, rows: np.ndarray) -> "Column":
+        return Column(
+            self.kind,
+            self.values[rows],
+            self.present[rows] if self.present is not None else None,
+            list(self.categories) if self.categories is not None else None,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (
+            self.present.nbytes if self.present is not None else 0
+        )
+
+    def is_present(self) -> np.ndarray:
+        if self.kind == OBJECT:
+            return self.values != MISSING
+        if self.kind == CATEGORY:
+            return self.values >= 0
+        if self.present is None:
+            return np.ones(len(self.values), dtype=bool)
+        return self.present.copy()
+
+    def object_values(self) -> np.ndarray:
+        if self.kind == OBJECT:
+            return self.values
+        if self.kind == CATEGORY:
+            return object_array(self.categories + [MISSING])[self.values]
+        values = object_array(self.values.tolist())
+        if self.present is not None:
+            values[~self.present] = MISSING
+        return values
+
+    def combine_first(self, other: "Column") -> "Column":
+        """Takes values of this column and fills its gaps with values of the other one."""
+        present = self.is_present()
+        if present.all():
+            return self
+        if self.kind == other.kind and self.kind in _NUMPY_DTYPES:
+            values = np.where(present, self.values, other.values)
+            present |= other.is_present()
+            return Column(self.kind, values, None if present.all() else present)
+        return Column(
+            OBJECT, np.where(present, self.object_values(), other.object_values())
+        )
+
+    def get(self, row: int) -> Any:
+        if self.kind == OBJECT:
+            return self.values[row]
+        if self.kind == CATEGORY:
+            code = self.values[row]
+            return self.categories[code] if code >= 0 else MISSING
+        if self.present is not None and not self.present[row]:
+            return MISSING
+        return self.values[row].item()
+
+    def set(self, row: int, value: Any) -> None:
+        if value is MISSING:
+            self.delete(row)
+        elif self.kind == OBJECT:
+            self.values[row] = value
+        elif self.kind == CATEGORY and type(value) is str:
+            if value not in self.category_codes:
+                self.category_codes[value] = len(self.categories)
+                self.categories.append(value)
+            self.values[row] = self.category_codes[value]
+        elif type(value) is _PYTHON_TYPES.get(self.kind):
+            self.values[row] = value
+            if self.present is not None:
+                self.present[row] = True
+        else:
+            self.to_object()
+            self.values[row] = value
+
+    def set_rows(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Sets values[i] to rows[i], at once when the values have the column dtype."""
+        if self.kind in _NUMPY_DTYPES and values.dtype == _NUMPY_DTYPES[self.kind]:
+            self.values[rows] = values
+            if self.present is not None:
+                self.present[rows] = True
+            return
+        for row, value in zip(rows.tolist(), values.tolist()):
+            self.set(row, value)
+
+    def delete(self, row: int) -> None:
+        if self.kind == OBJECT:
+            self.values[row] = MISSING
+        elif self.kind == CATEGORY:
+            self.values[row] = -1
+        else:
+            if self.present is None:
+                self.present = np.ones(len(self.values), dtype=bool)
+            self.present[row] = False
+
+    def to_object(self) -> None:
+        if self.kind == OBJECT:
+            return
+        self.values = object_array([self.get(row) for row in range(len(self.values))])
+        self.kind = OBJECT
+        self.present = None
+        self.categories = None
+        self.category_codes = None
+
+    def to_series(self, rows: Optional[np.ndarray] = None) -> pd.Series:
+        """Returns the column (or its subset) as a pandas Series with a nullable dtype."""
+        values = self.values if rows is None else self.values[rows]
+        if self.kind == CATEGORY:
+            return pd.Series(
+                pd.Categorical.from_codes(values, categories=self.categories)
+            )
+        if self.kind == OBJECT:
+            return pd.Series(np.where(values == MISSING, None, values), dtype=object)
+        present = self.is_present() if rows is None else self.is_present()[rows]
+        return pd.Series(_NULLABLE_ARRAYS[self.kind](values, ~present))
+
+
+def columns_from_records(records: Iterable[Dict]) -> Dict[str, Column]:
+    values = {}
+    num_rows = 0
+    for record in records:
+        for key, value in record.items():
+            if key not in values:
+                key = sys.intern(key)
+                values[key] = [MISSING] * num_rows
+            values[key].append(value)
+        num_rows += 1
+        for key_values in values.values():
+            if len(key_values) < num_rows:
+                key_values.append(MISSING)
+    return {key: Column.from_values(key_values) for key, key_values in values.items()}
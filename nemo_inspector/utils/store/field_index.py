@@ -0,0 +1,118 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from nemo_inspector.settings.constants import INDEX_MAX_CARDINALITY
+from nemo_inspector.utils.store.column import (
+    BOOL,
+    CATEGORY,
+    INT,
+    MISSING,
+    OBJECT,
+    Column,
+)
+
+# values that compare equal exactly when their hashes and == match
+INDEXABLE_TYPES = (str, bool, int, type(None))
+
+
+class FieldIndex:
+    """Inverted index of a low-cardinality field: a bitmap of rows for every value.
+
+    Fields holding lists (e.g. labels) index the elements of the lists, so
+    the index answers membership of a value instead of equality.
+    """
+
+    def __init__(self, num_rows: int, elements: bool):
+        self.num_rows = num_rows
+        self.elements = elements
+        self.bitmaps: Dict[Any, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, column: Column) -> Optional["FieldIndex"]:
+        """Returns None if the field has too many distinct values or unsupported ones."""
+        present = column.is_present()
+        if column.kind == CATEGORY:
+            if len(column.categories) > INDEX_MAX_CARDINALITY:
+                return None
+            index = cls(len(column), elements=False)
+            for code, category in enumerate(column.categories):
+                index.bitmaps[category] = column.values == code
+            return index
+        if column.kind in (BOOL, INT):
+            values = np.unique(column.values[present])
+            if len(values) > INDEX_MAX_CARDINALITY:
+                return None
+            index = cls(len(column), elements=False)
+            for value in values.tolist():
+                index.bitmaps[value] = (column.values == value) & present
+            return index
+        if column.kind != OBJECT:
+            return None
+
+        values = column.values[present]
+        index = cls(len(column), elements=all(type(value) is list for value in values))
+        for row in np.flatnonzero(present):
+            if not index.add(int(row), column.values[row]):
+                return None
+        return index
+
+    def _keys(self, value: Any) -> Optional[Iterable]:
+        if value is MISSING:
+            return ()
+        if self.elements:
+            if type(value) is not list:
+                return None
+            values = value
+        else:
+            values = (value,)
+        if not all(type(item) in INDEXABLE_TYPES for item in values):
+            return None
+        return values
+
+    def add(self, row: int, value: Any) -> bool:
+        """Adds the row under its value, returns False if the value cannot be indexed."""
+        keys = self._keys(value)
+        if keys is None:
+            return False
+        for key in keys:
+            if key not in self.bitmaps:
+                if len(self.bitmaps) >= INDEX_MAX_CARDINALITY:
+                    return False
+                self.bitmaps[key] = np.zeros(self.num_rows, dtype=bool)
+            self.bitmaps[key][row] = True
+        return True
+
+    def update(self, row: int, old_value: Any, new_value: Any) -> bool:
+        """Moves the row to its new value, returns False if the index became invalid."""
+        for key in self._keys(old_value) or ():
+            if key in self.bitmaps:
+                self.bitmaps[key][row] = False
+        return self.add(row, new_value)
+
+    def lookup(self, values: Iterable) -> Optional[np.ndarray]:
+        """Returns rows equal to (or containing for list fields) any of the values.
+
+        Returns None if some value is not indexable, so it cannot be answered.
+        """
+        rows = np.zeros(self.num_rows, dtype=bool)
+        for value in values:
+            if type(value) not in INDEXABLE_TYPES:
+                return None
+            if value in self.bitmaps:
+                rows |= self.bitmaps[value]
+        return rows
@@ -0,0 +1,743 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+from collections.abc import MutableMapping
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from nemo_inspector.settings.constants import FILE_NAME, LABEL
+from nemo_inspector.utils.store.column import DELETED, LAZY, MISSING, OBJECT, Column
+from nemo_inspector.utils.store.field_index import FieldIndex
+from nemo_inspector.utils.store.jsonl_reader import (
+    forget_records,
+    get_file_stat,
+    open_jsonl,
+    read_record,
+    read_records,
+)
+
+
+class SourceChangedError(RuntimeError):
+    """A prediction file changed after it was loaded, its lines cannot be read by offset."""
+
+
+def check_source_stat(
+    path: str, loaded_stat: Optional[Tuple[int, int]], follows_source: bool
+) -> None:
+    """Raises SourceChangedError if the file changed since its lines were indexed."""
+    if loaded_stat is None:
+        return
+    try:
+        stat = get_file_stat(path)
+    except OSError:
+        stat = None
+    if stat is None or (
+        stat[0] < loaded_stat[0] if follows_source else stat != loaded_stat
+    ):
+        forget_records(path)
+        raise SourceChangedError(
+            f"{path} changed after it was loaded, load the data again to see it"
+        )
+
+
+class SourceReader:
+    """Reads lines of the store rows, every prediction file is opened once per reader.
+
+    It reads rows of a StoredRows snapshot the same way.
+    """
+
+    def __init__(self, store: Union["GenerationStore", "StoredRows"]):
+        self.store = store
+        self.files: Dict[int, IO] = {}
+
+    def read(self, row: int) -> Dict:
+        source_id = int(self.store.source_ids[row])
+        if source_id < 0:
+            return {}
+        if source_id not in self.files:
+            self.store.check_source(source_id)
+            self.files[source_id] = open_jsonl(self.store.sources[source_id])
+        file = self.files[source_id]
+        file.seek(int(self.store.offsets[row]))
+        return json.loads(file.readline())
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+    def __del__(self):
+        self.close()
+
+
+class LazyRecord(MutableMapping):
+    """Record of a store row whose long texts are read only when one of them is accessed.
+
+    User code gets these instead of dicts, so code that reads only light fields
+    never touches the prediction files. Copies and pickles are plain dicts.
+    """
+
+    def __init__(
+        self,
+        values: Dict,
+        row: int,
+        reader: SourceReader,
+        original: Optional[Dict] = None,
+    ):
+        # LAZY values are replaced by the texts of the source line on first access
+        self.values = values
+        self.row = row
+        self.reader = reader
+        # copy of the values that changes() compares to, only if it was requested
+        self.original = original
+        self.source: Optional[Dict] = None
+
+    def _read(self) -> Dict:
+        if self.source is None:
+            self.source = self.reader.read(self.row)
+        return self.source
+
+    def changes(self, new_record: Dict) -> Tuple[Dict, List[str]]:
+        """Returns fields of new_record that differ from the original record and removed keys.
+
+        new_record is usually this record changed in place or a dict built
+        from it. Long texts that were never read are unchanged by definition.
+        """
+        values = self.values if new_record is self else new_record
+        changed = {}
+        for key, value in values.items():
+            if value is LAZY:
+                continue
+            old_value = self.original.get(key, MISSING)
+            if old_value is LAZY:
+                old_value = self._read().get(key)
+            if (
+                old_value is MISSING
+                or type(old_value) is not type(value)
+                or old_value != value
+            ):
+                changed[key] = value
+        return changed, [key for key in self.original if key not in values]
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.values[key]
+        if value is LAZY:
+            value = self.values[key] = self._read().get(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.values
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class StoredRows:
+    """Records of some store rows that can be sent to worker processes.
+
+    Row i of the snapshot is rows[i] of the store. Long texts stay LAZY and
+    are read from the prediction files by the process that accesses them,
+    after the same check that the files did not change.
+    """
+
+    def __init__(self, store: "GenerationStore", rows: np.ndarray):
+        self.records = [store.raw_record(row) for row in rows.tolist()]
+        self.source_ids = store.source_ids[rows]
+        self.offsets = store.offsets[rows]
+        self.sources = store.sources
+        self.source_stats = store.source_stats
+        self.follows_sources = store.follows_sources
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def check_source(self, source_id: int) -> None:
+        check_source_stat(
+            self.sources[source_id], self.source_stats[source_id], self.follows_sources
+        )
+
+    def lazy_records(
+        self, rows: Iterable[int], reader: Optional[SourceReader] = None
+    ) -> List[LazyRecord]:
+        """Returns records of the snapshot rows like GenerationStore.lazy_records."""
+        reader = reader if reader is not None else SourceReader(self)
+        return [
+            LazyRecord(dict(self.records[row]), row, reader)
+            for row in np.fromiter(rows, dtype=np.int64).tolist()
+        ]
+
+    def copy(self) -> Dict:
+        return dict(self)
+
+
+class GenerationStore:
+    """Columnar storage for all loaded generations.
+
+    Every JSON field is kept in its own typed column. Rows are ordered by
+    (question, model, file) so that the records of one question/model pair
+    occupy a contiguous range of row ids. For every row the store remembers
+    the source file and the byte offset of its line, so long texts marked as
+    LAZY are read from disk only when a record is materialized or, for
+    lazy_records, when user code reads them. Size and mtime of every source
+    are checked before its lines are read.
+
+    Fields shared by all answers to a question (the input file rows) are kept
+    once per question in question_columns and are seen through every row
+    that does not have its own value of the field. Fields with defaults
+    (e.g. empty labels) are not stored at all until a row gets its own value.
+    Stats derived from the answers of a question/model group are kept once
+    per group in group_columns and are joined to the rows of the group when
+    they are read.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        questions: np.ndarray,
+        model_codes: np.ndarray,
+        columns: Dict[str, Column],
+        sources: List[str] = (),
+        source_ids: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        question_columns: Optional[Dict[str, Column]] = None,
+        keys: Optional[List[str]] = None,
+        defaults: Optional[Dict[str, Callable[[], Any]]] = None,
+        source_stats: Optional[List[Optional[Tuple[int, int]]]] = None,
+    ):
+        self.models = list(models)
+        self.model_ids = {model: code for code, model in enumerate(self.models)}
+        self.questions = questions
+        self.model_codes = model_codes
+        self.columns = columns
+        self.question_columns = question_columns or {}
+        # every call creates a new value, so rows never share a mutable default
+        self.defaults = defaults or {}
+        # order of fields in materialized records
+        self.key_order = dict.fromkeys(
+            keys
+            if keys is not None
+            else [*self.columns, *self.question_columns, *self.defaults]
+        )
+        self.sources = list(sources)
+        # size and mtime of every source when its lines were indexed, None if unknown
+        self.source_stats = (
+            list(source_stats) if source_stats is not None else [None] * len(self.sources)
+        )
+        # followed sources grow while they are written, only files that became
+        # shorter are reported, rewrites are reloaded by the follower
+        self.follows_sources = False
+        self.source_ids = (
+            source_ids
+            if source_ids is not None
+            else np.full(len(questions), -1, dtype=np.int32)
+        )
+        self.offsets = (
+            offsets if offsets is not None else np.zeros(len(questions), dtype=np.int64)
+        )
+        self.num_questions = int(questions.max()) + 1 if len(questions) else 0
+        # indexed by group id, see group_ids
+        self.group_columns: Dict[str, Column] = {}
+        # changes whenever rows or their fields are edited, writes of derived
+        # values (set_group_values, set_group_column) keep it
+        self.version = 0
+        # inverted indexes built on first use, None for fields that cannot be indexed
+        self.indexes: Dict[str, Optional[FieldIndex]] = {}
+        self._build_groups()
+
+    def _build_groups(self) -> None:
+        # id of the question/model group of every row
+        self.group_ids = self.questions.astype(np.int64) * len(self.models)
+        self.group_ids += self.model_codes
+        self.group_starts = np.searchsorted(
+            self.group_ids, np.arange(self.num_groups + 1)
+        )
+
+    @property
+    def num_groups(self) -> int:
+        return self.num_questions * len(self.models)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self.key_order)
+
+    @property
+    def index(self) -> pd.MultiIndex:
+        return pd.MultiIndex.from_arrays(
+            [
+                self.questions,
+                pd.Categorical.from_codes(self.model_codes, categories=self.models),
+                self.columns[FILE_NAME].to_series(),
+            ],
+            names=["question", "model", FILE_NAME],
+        )
+
+    def group_rows(self, question: int, model: str) -> np.ndarray:
+        if model not in self.model_ids or not 0 <= question < self.num_questions:
+            return np.arange(0)
+        group = question * len(self.models) + self.model_ids[model]
+        return np.arange(self.group_starts[group], self.group_starts[group + 1])
+
+    def question_models(self, question: int) -> List[str]:
+        starts = self.group_starts[
+            question * len(self.models) : (question + 1) * len(self.models) + 1
+        ]
+        return [
+            model
+            for model, start, end in zip(self.models, starts[:-1], starts[1:])
+            if end > start
+        ]
+
+    def check_source(self, source_id: int) -> None:
+        """Raises SourceChangedError if the file changed since its lines were indexed."""
+        check_source_stat(
+            self.sources[source_id], self.source_stats[source_id], self.follows_sources
+        )
+
+    def set_source_stat(self, source_id: int) -> None:
+        """Remembers the current size and mtime of a source whose lines were indexed again."""
+        forget_records(self.sources[source_id])
+        self.source_stats[source_id] = get_file_stat(self.sources[source_id])
+
+    def source_record(self, row: int) -> Dict:
+        """Reads the original line of the row from its prediction file."""
+        if self.source_ids[row] < 0:
+            return {}
+        self.check_source(int(self.source_ids[row]))
+        return read_record(self.sources[self.source_ids[row]], int(self.offsets[row]))
+
+    def source_records(self, rows: np.ndarray) -> List[Dict]:
+        """Reads original lines of the rows, every file once and in offset order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        records = [{} for _ in range(len(rows))]
+        source_ids = self.source_ids[rows]
+        for source_id in np.unique(source_ids[source_ids >= 0]).tolist():
+            self.check_source(source_id)
+            indexes = np.flatnonzero(source_ids == source_id)
+            source_records = read_records(
+                self.sources[source_id], self.offsets[rows[indexes]]
+            )
+            for index, record in zip(indexes.tolist(), source_records):
+                records[index] = record
+        return records
+
+    def raw_value(self, row: int, key: str) -> Any:
+        """Returns the value of the field as stored, LAZY values are not read."""
+        if key in self.group_columns:
+            value = self.group_columns[key].get(self.group_ids[row])
+            if value is not MISSING:
+                return value
+        value = self.columns[key].get(row) if key in self.columns else MISSING
+        if value is MISSING and key in self.question_columns:
+            question_column = self.question_columns[key]
+            question = self.questions[row]
+            if question < len(question_column):
+                value = question_column.get(question)
+        if value is MISSING and key in self.defaults:
+            return self.defaults[key]()
+        return MISSING if value is DELETED else value
+
+    def get_value(self, row: int, key: str, default: Any = None) -> Any:
+        value = self.raw_value(row, key)
+        if value is LAZY:
+            value = self.source_record(row).get(key, MISSING)
+        return default if value is MISSING else value
+
+    def raw_record(self, row: int, keys: Optional[Iterable[str]] = None) -> Dict:
+        """Returns the record with LAZY markers in place of the long texts."""
+        record = {}
+        for key in self.key_order if keys is None else keys:
+            value = self.raw_value(row, key)
+            if value is not MISSING:
+                record[key] = value
+        return record
+
+    def record(self, row: int, keys: Optional[Iterable[str]] = None) -> Dict:
+        record = self.raw_record(row, keys)
+        lazy_keys = [key for key, value in record.items() if value is LAZY]
+        if lazy_keys:
+            source_record = self.source_record(row)
+            for key in lazy_keys:
+                record[key] = source_record.get(key)
+        return record
+
+    def records(
+        self, rows: Iterable[int], keys: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
+        """Returns full records, long texts of all rows are read in one pass per file."""
+        rows = np.fromiter(rows, dtype=np.int64)
+        records = [self.raw_record(row, keys) for row in rows.tolist()]
+        lazy_ids = [
+            index
+            for index, record in enumerate(records)
+            if any(value is LAZY for value in record.values())
+        ]
+        for index, source_record in zip(lazy_ids, self.source_records(rows[lazy_ids])):
+            record = records[index]
+            for key, value in record.items():
+                if value is LAZY:
+                    record[key] = source_record.get(key)
+        return records
+
+    def lazy_records(
+        self,
+        rows: Iterable[int],
+        with_original: bool = False,
+        reader: Optional[SourceReader] = None,
+    ) -> List[LazyRecord]:
+        """Returns records for user code, long texts are read when the code accesses them.
+
+        with_original keeps a copy of the light values, so LazyRecord.changes
+        can tell what the code changed. Records of several calls share the
+        files opened by the given reader.
+        """
+        reader = reader if reader is not None else SourceReader(self)
+        records = []
+        for row in np.fromiter(rows, dtype=np.int64).tolist():
+            values = self.raw_record(row)
+            original = (
+                {
+                    key: value if value is LAZY else copy.deepcopy(value)
+                    for key, value in values.items()
+                }
+                if with_original
+                else None
+            )
+            records.append(LazyRecord(values, row, reader, original))
+        return records
+
+    def _get_column(self, key: str) -> Column:
+        if key not in self.columns:
+            self.columns[key] = Column.missing(len(self))
+            self.key_order[key] = None
+        return self.columns[key]
+
+    def get_index(self, key: str) -> Optional[FieldIndex]:
+        """Returns the inverted index of the field, None if it has too many values."""
+        if key not in self.indexes:
+            self.indexes[key] = (
+                FieldIndex.build(self.full_column(key)) if key in self.key_order else None
+            )
+        return self.indexes[key]
+
+    def _update_index(self, row: int, key: str, old_value: Any) -> None:
+        index = self.indexes.pop(key, None)
+        # an index that cannot hold the new value is built again on next use
+        if index is not None and index.update(row, old_value, self.raw_value(row, key)):
+            self.indexes[key] = index
+
+    def set_value(self, row: int, key: str, value: Any) -> None:
+        self._set_value(row, key, value)
+        self.version += 1
+
+    def _set_value(self, row: int, key: str, value: Any) -> None:
+        old_value = self.raw_value(row, key) if key in self.indexes else MISSING
+        self._get_column(key).set(row, value)
+        if key in self.indexes:
+            self._update_index(row, key, old_value)
+
+    def set_group_values(self, groups: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        """Writes values derived from the answers (e.g. metrics) of the groups.
+
+        values[key][i] is the value of groups[i], every row of the group sees it.
+        """
+        for key, array in values.items():
+            if key not in self.group_columns:
+                self.set_group_column(key, Column.missing(self.num_groups))
+            self.indexes.pop(key, None)
+            self.group_columns[key].set_rows(groups, array)
+
+    def set_group_column(self, key: str, column: Column) -> None:
+        """Sets a value of the field to every group, column is indexed by group id."""
+        self.indexes.pop(key, None)
+        self.group_columns[key] = column
+        self.key_order[key] = None
+
+    def delete_value(self, row: int, key: str) -> None:
+        if self._delete_value(row, key):
+            self.version += 1
+
+    def _delete_value(self, row: int, key: str) -> bool:
+        if key in self.question_columns:
+            self._set_value(row, key, DELETED)
+        elif key in self.columns:
+            old_value = self.raw_value(row, key)
+            self.columns[key].delete(row)
+            if key in self.indexes:
+                self._update_index(row, key, old_value)
+        else:
+            return False
+        return True
+
+    def update_records(
+        self, rows: Iterable[int], changes: Iterable[Tuple[Dict, List[str]]]
+    ) -> None:
+        """Applies (changed fields, removed keys) of every row, see LazyRecord.changes.
+
+        Fields that did not change, long texts among them, stay as they are
+        and the version changes once for all rows.
+        """
+        for row, (changed, removed) in zip(rows, changes):
+            # stats of the group are derived from its answers, they are not edited
+            for key, value in changed.items():
+                if key not in self.group_columns:
+                    self._set_value(row, key, value)
+            for key in removed:
+                if key not in self.group_columns:
+                    self._delete_value(row, key)
+        self.version += 1
+
+    def add_label(self, row: int, label: str) -> None:
+        labels = self.get_value(row, LABEL, [])
+        if label not in labels:
+            self.set_value(row, LABEL, labels + [label])
+
+    def remove_label(self, row: int, label: str) -> None:
+        labels = self.get_value(row, LABEL, [])
+        if label in labels:
+            self.set_value(row, LABEL, [value for value in labels if value != label])
+
+    def extend(
+        self, new_rows: "GenerationStore", removed: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Merges rows of another store (with the same models and sources) into this one.
+
+        Rows where removed is True are dropped. Returns the previous id of every
+        row in the new row order, rows that came from new_rows get -1.
+        """
+        kept = np.flatnonzero(~removed) if removed is not None else np.arange(len(self))
+        sizes = [len(kept), len(new_rows)]
+        questions = np.concatenate([self.questions[kept], new_rows.questions])
+        model_codes = np.concatenate([self.model_codes[kept], new_rows.model_codes])
+        order = np.lexsort((np.arange(len(questions)), model_codes, questions))
+
+        self.columns = {
+            key: Column.concat(
+                [
+                    self.columns[key].take(kept) if key in self.columns else None,
+                    new_rows.columns.get(key),
+                ],
+                sizes,
+            )
+            .compact()
+            .take(order)
+            for key in dict.fromkeys([*self.columns, *new_rows.columns])
+        }
+        self.key_order.update(dict.fromkeys(new_rows.columns))
+        self.source_ids = np.concatenate([self.source_ids[kept], new_rows.source_ids])[
+            order
+        ]
+        self.offsets = np.concatenate([self.offsets[kept], new_rows.offsets])[order]
+        self.questions = questions[order]
+        self.model_codes = model_codes[order]
+        self.num_questions = int(self.questions.max()) + 1 if len(self.questions) else 0
+        self.version += 1
+        self.indexes = {}
+        self._build_groups()
+        for key, column in self.group_columns.items():
+            # group ids do not change, groups of new questions have no stats yet
+            if len(column) < self.num_groups:
+                self.group_columns[key] = Column.concat(
+                    [column, None], [len(column), self.num_groups - len(column)]
+                )
+        return np.concatenate([kept, np.full(len(new_rows), -1)])[order]
+
+    def find_row(self, rows: Iterable[int], file_name: str) -> Optional[int]:
+        for row in rows:
+            if self.get_value(row, FILE_NAME) == file_name:
+                return row
+        return None
+
+    def full_column(self, key: str) -> Column:
+        """Returns a column with a value for every row, question fields included."""
+        column = self.columns.get(key)
+        if key in self.question_columns:
+            question_column = self.question_columns[key]
+            known = self.questions < len(question_column)
+            shared = Column.concat(
+                [question_column, None], [len(question_column), 1]
+            ).take(np.where(known, self.questions, len(question_column)))
+            column = shared if column is None else column.combine_first(shared)
+        if column is None:
+            column = Column.missing(len(self))
+        if key in self.group_columns:
+            column = self.group_columns[key].take(self.group_ids).combine_first(column)
+        if column.kind == OBJECT and (column.values == DELETED).any():
+            column = Column(
+                OBJECT, np.where(column.values == DELETED, MISSING, column.values)
+            )
+        if key in self.defaults and not column.is_present().all():
+            values = column.object_values().copy()
+            for row in np.flatnonzero(values == MISSING):
+                values[row] = self.defaults[key]()
+            column = Column(OBJECT, values)
+        return column
+
+    def column_values(self, key: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns values of the field (for given rows only if set) as an object array.
+
+        LAZY values are read from disk.
+        """
+        column = self.full_column(key)
+        rows = np.arange(len(self)) if rows is None else rows
+        values = column.take(rows).object_values().copy()
+        lazy_ids = np.flatnonzero(values == LAZY)
+        for lazy_id, source_record in zip(
+            lazy_ids.tolist(), self.source_records(rows[lazy_ids])
+        ):
+            values[lazy_id] = source_record.get(key)
+        return values
+
+    def to_frame(self, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        keys = self.keys if keys is None else keys
+        series = {}
+        for key in filter(lambda key: key in self.key_order, keys):
+            column = self.full_column(key)
+            if column.kind == OBJECT:
+                values = self.column_values(key)
+                series[key] = pd.Series(np.where(values == MISSING, None, values))
+            else:
+                series[key] = column.to_series()
+        frame = pd.DataFrame(series)
+        frame.index = self.index
+        return frame
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.questions.nbytes
+            + self.model_codes.nbytes
+            + sum(column.nbytes for column in self.columns.values())
+            + sum(column.nbytes for column in self.question_columns.values())
+            + sum(column.nbytes for column in self.group_columns.values())
+        )
+
+
+class GenerationStoreBuilder:
+    """Collects columnar chunks of records and builds a GenerationStore from them."""
+
+    def __init__(
+        self,
+        models: List[str],
+        sources: List[str] = (),
+        question_columns: Optional[Dict[str, Column]] = None,
+        keys: Iterable[str] = (),
+        defaults: Optional[Dict[str, Callable[[], Any]]] = None,
+        source_stats: Optional[List[Optional[Tuple[int, int]]]] = None,
+    ):
+        self.models = list(models)
+        self.model_ids = {model: code for code, model in enumerate(self.models)}
+        self.sources = list(sources)
+        self.source_stats = source_stats
+        self.question_columns = question_columns or {}
+        self.defaults = defaults or {}
+        self.chunks = []
+        # dict keeps the first-seen order of fields, keys fixes the leading ones
+        self.keys = dict.fromkeys(keys)
+
+    def add_chunk(
+        self,
+        model: str,
+        questions: np.ndarray,
+        columns: Dict[str, Column],
+        source_id: int = -1,
+        offsets: Optional[np.ndarray] = None,
+    ) -> None:
+        """Adds rows of one model, i-th value of every column belongs to questions[i]."""
+        num_rows = len(questions)
+        self.chunks.append(
+            (
+                np.asarray(questions, dtype=np.int32),
+                np.full(num_rows, self.model_ids[model], dtype=np.int16),
+                np.full(num_rows, source_id, dtype=np.int32),
+                (
+                    np.asarray(offsets, dtype=np.int64)
+                    if offsets is not None
+                    else np.zeros(num_rows, dtype=np.int64)
+                ),
+                columns,
+            )
+        )
+        self.keys.update(dict.fromkeys(columns))
+
+    def build(self) -> GenerationStore:
+        if not self.chunks:
+            return GenerationStore(
+                self.models,
+                np.zeros(0, dtype=np.int32),
+                np.zeros(0, dtype=np.int16),
+                {},
+                sources=self.sources,
+                question_columns=self.question_columns,
+                defaults=self.defaults,
+                source_stats=self.source_stats,
+            )
+        questions, model_codes, source_ids, offsets, columns = zip(*self.chunks)
+        sizes = [len(chunk_questions) for chunk_questions in questions]
+        questions = np.concatenate(questions)
+        model_codes = np.concatenate(model_codes)
+        order = np.lexsort((np.arange(len(questions)), model_codes, questions))
+        return GenerationStore(
+            models=self.models,
+            questions=questions[order],
+            model_codes=model_codes[order],
+            # buffers of the chunks (memory-mapped for loaded files) are copied once,
+            # straight into the row order of the store
+            columns={
+                key: Column.concat(
+                    [chunk_columns.get(key) for chunk_columns in columns], sizes, order
+                ).compact()
+                for key in self.keys
+                if any(key in chunk_columns for chunk_columns in columns)
+            },
+            sources=self.sources,
+            source_ids=np.concatenate(source_ids)[order],
+            offsets=np.concatenate(offsets)[order],
+            question_columns=self.question_columns,
+            keys=[*self.keys, *self.question_columns, *self.defaults],
+            defaults=self.defaults,
+            source_stats=self.source_stats,
+        )
@@ -0,0 +1,192 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import json
+import lzma
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Dict, List, Tuple
+
+import numpy as np
+
+from nemo_inspector.settings.constants import EAGER_FIELDS, LAZY_FIELD_MIN_LENGTH
+from nemo_inspector.utils.store.column import LAZY, Column, columns_from_records
+
+OFFSETS_CHUNK_SIZE = 1 << 26
+COMPRESSED_EXTENSIONS = (".gz", ".xz", ".zst")
+# lines read one by one (e.g. of the displayed records) kept for repeated reads
+RECORD_CACHE_SIZE = 64
+
+record_cache: OrderedDict = OrderedDict()
+record_cache_lock = threading.Lock()
+
+
+@dataclass
+class ParsedFile:
+    """Light fields of a prediction file in columnar form, aligned with line offsets."""
+
+    offsets: np.ndarray
+    columns: Dict[str, Column]
+    # position right after the last consumed line
+    end: int = 0
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.offsets)
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(COMPRESSED_EXTENSIONS)
+
+
+def open_jsonl(path: str, mode: str = "rb") -> IO:
+    """Opens a plain or compressed JSONL file, the compression is chosen by extension."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".xz"):
+        return lzma.open(path, mode)
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstandard package is required to read .zst files"
+            ) from None
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def build_line_offsets(path: str, start: int = 0) -> np.ndarray:
+    """Returns byte offsets of the beginning of every line in the file after start."""
+    size = os.path.getsize(path)
+    if size <= start:
+        return np.zeros(0, dtype=np.int64)
+    data = np.memmap(path, dtype=np.uint8, mode="r", shape=(size,))
+    offsets = [np.full(1, start, dtype=np.int64)]
+    for chunk_start in range(start, size, OFFSETS_CHUNK_SIZE):
+        chunk = data[chunk_start : chunk_start + OFFSETS_CHUNK_SIZE]
+        offsets.append(
+            np.flatnonzero(chunk == ord("\n")).astype(np.int64) + chunk_start + 1
+        )
+    offsets = np.concatenate(offsets)
+    return offsets[offsets < size]
+
+
+def split_light_fields(answer: Dict) -> Dict:
+    """Replaces long text values with LAZY markers, they are read again on demand."""
+    return {
+        key: (
+            LAZY
+            if isinstance(value, str)
+            and len(value) >= LAZY_FIELD_MIN_LENGTH
+            and key not in EAGER_FIELDS
+            else value
+        )
+        for key, value in answer.items()
+    }
+
+
+def read_prediction_file(path: str, start: int = 0) -> ParsedFile:
+    """Indexes a JSONL file and parses the light part of every non-empty line after start.
+
+    An unterminated last line that is not valid JSON yet (the file is still
+    being written) is not consumed.
+    """
+    if is_compressed(path):
+        return read_compressed_prediction_file(path)
+    offsets = build_line_offsets(path, start)
+    answers = []
+    keep = np.zeros(len(offsets), dtype=bool)
+    end = start
+    with open(path, "rb") as file:
+        file.seek(start)
+        for line_id, line in zip(range(len(offsets)), file):
+            if line.strip():
+                try:
+                    answer = json.loads(line)
+                except json.JSONDecodeError:
+                    if line.endswith(b"\n"):
+                        raise
+                    break
+                keep[line_id] = True
+                answers.append(split_light_fields(answer))
+            end += len(line)
+    return ParsedFile(
+        offsets=offsets[keep], columns=columns_from_records(answers), end=end
+    )
+
+
+def read_compressed_prediction_file(path: str) -> ParsedFile:
+    """Parses a compressed JSONL file while decompressing it as a stream.
+
+    Lines of compressed files cannot be read back by offset cheaply, so all
+    fields are parsed eagerly and offsets point into the decompressed data.
+    """
+    offsets = []
+    answers = []
+    position = 0
+    with open_jsonl(path) as file:
+        for line in file:
+            if line.strip():
+                offsets.append(position)
+                answers.append(json.loads(line))
+            position += len(line)
+    return ParsedFile(
+        offsets=np.array(offsets, dtype=np.int64),
+        columns=columns_from_records(answers),
+        end=os.path.getsize(path),
+    )
+
+
+def get_file_stat(path: str) -> Tuple[int, int]:
+    """Returns size and modification time of the file, a rewrite changes them."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_record(path: str, offset: int) -> Dict:
+    """Reads the line at the offset, the returned dict is shared and must not be changed."""
+    key = (path, offset)
+    with record_cache_lock:
+        if key in record_cache:
+            record_cache.move_to_end(key)
+            return record_cache[key]
+    with open_jsonl(path) as file:
+        file.seek(offset)
+        record = json.loads(file.readline())
+    with record_cache_lock:
+        record_cache[key] = record
+        while len(record_cache) > RECORD_CACHE_SIZE:
+            record_cache.popitem(last=False)
+    return record
+
+
+def read_records(path: str, offsets: np.ndarray) -> List[Dict]:
+    """Reads the lines at the offsets through one open file, in offset order."""
+    records = [None] * len(offsets)
+    with open_jsonl(path) as file:
+        for index in np.argsort(offsets, kind="stable").tolist():
+            file.seek(int(offsets[index]))
+            records[index] = json.loads(file.readline())
+    return records
+
+
+def forget_records(path: str) -> None:
+    """Drops cached lines of a file that changed."""
+    with record_cache_lock:
+        for key in [key for key in record_cache if key[0] == path]:
+            del record_cache[key]
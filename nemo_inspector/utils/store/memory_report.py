@@ -0,0 +1,111 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Set
+
+import numpy as np
+
+from nemo_inspector.utils.store.column import LAZY, MISSING, OBJECT, Column
+from nemo_inspector.utils.store.generation_store import GenerationStore
+
+REPORT_SAMPLE_SIZE = 2000
+
+
+def deep_sizeof(value: Any, seen: Set[int]) -> int:
+    """Returns the size of the value and of everything it references, counted once."""
+    if id(value) in seen or value is MISSING or value is LAZY:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(
+            deep_sizeof(key, seen) + deep_sizeof(item, seen)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+@dataclass
+class MemoryReport:
+    """Memory used by the store compared to keeping every row as a separate dict."""
+
+    num_rows: int
+    store_bytes: int
+    records_bytes: int
+    columns: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.records_bytes - self.store_bytes
+
+    def __str__(self) -> str:
+        megabyte = 1 << 20
+        return (
+            f"{self.num_rows} rows: {self.store_bytes / megabyte:.1f} MB in the store, "
+            f"~{self.records_bytes / megabyte:.1f} MB as separate records, "
+            f"~{self.saved_bytes / megabyte:.1f} MB saved"
+        )
+
+
+def column_bytes(column: Column, rows: np.ndarray, scale: float) -> int:
+    if column.kind != OBJECT:
+        return column.nbytes + sum(map(sys.getsizeof, column.categories or []))
+    seen = set()
+    return column.values.nbytes + int(
+        sum(deep_sizeof(column.values[row], seen) for row in rows) * scale
+    )
+
+
+def get_memory_report(
+    store: GenerationStore, sample_size: int = REPORT_SAMPLE_SIZE
+) -> MemoryReport:
+    """Estimates memory of the store and of the equivalent list of dicts on a sample of rows.
+
+    Long texts that stay on disk are not counted on either side.
+    """
+    rng = np.random.default_rng(0)
+    rows = (
+        np.arange(len(store))
+        if len(store) <= sample_size
+        else np.sort(rng.choice(len(store), sample_size, replace=False))
+    )
+    scale = len(store) / len(rows) if len(rows) else 0
+    columns = {**store.question_columns, **store.columns, **store.group_columns}
+
+    store_bytes = sum(
+        array.nbytes
+        for array in (store.questions, store.model_codes, store.source_ids, store.offsets)
+    )
+    for column in [*store.question_columns.values(), *store.group_columns.values()]:
+        store_bytes += column_bytes(column, np.arange(len(column)), 1)
+    for column in store.columns.values():
+        store_bytes += column_bytes(column, rows, scale)
+
+    # a separately parsed record owns its keys and values
+    records_bytes = 0
+    for row in rows:
+        record = {key: store.raw_value(row, key) for key in store.keys}
+        records_bytes += deep_sizeof(
+            {key: value for key, value in record.items() if value is not MISSING}, set()
+        )
+    return MemoryReport(
+        num_rows=len(store),
+        store_bytes=store_bytes,
+        records_bytes=int(records_bytes * scale),
+        columns={key: column.kind for key, column in columns.items()},
+    )
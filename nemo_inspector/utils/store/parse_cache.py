@@ -0,0 +1,206 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import stat
+from typing import Iterable, Optional
+
+import numpy as np
+
+from nemo_inspector.utils.store.column import OBJECT, Column
+from nemo_inspector.utils.store.jsonl_reader import ParsedFile, read_prediction_file
+
+# bump when the layout of ParsedFile or Column changes
+CACHE_FORMAT_VERSION = 3
+META_FILE = "meta.pkl"
+OFFSETS_FILE = "offsets.npy"
+
+
+def get_cache_path(cache_dir: str, path: str) -> str:
+    """Returns the cache entry of the file, it changes whenever size or mtime change."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    path_key = hashlib.sha1(path.encode()).hexdigest()[:16]
+    version_key = hashlib.sha1(
+        f"{CACHE_FORMAT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{path_key}-{version_key}")
+
+
+def save_parsed_file(entry_path: str, parsed_file: ParsedFile) -> None:
+    """Writes buffers of typed columns as .npy files, only object columns are pickled."""
+    os.makedirs(entry_path, mode=0o700)
+    np.save(os.path.join(entry_path, OFFSETS_FILE), parsed_file.offsets)
+    meta = []
+    for column_id, (key, column) in enumerate(parsed_file.columns.items()):
+        if column.kind == OBJECT:
+            meta.append((key, column.kind, None, column.values, False))
+            continue
+        np.save(os.path.join(entry_path, f"{column_id}.values.npy"), column.values)
+        if column.present is not None:
+            np.save(os.path.join(entry_path, f"{column_id}.present.npy"), column.present)
+        meta.append(
+            (key, column.kind, column.categories, None, column.present is not None)
+        )
+    meta_path = os.path.join(entry_path, META_FILE)
+    with open(
+        os.open(meta_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb"
+    ) as file:
+        pickle.dump((parsed_file.end, meta), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def is_private(path: str) -> bool:
+    """Whether the file belongs to the current user and nobody else can change it."""
+    if not hasattr(os, "getuid"):  # ownership is not checked on Windows
+        return True
+    path_stat = os.stat(path)
+    return path_stat.st_uid == os.getuid() and not path_stat.st_mode & (
+        stat.S_IWGRP | stat.S_IWOTH
+    )
+
+
+def load_parsed_file(entry_path: str) -> ParsedFile:
+    """Maps the saved buffers copy-on-write instead of reading them into memory.
+
+    Pages are read when the buffers are used, GenerationStoreBuilder copies
+    them into the store once. The metadata is unpickled only from entries that other users cannot
+    have written. Loading marks the entry as used for sweep_cache.
+    """
+
+    def load_array(name: str) -> np.ndarray:
+        return np.load(os.path.join(entry_path, name), mmap_mode="c")
+
+    meta_path = os.path.join(entry_path, META_FILE)
+    if not (is_private(entry_path) and is_private(meta_path)):
+        raise PermissionError(
+            f"{entry_path} is not private to the current user, it is not loaded"
+        )
+    with open(meta_path, "rb") as file:
+        end, meta = pickle.load(file)
+    os.utime(meta_path)
+    columns = {}
+    for column_id, (key, kind, categories, values, has_present) in enumerate(meta):
+        if kind == OBJECT:
+            columns[key] = Column(OBJECT, values)
+        else:
+            columns[key] = Column(
+                kind,
+                load_array(f"{column_id}.values.npy"),
+                load_array(f"{column_id}.present.npy") if has_present else None,
+                categories,
+            )
+    return ParsedFile(offsets=load_array(OFFSETS_FILE), columns=columns, end=end)
+
+
+def remove_entry(entry_path: str) -> None:
+    if os.path.isdir(entry_path):
+        shutil.rmtree(entry_path, ignore_errors=True)
+    elif os.path.exists(entry_path):
+        os.remove(entry_path)
+
+
+def store_cached_file(entry_path: str, parsed_file: ParsedFile) -> None:
+    # entries of previous versions of the same file are not useful anymore
+    path_key = os.path.basename(entry_path).split("-")[0]
+    for stale_path in glob.glob(
+        os.path.join(os.path.dirname(entry_path), f"{path_key}-*")
+    ):
+        if stale_path != entry_path and not stale_path.endswith(".tmp"):
+            remove_entry(stale_path)
+
+    tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+    remove_entry(tmp_path)
+    save_parsed_file(tmp_path, parsed_file)
+    try:
+        os.rename(tmp_path, entry_path)
+    except OSError:
+        # the same entry has just been stored by another process
+        remove_entry(tmp_path)
+
+
+def cache_prediction_file(path: str, cache_dir: str) -> Optional[str]:
+    """Stores the parsed file in the cache (if it is not there yet) and returns its entry.
+
+    Loader workers return only this path, so the parent maps the buffers
+    instead of receiving the pickled columns through a pipe (the data is
+    still copied once, when the store is built from them).
+    Returns None if the cache could not be written.
+    """
+    try:
+        entry_path = get_cache_path(cache_dir, path)
+        if not os.path.isfile(os.path.join(entry_path, META_FILE)):
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            store_cached_file(entry_path, read_prediction_file(path))
+        return entry_path
+    except OSError as e:
+        logging.warning(f"Could not write parse cache of {path}: {e}")
+        return None
+
+
+def get_entry_size(entry_path: str) -> int:
+    return sum(
+        entry.stat().st_size for entry in os.scandir(entry_path) if entry.is_file()
+    )
+
+
+def sweep_cache(cache_dir: str, max_mb: int, keep: Iterable[str] = ()) -> None:
+    """Removes least recently used entries until the cache takes at most max_mb megabytes.
+
+    Entries in keep (e.g. the ones just loaded) are never removed.
+    """
+    if max_mb <= 0 or not os.path.isdir(cache_dir):
+        return
+    keep = {os.path.abspath(entry_path) for entry_path in keep}
+    entries = []
+    for entry in os.scandir(cache_dir):
+        meta_path = os.path.join(entry.path, META_FILE)
+        if entry.is_dir() and os.path.isfile(meta_path):
+            try:
+                entries.append(
+                    (os.stat(meta_path).st_mtime, entry.path, get_entry_size(entry.path))
+                )
+            except OSError:
+                continue
+    total_size = sum(size for _, _, size in entries)
+    for _, entry_path, size in sorted(entries):
+        if total_size <= max_mb * 2**20:
+            break
+        if os.path.abspath(entry_path) not in keep:
+            remove_entry(entry_path)
+            total_size -= size
+
+
+def load_cache_entry(path: str, entry_path: Optional[str]) -> ParsedFile:
+    """Loads the entry that cache_prediction_file returned for the file.
+
+    The file is parsed again only if there is no entry or it cannot be read.
+    """
+    if entry_path is not None:
+        try:
+            return load_parsed_file(entry_path)
+        except Exception as e:
+            logging.warning(f"Could not read parse cache {entry_path}: {e}")
+    return read_prediction_file(path)
+
+
+def read_prediction_file_cached(path: str, cache_dir: Optional[str] = None) -> ParsedFile:
+    """Parses a prediction file reusing the on-disk cache when the file is unchanged."""
+    if not cache_dir:
+        return read_prediction_file(path)
+    return load_cache_entry(path, cache_prediction_file(path, cache_dir))
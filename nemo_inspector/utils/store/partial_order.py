@@ -0,0 +1,145 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Callable, Union
+
+import numpy as np
+
+from nemo_inspector.settings.constants import MIN_SORTED_PREFIX
+
+
+def rank_within_groups(
+    groups: np.ndarray, keys: np.ndarray, previous_rank: np.ndarray
+) -> np.ndarray:
+    """Returns the position of every row in its group ordered by keys.
+
+    Rows with equal keys keep their previous order.
+    """
+    order = np.lexsort((previous_rank, keys, groups))
+    sorted_groups = groups[order]
+    group_starts = np.searchsorted(sorted_groups, sorted_groups, side="left")
+    rank = np.empty(len(groups), dtype=np.int64)
+    rank[order] = np.arange(len(groups)) - group_starts
+    return rank
+
+
+class PartialOrder:
+    """Items in a sorted order that is computed only as far as it is read.
+
+    primary has to be non-decreasing along the final order. The first
+    positions are found by a partial selection on it, and only the selected
+    positions are passed to order_positions, which returns a subset of
+    positions (given in increasing order) in its stable final order.
+    """
+
+    def __init__(
+        self,
+        items: np.ndarray,
+        primary: np.ndarray,
+        order_positions: Callable[[np.ndarray], np.ndarray],
+    ):
+        self.items = items
+        self.primary = primary
+        self.order_positions = order_positions
+        # positions of the items that start the final order, None once the
+        # items themselves are in the final order
+        self.order = np.arange(0)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _extend(self, length: int) -> None:
+        # reading past the ordered part orders at least twice as much, so paging
+        # through everything costs a few partial selections
+        length = min(max(length, 2 * len(self.order), MIN_SORTED_PREFIX), len(self))
+        threshold = (
+            np.partition(self.primary, length - 1)[length - 1]
+            if length < len(self)
+            else None
+        )
+        if threshold is None or np.isnan(threshold):
+            candidates = np.arange(len(self))
+        else:
+            # all items that share the primary key of the last selected one are
+            # taken as well, so the candidates start the final order
+            candidates = np.flatnonzero(self.primary <= threshold)
+        self.order = self.order_positions(candidates)
+        if len(self.order) == len(self):
+            # the keys are not needed anymore
+            self.items = self.items[self.order]
+            self.order = self.primary = self.order_positions = None
+
+    def prefix(self, length: int) -> np.ndarray:
+        """Returns the first items of the final order."""
+        if self.order is not None and length > len(self.order):
+            self._extend(length)
+        if self.order is None:
+            return self.items[:length]
+        return self.items[self.order[:length]]
+
+    def complete(self) -> np.ndarray:
+        if self.order is not None:
+            self._extend(len(self))
+        return self.items
+
+    def __getitem__(self, position: int) -> Union[int, np.integer]:
+        position = range(len(self))[position]
+        return self.prefix(position + 1)[position]
+
+
+class PartialRank:
+    """Rank of rows inside their groups after a sort, computed group by group.
+
+    Sorted rows are ordered by their keys and then by the previous rank,
+    other rows keep the previous rank. The rank of all rows is computed
+    only when it is needed as a whole.
+    """
+
+    def __init__(
+        self,
+        previous_rank: np.ndarray,
+        rows: np.ndarray,
+        groups: np.ndarray,
+        keys: np.ndarray,
+    ):
+        self.previous_rank = previous_rank
+        self.rows = rows
+        self.groups = groups
+        self.keys = keys
+        self.row_keys = np.zeros(len(previous_rank), dtype=keys.dtype)
+        self.row_keys[rows] = keys
+        self.rank = None
+
+    def __len__(self) -> int:
+        return len(self.row_keys if self.rank is None else self.rank)
+
+    def __getitem__(self, rows: np.ndarray) -> np.ndarray:
+        """Returns values that order sorted rows of one group like their rank does."""
+        if self.rank is not None:
+            return self.rank[rows]
+        order = np.lexsort((self.previous_rank[rows], self.row_keys[rows]))
+        values = np.empty(len(rows), dtype=np.int64)
+        values[order] = np.arange(len(rows))
+        return values
+
+    def complete(self) -> np.ndarray:
+        if self.rank is None:
+            rank = self.previous_rank.copy()
+            rank[self.rows] = rank_within_groups(
+                self.groups, self.keys, self.previous_rank[self.rows]
+            )
+            self.rank = rank
+            self.previous_rank = self.rows = self.groups = self.keys = None
+            self.row_keys = None
+        return self.rank
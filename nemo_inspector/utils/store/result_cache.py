@@ -0,0 +1,71 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class ResultCache:
+    """Bounded LRU cache of filter and sort results for one state of the data.
+
+    The data state (the store, its version and whatever else results depend
+    on) is given with every lookup, entries of a previous state are dropped
+    as soon as it changes, so edits, labels and updates invalidate the cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.data_state = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_state(self, data_state: Hashable) -> None:
+        if data_state != self.data_state:
+            self.entries.clear()
+            self.data_state = data_state
+        self._evict()
+
+    def _evict(self) -> None:
+        # the size may have been lowered since the last access
+        while len(self.entries) > max(self.max_size, 0):
+            self.entries.popitem(last=False)
+
+    def get(self, data_state: Hashable, key: Hashable) -> Optional[Any]:
+        self._check_state(data_state)
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, data_state: Hashable, key: Hashable, value: Any) -> None:
+        self._check_state(data_state)
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self._evict()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.data_state = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self)} of {self.max_size} results cached, "
+            f"{self.hits} hits, {self.misses} misses"
+        )
@@ -0,0 +1,317 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from nemo_inspector.utils.store.generation_store import GenerationStore, LazyRecord
+from nemo_inspector.utils.store.partial_order import PartialOrder, PartialRank
+
+BASE_LAYER = "base"
+FILTER_LAYER = "filter"
+SORT_LAYER = "sort"
+
+
+class QuestionView(Mapping):
+    """Read-only mapping from a model name to the visible records of one question."""
+
+    def __init__(self, table: "TableView", position: int):
+        self._table = table
+        self._position = position
+        self._records = {}
+
+    def __getitem__(self, model: str) -> List[Dict]:
+        if model not in self._records:
+            if model not in self._table.models(self._position):
+                raise KeyError(model)
+            self._records[model] = self._table.files(self._position, model)
+        return self._records[model]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.models(self._position))
+
+    def __len__(self) -> int:
+        return len(self._table.models(self._position))
+
+
+@dataclass
+class ViewLayer:
+    """State of the view after one filter or sort.
+
+    Arrays that the layer did not change are shared with the layer below,
+    so they are replaced but never modified in place. After a sort, rank
+    and questions are partial orders until they are read as a whole.
+    """
+
+    kind: str
+    function: str
+    # the layer starts from the unfiltered data instead of the layer below
+    from_base: bool
+    selected: np.ndarray
+    rank: Union[np.ndarray, PartialRank]
+    questions: Union[np.ndarray, PartialOrder]
+    # describes how the arrays were computed, layers with equal states have equal
+    # arrays, so results computed from one of them can be reused for the others
+    state: Hashable = ()
+    # number of selected files of every question/model group, None until counted
+    group_sizes: Optional[np.ndarray] = None
+
+    def select(self, selected: np.ndarray, group_ids: np.ndarray) -> None:
+        """Replaces the selection, group_ids gives the group of every store row."""
+        if self.group_sizes is not None:
+            # the counts follow the files whose selection changed instead of a recount
+            changed = np.flatnonzero(self.selected != selected)
+            delta = np.bincount(
+                group_ids[changed],
+                weights=np.where(selected[changed], 1, -1),
+                minlength=len(self.group_sizes),
+            )
+            self.group_sizes = self.group_sizes + delta.astype(np.int64)
+        self.selected = selected
+
+
+class TableView:
+    """The currently displayed (filtered and sorted) part of a generation store.
+
+    The view never copies records: it keeps a selection mask over the store
+    rows, a rank that orders the files inside every question/model group and
+    the order of the visible questions. Every filter and sort pushes a layer
+    with its own arrays on top of the unmodified base, so it can be undone by
+    dropping the layer.
+    """
+
+    def __init__(self, store: Optional[GenerationStore] = None):
+        self.store = store
+        num_rows = len(store) if store is not None else 0
+        self.num_questions = store.num_questions if store is not None else 0
+        self.layers = [
+            ViewLayer(
+                kind=BASE_LAYER,
+                function="",
+                from_base=True,
+                selected=np.ones(num_rows, dtype=bool),
+                rank=np.arange(num_rows),
+                questions=np.arange(self.num_questions),
+            )
+        ]
+
+    @property
+    def selected(self) -> np.ndarray:
+        return self.layers[-1].selected
+
+    @selected.setter
+    def selected(self, selected: np.ndarray) -> None:
+        self.layers[-1].select(selected, self.store.group_ids)
+
+    @property
+    def rank(self) -> np.ndarray:
+        layer = self.layers[-1]
+        if isinstance(layer.rank, PartialRank):
+            layer.rank = layer.rank.complete()
+        return layer.rank
+
+    @rank.setter
+    def rank(self, rank: np.ndarray) -> None:
+        self.layers[-1].rank = rank
+
+    @property
+    def questions(self) -> np.ndarray:
+        """Returns the visible questions in display order."""
+        layer = self.layers[-1]
+        if isinstance(layer.questions, PartialOrder):
+            layer.questions = layer.questions.complete()
+        return layer.questions
+
+    @questions.setter
+    def questions(self, questions: np.ndarray) -> None:
+        self.layers[-1].questions = questions
+
+    @property
+    def state(self) -> Hashable:
+        return self.layers[-1].state
+
+    @state.setter
+    def state(self, state: Hashable) -> None:
+        self.layers[-1].state = state
+
+    def push_layer(self, kind: str, function: str, from_base: bool = False) -> ViewLayer:
+        """Starts a layer from the current state (or the base one), nothing is copied.
+
+        Operations write their results to the returned layer.
+        """
+        below = self.layers[0] if from_base else self.layers[-1]
+        layer = ViewLayer(
+            kind=kind,
+            function=function,
+            from_base=from_base,
+            selected=below.selected,
+            rank=below.rank,
+            questions=below.questions,
+            state=below.state,
+            group_sizes=below.group_sizes,
+        )
+        self.layers.append(layer)
+        return layer
+
+    def pop_layer(self, layer: Optional[ViewLayer] = None) -> bool:
+        """Undoes the last filter or sort (or the given one), False if there is none."""
+        if len(self.layers) == 1:
+            return False
+        if layer is None:
+            self.layers.pop()
+            return True
+        for layer_id in range(1, len(self.layers)):
+            if self.layers[layer_id] is layer:
+                del self.layers[layer_id]
+                return True
+        return False
+
+    def active_functions(self, kind: str) -> List[str]:
+        """Returns functions of the layers of the kind that define the current state."""
+        functions = []
+        for layer in reversed(self.layers[1:]):
+            if layer.kind == kind:
+                functions.append(layer.function)
+            if layer.from_base:
+                break
+        return functions[::-1]
+
+    def question_ids(self) -> np.ndarray:
+        """Returns the visible questions in no particular order, pending sorts stay pending."""
+        questions = self.layers[-1].questions
+        return questions.items if isinstance(questions, PartialOrder) else questions
+
+    def question(self, position: int) -> int:
+        """Returns the question at the position, a pending sort orders only as far as that."""
+        return int(self.layers[-1].questions[position])
+
+    def __len__(self) -> int:
+        return len(self.layers[-1].questions)
+
+    def __iter__(self) -> Iterator[QuestionView]:
+        return (QuestionView(self, position) for position in range(len(self)))
+
+    def __getitem__(
+        self, position: Union[int, slice]
+    ) -> Union[QuestionView, List[QuestionView]]:
+        if isinstance(position, slice):
+            return [QuestionView(self, index) for index in range(len(self))[position]]
+        if not -len(self) <= position < len(self):
+            raise IndexError(position)
+        return QuestionView(self, position % len(self))
+
+    def models(self, position: int) -> List[str]:
+        return self.store.question_models(self.question(position))
+
+    def rows(self, position: int, model: str) -> np.ndarray:
+        """Returns visible row ids of the model answers for the question in display order."""
+        rows = self.store.group_rows(self.question(position), model)
+        return self.display_order(rows[self.selected[rows]])
+
+    def display_order(self, rows: np.ndarray) -> np.ndarray:
+        """Returns the rows ordered like the files of their question/model groups.
+
+        A pending sort ranks only these rows.
+        """
+        return rows[np.argsort(self.layers[-1].rank[rows], kind="stable")]
+
+    def files(self, position: int, model: str) -> List[LazyRecord]:
+        return self.store.lazy_records(self.rows(position, model))
+
+    def find_row(self, position: int, model: str, file_name: str) -> Optional[int]:
+        return self.store.find_row(self.rows(position, model), file_name)
+
+    def remap(
+        self, previous_rows: np.ndarray, replaced_rows: Optional[np.ndarray] = None
+    ) -> None:
+        """Follows a change of the store rows, new rows and new questions become visible.
+
+        replaced_rows gives the previous row that a new row replaces (-1 for none),
+        such a row keeps the position of the replaced one in the sort order.
+        """
+        if replaced_rows is None:
+            replaced_rows = np.full(len(previous_rows), -1)
+        num_questions = self.store.num_questions
+        # arrays shared between layers are remapped once and stay shared
+        remapped = {}
+
+        def remap_selected(selected: np.ndarray) -> np.ndarray:
+            # index -1 of previous_rows picks the appended value
+            return np.append(selected, True)[previous_rows]
+
+        def remap_rank(rank: np.ndarray) -> np.ndarray:
+            # new answers go after the existing ones of their group
+            return np.where(
+                previous_rows >= 0,
+                np.append(rank, 0)[previous_rows],
+                np.where(
+                    replaced_rows >= 0,
+                    np.append(rank, 0)[replaced_rows],
+                    len(rank) + np.arange(len(previous_rows)),
+                ),
+            )
+
+        def remap_questions(questions: np.ndarray) -> np.ndarray:
+            return np.concatenate(
+                [
+                    questions[questions < num_questions],
+                    np.arange(min(self.num_questions, num_questions), num_questions),
+                ]
+            )
+
+        for layer in self.layers:
+            for name, partial_type in (
+                ("rank", PartialRank),
+                ("questions", PartialOrder),
+            ):
+                if isinstance(getattr(layer, name), partial_type):
+                    setattr(layer, name, getattr(layer, name).complete())
+            for name, function in (
+                ("selected", remap_selected),
+                ("rank", remap_rank),
+                ("questions", remap_questions),
+            ):
+                array = getattr(layer, name)
+                if id(array) not in remapped:
+                    remapped[id(array)] = function(array)
+                setattr(layer, name, remapped[id(array)])
+            # groups of new questions and models change the group ids
+            layer.group_sizes = None
+        self.num_questions = num_questions
+
+    def group_sizes(self) -> np.ndarray:
+        """Returns the number of selected files of every question/model group."""
+        layer = self.layers[-1]
+        if layer.group_sizes is None:
+            layer.group_sizes = np.bincount(
+                self.store.group_ids[layer.selected], minlength=self.store.num_groups
+            )
+        return layer.group_sizes
+
+    def answer_counts(self, model: str) -> Tuple[int, int]:
+        """Returns the number of visible answers of the model and of the questions with them."""
+        if model not in self.store.model_ids:
+            return 0, 0
+        sizes = self.group_sizes()[
+            self.question_ids() * len(self.store.models) + self.store.model_ids[model]
+        ]
+        return int(sizes.sum()), int(np.count_nonzero(sizes))
+
+    def visible_rows(self) -> np.ndarray:
+        question_selected = np.zeros(self.store.num_questions, dtype=bool)
+        question_selected[self.question_ids()] = True
+        return np.flatnonzero(self.selected & question_selected[self.store.questions])
@@ -0,0 +1,106 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from nemo_inspector.utils.store.jsonl_reader import ParsedFile, read_prediction_file
+
+# bytes at the beginning of a file that are compared to detect rewrites
+HEAD_SIZE = 4096
+
+
+def read_head(path: str, size: int) -> bytes:
+    with open(path, "rb") as file:
+        return file.read(min(size, HEAD_SIZE))
+
+
+@dataclass
+class FollowedFile:
+    path: str
+    end: int
+    head: bytes
+
+
+@dataclass
+class FileUpdate:
+    path: str
+    parsed_file: ParsedFile
+    # the file was rewritten and parsed_file holds all of its lines
+    reloaded: bool
+
+
+class TailFollower:
+    """Watches prediction files that are still being written.
+
+    A background thread remembers how many bytes of every file were consumed,
+    parses only the lines appended since then and queues them as updates.
+    A file that became shorter or whose beginning changed is parsed again
+    from scratch. Updates are applied by the caller via pop_updates, so the
+    thread never touches the loaded data.
+    """
+
+    def __init__(self, ends: Dict[str, int], interval: float):
+        self.files = {
+            path: FollowedFile(path, end, read_head(path, end))
+            for path, end in ends.items()
+        }
+        self.interval = interval
+        self.updates = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            for followed_file in self.files.values():
+                try:
+                    update = self.poll(followed_file)
+                except Exception as e:
+                    logging.warning(f"Could not follow {followed_file.path}: {e}")
+                    continue
+                if update is not None:
+                    with self.lock:
+                        self.updates.append(update)
+
+    def poll(self, followed_file: FollowedFile) -> Optional[FileUpdate]:
+        size = os.path.getsize(followed_file.path)
+        rewritten = (
+            size < followed_file.end
+            or read_head(followed_file.path, followed_file.end) != followed_file.head
+        )
+        if not rewritten and size == followed_file.end:
+            return None
+        parsed_file = read_prediction_file(
+            followed_file.path, 0 if rewritten else followed_file.end
+        )
+        if not rewritten and parsed_file.end == followed_file.end:
+            return None
+        followed_file.end = parsed_file.end
+        followed_file.head = read_head(followed_file.path, parsed_file.end)
+        return FileUpdate(followed_file.path, parsed_file, rewritten)
+
+    def pop_updates(self) -> List[FileUpdate]:
+        with self.lock:
+            updates, self.updates = self.updates, []
+        return updates
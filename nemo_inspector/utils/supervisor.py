@@ -0,0 +1,182 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, List, Optional
+
+from nemo_inspector.utils.jobs import JobCancelled, report_progress
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# minimal time between two progress messages of a worker
+PROGRESS_INTERVAL = 0.5
+
+Progress = Callable[[int], None]
+
+
+class UserCodeError(RuntimeError):
+    """Code typed in the UI ran out of its time or memory budget."""
+
+
+def can_supervise() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def get_address_space() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def limit_memory(memory_mb: int) -> None:
+    """Lets the process allocate at most memory_mb megabytes on top of what it uses."""
+    address_space = get_address_space()
+    if resource is None or memory_mb <= 0 or address_space is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = address_space + memory_mb * 2**20
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def run_worker(
+    function: Callable[[Progress], Any], connection: Connection, memory_mb: int
+) -> None:
+    last_report = time.monotonic()
+
+    def progress(done: int) -> None:
+        nonlocal last_report
+        if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+            last_report = time.monotonic()
+            connection.send(("progress", done))
+
+    try:
+        limit_memory(memory_mb)
+        message = ("result", function(progress))
+    except MemoryError:
+        message = ("error", f"exceeded the memory limit of {memory_mb} MB")
+    except Exception as e:
+        message = ("exception", e)
+    try:
+        connection.send(message)
+    except Exception as e:
+        # the result or the exception cannot be pickled
+        connection.send(("error", f"could not return the result: {e}"))
+    connection.close()
+
+
+def run_supervised(
+    functions: List[Callable[[Progress], Any]],
+    sizes: List[int],
+    description: str,
+    timeout: float,
+    memory_mb: int,
+) -> List:
+    """Returns function(progress) of every function, each computed in a forked worker.
+
+    Workers run concurrently and see the data of this process without copying
+    it. progress(done) reports how many of its sizes[i] items a worker processed.
+    If the workers do not finish in timeout seconds (0 means no limit), a
+    worker allocates more than memory_mb megabytes or dies, all workers are
+    stopped and UserCodeError tells how far they got. The same happens when
+    the background job running them is cancelled. Exceptions of the
+    functions are raised as they are. Without limits, or where processes
+    cannot be forked, the functions run in this process.
+    """
+    total = sum(sizes)
+
+    def stop(reason: str, done: int) -> UserCodeError:
+        return UserCodeError(
+            f"{description} {reason}, {done} of {total} items were processed"
+        )
+
+    def report(done: int) -> None:
+        try:
+            report_progress(done, total)
+        except JobCancelled:
+            raise stop("was cancelled", done) from None
+
+    if (timeout <= 0 and memory_mb <= 0) or not can_supervise():
+        results, offset = [], 0
+        for function, size in zip(functions, sizes):
+            results.append(function(lambda done, offset=offset: report(offset + done)))
+            offset += size
+        return results
+
+    context = multiprocessing.get_context("fork")
+    workers = []
+    try:
+        for function in functions:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=run_worker, args=(function, sender, memory_mb), daemon=True
+            )
+            process.start()
+            sender.close()
+            workers.append((process, receiver))
+
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        results = [None] * len(functions)
+        done = [0] * len(functions)
+        pending = {receiver: index for index, (_, receiver) in enumerate(workers)}
+
+        while pending:
+            report(sum(done))
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise stop(f"did not finish in {timeout:g} s", sum(done))
+            # cancellation is checked at least every PROGRESS_INTERVAL
+            interval = (
+                PROGRESS_INTERVAL
+                if remaining is None
+                else min(remaining, PROGRESS_INTERVAL)
+            )
+            for receiver in wait(list(pending), interval):
+                index = pending[receiver]
+                try:
+                    kind, value = receiver.recv()
+                except EOFError:
+                    process = workers[index][0]
+                    process.join()
+                    raise stop(
+                        f"stopped unexpectedly (exit code {process.exitcode}),"
+                        " possibly out of memory",
+                        sum(done),
+                    ) from None
+                if kind == "progress":
+                    done[index] = value
+                elif kind == "result":
+                    results[index] = value
+                    done[index] = sizes[index]
+                    del pending[receiver]
+                elif kind == "error":
+                    raise stop(value, sum(done))
+                else:
+                    raise value
+        return results
+    finally:
+        for process, receiver in workers:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            receiver.close()